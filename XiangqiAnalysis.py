@@ -0,0 +1,92 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: Multiple line analysis of Xiangqi positions and games.
+# A position is searched for its best few moves within a time budget, each move with its score and line.
+# A game is analysed position by position in a pool of processes. Each process takes a run of consecutive
+# positions and keeps its transposition table from one to the next, since they share most of their moves.
+
+import multiprocessing
+
+from XiangqiGame import XiangqiGame
+from XiangqiSearch import XiangqiSearch, TranspositionTable
+
+DEFAULT_LINE_COUNT = 3
+DEFAULT_DEPTH = 64
+
+
+def get_game_positions(game):
+    """
+    A function to list the FEN string of every position in a game, from before the first move to the current one.
+    The game's moves are taken back and made again, leaving it as it was.
+    """
+    moves = game.get_move_history()
+    for _ in moves:
+        game.undo_move()
+    positions = [game.get_fen()]
+    for move in moves:
+        game.apply_move(move)
+        positions.append(game.get_fen())
+    return positions
+
+
+def analyse_position(position, line_count=DEFAULT_LINE_COUNT, time_limit=1.0, depth=DEFAULT_DEPTH,
+                     transposition_table=None):
+    """
+    A function to find the best line_count moves in a position within time_limit seconds.
+    The position is a XiangqiGame, which is left unchanged, or a FEN string.
+    A transposition table from an earlier search can be passed in to reuse its entries.
+    :returns a list of XiangqiSearchResult, best first, an empty list if the side to move has no moves,
+        or False if the FEN string could not be read
+    """
+    game = XiangqiGame()
+    fen = position if isinstance(position, str) else position.get_fen()
+    if not game.load_fen(fen):
+        return False
+
+    # a side without a move is mated or stalemated, and has lost either way
+    if not game.get_available_moves(game.get_turn_order_color()):
+        return []
+    search = XiangqiSearch(game, transposition_table)
+    return search.search_lines(line_count, depth, time_limit)
+
+
+def _analyse_positions(arguments):
+    """A function run in each process of the game analysis, searching a run of positions with one table"""
+    positions, line_count, time_limit, depth = arguments
+    table = TranspositionTable()
+    return [analyse_position(fen, line_count, time_limit, depth, table) for fen in positions]
+
+
+def analyse_game(game, line_count=DEFAULT_LINE_COUNT, time_limit=1.0, depth=DEFAULT_DEPTH, processes=None):
+    """
+    A function to analyse every position of a game, each within time_limit seconds, in a pool of processes.
+    The game is a XiangqiGame, whose move history is replayed, or a list of FEN strings.
+    :returns a list of (FEN string, list of XiangqiSearchResult) in game order
+    """
+    positions = game if isinstance(game, list) else get_game_positions(game)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(positions)))
+
+    # contiguous runs of positions, so each process searches positions that follow each other
+    run_length = -(-len(positions) // processes)
+    runs = [(positions[start:start + run_length], line_count, time_limit, depth)
+            for start in range(0, len(positions), run_length)]
+
+    analysis = []
+    if len(runs) == 1:
+        return list(zip(positions, _analyse_positions(runs[0])))
+    with multiprocessing.Pool(len(runs)) as pool:
+        for run, run_results in zip(runs, pool.imap(_analyse_positions, runs)):
+            analysis.extend(zip(run[0], run_results))
+    return analysis
+
+
+def main():
+    # print the best three moves of the opening position when run as a script
+    for result in analyse_position(XiangqiGame(), time_limit=5.0):
+        print(result.get_best_move(), result.get_score(), result.get_principal_variation())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A SQLite game archive indexed by position, to find the games that reached a position
+# and the moves played from it with their results.
+#
+# Each game is replayed and stored as one row per position it reached, keyed by the position's 64 bit hash
+# with the game, the half move number and the move played next (none after the last move). A second table
+# keeps running move counts and results per position, so move statistics are an index lookup however many
+# games are stored. Position keys are stored as signed 64 bit integers to fit SQLite.
+#
+# Games are replayed in a pool of processes, and the main process is the only writer, adding them in
+# batches with one transaction per batch.
+#
+# Run as a script to add the games of archive files read by XiangqiNotationReader:
+#   python XiangqiArchive.py games.db games1.txt games2.txt
+
+import json
+import multiprocessing
+import sqlite3
+import sys
+from collections import Counter
+
+from XiangqiGame import XiangqiGame
+from XiangqiNotation import XiangqiNotationReader
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CHUNK_SIZE = 16
+
+# game results by archive result tag, other games keep the state the replay ended in
+RESULTS_BY_TAG = {"1-0": "RED_WON", "0-1": "BLACK_WON", "1/2-1/2": "DRAW"}
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS games (
+        game_id INTEGER PRIMARY KEY,
+        result TEXT NOT NULL,
+        ply_count INTEGER NOT NULL,
+        start_fen TEXT,
+        tags TEXT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS positions (
+        position_key INTEGER NOT NULL,
+        game_id INTEGER NOT NULL,
+        ply INTEGER NOT NULL,
+        move TEXT,
+        PRIMARY KEY (position_key, game_id, ply)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS positions_by_game ON positions (game_id, ply)",
+    """CREATE TABLE IF NOT EXISTS move_statistics (
+        position_key INTEGER NOT NULL,
+        move TEXT NOT NULL,
+        game_count INTEGER NOT NULL,
+        red_wins INTEGER NOT NULL,
+        draws INTEGER NOT NULL,
+        black_wins INTEGER NOT NULL,
+        PRIMARY KEY (position_key, move)) WITHOUT ROWID""",
+]
+
+
+def convert_to_signed_key(position_key):
+    """A function to convert an unsigned 64 bit position key to the signed integer SQLite stores"""
+    return position_key - (1 << 64) if position_key >= 1 << 63 else position_key
+
+
+def get_position_key(position):
+    """
+    A function to return the signed position key of a XiangqiGame, a FEN string or an unsigned position key.
+    :returns the key, or False if the FEN string could not be read
+    """
+    if isinstance(position, int):
+        return convert_to_signed_key(position)
+    if isinstance(position, str):
+        game = XiangqiGame()
+        if not game.load_fen(position):
+            return False
+        position = game
+    return convert_to_signed_key(position.get_position_key())
+
+
+def replay_game(tags, moves):
+    """
+    A function to replay a game's moves from its FEN tag or the starting position.
+    :returns (result, list of (signed position key, half move number, move or None)), or False if a move fails
+    """
+    game = XiangqiGame()
+    if "FEN" in tags and not game.load_fen(tags["FEN"]):
+        return False
+    rows = []
+    for ply, (start, end) in enumerate(moves):
+        position_key = convert_to_signed_key(game.get_position_key())
+        if not game.make_move(start, end):
+            return False
+        rows.append((position_key, ply, start + "-" + end))
+    rows.append((convert_to_signed_key(game.get_position_key()), len(moves), None))
+    return RESULTS_BY_TAG.get(tags.get("Result"), game.get_game_state()), rows
+
+
+def _replay_game(arguments):
+    """A function run in each process of the ingest, replaying one game"""
+    tags, moves = arguments
+    return tags, replay_game(tags, moves)
+
+
+class XiangqiArchive:
+    """Represents a SQLite database of games indexed by position"""
+
+    def __init__(self, path):
+        """Initializes an archive in the database file at path, creating the tables if needed"""
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+        self._connection.commit()
+        self._skipped_count = 0
+
+    def get_connection(self):
+        """A method to return the SQLite connection"""
+        return self._connection
+
+    def get_skipped_count(self):
+        """A method to return the number of games left out because a move could not be made"""
+        return self._skipped_count
+
+    def get_game_count(self):
+        """A method to return the number of stored games"""
+        return self._connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def close(self):
+        """A method to close the database"""
+        self._connection.close()
+
+    def ingest(self, games, processes=None, batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        A method to replay and store games given as (tags, moves), tags a dictionary and moves (start, end) pairs,
+        like XiangqiNotationReader.read_games yields. The games are replayed in a pool of processes, or in this
+        process if processes is 1, and written here batch_size games to a transaction.
+        :returns the number of games added
+        """
+        added_count = 0
+        batch = []
+        if processes == 1:
+            for replayed in map(_replay_game, games):
+                added_count += self.add_replayed_game(batch, replayed, batch_size)
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                for replayed in pool.imap(_replay_game, games, chunk_size):
+                    added_count += self.add_replayed_game(batch, replayed, batch_size)
+        self.write_batch(batch)
+        return added_count
+
+    def add_replayed_game(self, batch, replayed, batch_size):
+        """A method to queue a replayed game, writing the batch once it is full, and return 1 if it was queued"""
+        tags, replay = replayed
+        if not replay:
+            self._skipped_count += 1
+            return 0
+        batch.append((tags, replay))
+        if len(batch) >= batch_size:
+            self.write_batch(batch)
+        return 1
+
+    def write_batch(self, batch):
+        """A method to write the queued games in one transaction and empty the queue"""
+        if not batch:
+            return
+        next_game_id = self._connection.execute("SELECT COALESCE(MAX(game_id), 0) + 1 FROM games").fetchone()[0]
+        game_rows = []
+        position_rows = []
+        statistics = Counter()
+        for game_id, (tags, (result, rows)) in enumerate(batch, next_game_id):
+            game_rows.append((game_id, result, len(rows) - 1, tags.get("FEN"), json.dumps(tags)))
+            for position_key, ply, move in rows:
+                position_rows.append((position_key, game_id, ply, move))
+                if move is not None:
+                    statistics[(position_key, move, result)] += 1
+
+        with self._connection:
+            self._connection.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?)", game_rows)
+            self._connection.executemany("INSERT INTO positions VALUES (?, ?, ?, ?)", position_rows)
+            self._connection.executemany(
+                """INSERT INTO move_statistics VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (position_key, move) DO UPDATE SET
+                    game_count = game_count + excluded.game_count,
+                    red_wins = red_wins + excluded.red_wins,
+                    draws = draws + excluded.draws,
+                    black_wins = black_wins + excluded.black_wins""",
+                [(position_key, move, count, count if result == "RED_WON" else 0, count if result == "DRAW" else 0,
+                  count if result == "BLACK_WON" else 0)
+                 for (position_key, move, result), count in statistics.items()])
+        batch.clear()
+
+    def get_games_reaching(self, position, limit=None):
+        """
+        A method to find the games that reached a position, given as a XiangqiGame, a FEN string or a position key.
+        :returns a list of (game id, half move number) in game order, or False if the FEN string could not be read
+        """
+        position_key = get_position_key(position)
+        if position_key is False:
+            return False
+        query = "SELECT game_id, ply FROM positions WHERE position_key = ? ORDER BY game_id, ply"
+        if limit is not None:
+            return self._connection.execute(query + " LIMIT ?", (position_key, limit)).fetchall()
+        return self._connection.execute(query, (position_key,)).fetchall()
+
+    def get_move_statistics(self, position):
+        """
+        A method to list the moves played from a position, given as a XiangqiGame, a FEN string or a position key.
+        :returns a list of (move, games, red wins, draws, black wins), most played first,
+            or False if the FEN string could not be read
+        """
+        position_key = get_position_key(position)
+        if position_key is False:
+            return False
+        return self._connection.execute(
+            """SELECT move, game_count, red_wins, draws, black_wins FROM move_statistics
+            WHERE position_key = ? ORDER BY game_count DESC, move""", (position_key,)).fetchall()
+
+    def get_game_moves(self, game_id):
+        """A method to return a stored game's moves as (start, end) pairs"""
+        rows = self._connection.execute("SELECT move FROM positions WHERE game_id = ? AND move IS NOT NULL "
+                                        "ORDER BY ply", (game_id,)).fetchall()
+        return [tuple(row[0].split("-")) for row in rows]
+
+
+def main(argv=None):
+    # add the games of archive files to a database and print the totals
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("usage: python XiangqiArchive.py games.db archive.txt ...")
+        return 2
+    archive = XiangqiArchive(argv[0])
+    for path in argv[1:]:
+        added_count = archive.ingest(XiangqiNotationReader(path).read_games())
+        print("%s: %d games added" % (path, added_count))
+    print("%d games stored, %d skipped" % (archive.get_game_count(), archive.get_skipped_count()))
+    archive.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: Move generation for many Xiangqi boards at once with NumPy array operations.
+# The boards are rows of a (boards, 90) array of piece codes, the codes XiangqiMove uses: 0 for an empty
+# location, 1-7 for Red pieces and 9-15 for Black pieces, location index row * 9 + col. A second array holds
+# the side to move of each board, 0 for Red and 1 for Black.
+#
+# Moves are pseudo-legal by the written rules: moves that leave the mover's general attacked or facing the other
+# general are not removed. The pieces that step are looked up in precomputed tables of end locations, with the
+# horse leg or elephant eye location that blocks each one. Chariots and cannons look along precomputed rays and
+# count the pieces before each location to find their blockers and screens.
+#
+# A move list is three arrays, board index, start index and end index, sorted by board.
+# apply_moves makes one move on every board in a single step, so a simulation can pick one move per board per tick.
+
+import numpy
+
+from XiangqiGame import XiangqiGame, PIECE_CODES, PIECE_TYPES_BY_CODE, General, Advisor, Elephant, Horse, \
+    Chariot, Cannon, Soldier, ORTHOGONAL_STEPS, DIAGONAL_STEPS, ELEPHANT_STEPS, HORSE_STEPS, get_piece_code
+
+CODE_COUNT = 16
+BLACK_FLAG = 8
+SLIDER_CODES = (PIECE_CODES[Chariot], PIECE_CODES[Cannon])
+
+
+def is_in_palace(row, col, color):
+    """A function to determine if a location is in a color's palace"""
+    return 3 <= col <= 5 and (7 <= row <= 9 if color == "Red" else 0 <= row <= 2)
+
+
+def is_on_own_side(row, color):
+    """A function to determine if a row is on a color's side of the river"""
+    return row >= 5 if color == "Red" else row <= 4
+
+
+def get_step_moves(piece_type, color, row, col):
+    """A function to list a stepping piece's (end location, blocking location or -1) from a location"""
+    steps = []
+    if piece_type == General:
+        steps = [(row + row_step, col + col_step, -1) for row_step, col_step in ORTHOGONAL_STEPS
+                 if is_in_palace(row + row_step, col + col_step, color)]
+    elif piece_type == Advisor:
+        steps = [(row + row_step, col + col_step, -1) for row_step, col_step in DIAGONAL_STEPS
+                 if is_in_palace(row + row_step, col + col_step, color)]
+    elif piece_type == Elephant:
+        steps = [(row + row_step, col + col_step, (row + row_step // 2) * 9 + col + col_step // 2)
+                 for row_step, col_step in ELEPHANT_STEPS if is_on_own_side(row + row_step, color)]
+    elif piece_type == Horse:
+        # the leg is the location next to the horse in the long direction
+        for row_step, col_step in HORSE_STEPS:
+            if abs(row_step) == 2:
+                steps.append((row + row_step, col + col_step, (row + row_step // 2) * 9 + col))
+            else:
+                steps.append((row + row_step, col + col_step, row * 9 + col + col_step // 2))
+    elif piece_type == Soldier:
+        forward = -1 if color == "Red" else 1
+        steps = [(row + forward, col, -1)]
+        if not is_on_own_side(row, color):
+            steps += [(row, col - 1, -1), (row, col + 1, -1)]
+    return [(row_end * 9 + col_end, block) for row_end, col_end, block in steps
+            if 0 <= row_end < 10 and 0 <= col_end < 9]
+
+
+def get_step_tables():
+    """
+    A function to build the end location and blocking location tables of the stepping pieces,
+    each of shape (piece code, start index, 8) and padded with -1
+    """
+    targets = numpy.full((CODE_COUNT, 90, 8), -1, dtype=numpy.int16)
+    blocks = numpy.full((CODE_COUNT, 90, 8), -1, dtype=numpy.int16)
+    for piece_type, code in PIECE_CODES.items():
+        for color, color_code in (("Red", code), ("Black", code + BLACK_FLAG)):
+            for index in range(90):
+                for slot, (end, block) in enumerate(get_step_moves(piece_type, color, index // 9, index % 9)):
+                    targets[color_code, index, slot] = end
+                    blocks[color_code, index, slot] = block
+    return targets, blocks
+
+
+def get_ray_table():
+    """A function to build the locations along each orthogonal direction from every location, shape (90, 4, 9)"""
+    rays = numpy.full((90, 4, 9), -1, dtype=numpy.int16)
+    for index in range(90):
+        for direction, (row_step, col_step) in enumerate(ORTHOGONAL_STEPS):
+            row, col = index // 9 + row_step, index % 9 + col_step
+            distance = 0
+            while 0 <= row < 10 and 0 <= col < 9:
+                rays[index, direction, distance] = row * 9 + col
+                row += row_step
+                col += col_step
+                distance += 1
+    return rays
+
+
+STEP_TARGETS, STEP_BLOCKS = get_step_tables()
+RAYS = get_ray_table()
+
+
+def encode_game(game):
+    """A function to return a game's board as 90 piece codes and its side to move, 0 for Red and 1 for Black"""
+    codes = [0 if square == "..." else get_piece_code(square) for row in game.get_game_board().get_board()
+             for square in row]
+    return codes, 0 if game.get_turn_order_color() == "Red" else 1
+
+
+class XiangqiBatch:
+    """Represents many boards whose moves are generated and made together"""
+
+    def __init__(self, board_count=0):
+        """Initializes board_count boards in the starting position with Red to move"""
+        codes, side = encode_game(XiangqiGame())
+        self._boards = numpy.tile(numpy.array(codes, dtype=numpy.uint8), (board_count, 1))
+        self._sides = numpy.zeros(board_count, dtype=numpy.uint8)
+
+    @classmethod
+    def from_games(cls, games):
+        """A method to make a batch holding the current position of each XiangqiGame in a list"""
+        batch = cls()
+        encoded = [encode_game(game) for game in games]
+        batch._boards = numpy.array([codes for codes, side in encoded], dtype=numpy.uint8).reshape(-1, 90)
+        batch._sides = numpy.array([side for codes, side in encoded], dtype=numpy.uint8)
+        return batch
+
+    def get_boards(self):
+        """A method to return the (boards, 90) array of piece codes"""
+        return self._boards
+
+    def get_sides(self):
+        """A method to return the side to move of each board, 0 for Red and 1 for Black"""
+        return self._sides
+
+    def get_board_count(self):
+        """A method to return the number of boards"""
+        return len(self._boards)
+
+    def to_game(self, board_index):
+        """
+        A method to set up a XiangqiGame in a board's position, with an empty move history.
+        :returns the game, or False if the board doesn't have one general of each color
+        """
+        placement = []
+        for index, code in enumerate(self._boards[board_index]):
+            if code:
+                color = "Black" if code & BLACK_FLAG else "Red"
+                placement.append((PIECE_TYPES_BY_CODE[code & 7](None, color), index // 9, index % 9))
+
+        game = XiangqiGame()
+        if not game.set_up_position(placement, "Black" if self._sides[board_index] else "Red"):
+            return False
+        return game
+
+    def to_games(self):
+        """A method to set up a XiangqiGame for every board, False for boards that lost a general"""
+        return [self.to_game(board_index) for board_index in range(self.get_board_count())]
+
+    def generate_moves(self):
+        """
+        A method to generate the pseudo-legal moves of the side to move on every board.
+        :returns (board indexes, start indexes, end indexes), sorted by board, start and end
+        """
+        boards = self._boards
+        board_indexes = numpy.arange(len(boards))[:, None]
+        occupied = boards != 0
+        own = occupied & ((boards >> 3) == self._sides[:, None])
+
+        # stepping pieces, an end location is open unless it holds an own piece or its leg or eye is taken
+        targets = STEP_TARGETS[boards, numpy.arange(90)]
+        blocks = STEP_BLOCKS[boards, numpy.arange(90)]
+        target_codes = boards[board_indexes[:, :, None], numpy.maximum(targets, 0)]
+        valid = (targets >= 0) & own[:, :, None]
+        valid &= ~((target_codes != 0) & ((target_codes >> 3) == self._sides[:, None, None]))
+        valid &= ~((blocks >= 0) & occupied[board_indexes[:, :, None], numpy.maximum(blocks, 0)])
+        step_boards, step_starts, slots = numpy.nonzero(valid)
+        step_ends = targets[step_boards, step_starts, slots]
+
+        # chariots and cannons, counting the pieces before each location along the rays
+        sliders = own & numpy.isin(boards & 7, SLIDER_CODES)
+        slider_boards, slider_starts = numpy.nonzero(sliders)
+        rays = RAYS[slider_starts]
+        on_board = rays >= 0
+        ray_codes = boards[slider_boards[:, None, None], numpy.maximum(rays, 0)]
+        ray_occupied = on_board & (ray_codes != 0)
+        pieces_before = numpy.cumsum(ray_occupied, axis=2) - ray_occupied
+        enemy = ray_occupied & ((ray_codes >> 3) != self._sides[slider_boards][:, None, None])
+        is_chariot = ((boards[slider_boards, slider_starts] & 7) == PIECE_CODES[Chariot])[:, None, None]
+        chariot_moves = on_board & (pieces_before == 0) & (~ray_occupied | enemy)
+        cannon_moves = on_board & ((pieces_before == 0) & ~ray_occupied | (pieces_before == 1) & enemy)
+        slider_index, directions, distances = numpy.nonzero(numpy.where(is_chariot, chariot_moves, cannon_moves))
+
+        move_boards = numpy.concatenate([step_boards, slider_boards[slider_index]])
+        move_starts = numpy.concatenate([step_starts, slider_starts[slider_index]])
+        move_ends = numpy.concatenate([step_ends, rays[slider_index, directions, distances]]).astype(numpy.intp)
+        order = numpy.lexsort((move_ends, move_starts, move_boards))
+        return move_boards[order], move_starts[order], move_ends[order]
+
+    def choose_random_moves(self, moves, random_generator):
+        """
+        A method to pick one move per board from a move list with a numpy.random.Generator.
+        :returns (start indexes, end indexes) with one entry per board, -1 for boards without a move
+        """
+        move_boards, move_starts, move_ends = moves
+        counts = numpy.bincount(move_boards, minlength=self.get_board_count())
+        offsets = numpy.cumsum(counts) - counts
+        has_move = counts > 0
+        picks = offsets + (random_generator.random(len(counts)) * counts).astype(numpy.intp)
+        starts = numpy.full(len(counts), -1, dtype=numpy.intp)
+        ends = numpy.full(len(counts), -1, dtype=numpy.intp)
+        starts[has_move] = move_starts[picks[has_move]]
+        ends[has_move] = move_ends[picks[has_move]]
+        return starts, ends
+
+    def apply_moves(self, starts, ends):
+        """
+        A method to make one move on each board, skipping boards whose start index is -1,
+        and pass the turn on those boards.
+        :returns the piece code captured on each board, 0 if none
+        """
+        moved = numpy.nonzero(starts >= 0)[0]
+        captured = numpy.zeros(self.get_board_count(), dtype=numpy.uint8)
+        captured[moved] = self._boards[moved, ends[moved]]
+        self._boards[moved, ends[moved]] = self._boards[moved, starts[moved]]
+        self._boards[moved, starts[moved]] = 0
+        self._sides[moved] ^= 1
+        return captured
@@ -0,0 +1,218 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: Benchmarks for the Xiangqi game.
+# Runs a fixed set of scenarios and writes the timings as JSON, so runs from different commits can be compared.
+# Each scenario is timed several times and the fastest run is kept, which is the least noisy measure.
+#
+# Run as a script:
+#   python XiangqiBenchmark.py --output results.json
+#   python XiangqiBenchmark.py --baseline results.json --threshold 0.1
+# With a baseline the run fails if any scenario is more than the threshold slower than in the baseline.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from XiangqiGame import XiangqiGame, XiangqiBoard
+
+# bundled games, one per line as space separated start-end moves like "h3-e3"
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "XiangqiBenchmarkGames.txt")
+
+# fixed positions and a move to make from each
+BENCHMARK_POSITIONS = [
+    ("rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w", ("h3", "e3")),
+    ("r1bakab1r/9/1cn3nc1/p1p1p1p1p/9/9/P1P1P1P1P/1CN3NC1/9/R1BAKAB1R w", ("a1", "a2")),
+    ("2bakab2/9/4c4/p3p3p/2r3n2/9/P3P1R1P/2N1C4/4A4/2B1KAB2 b", ("c6", "c3")),
+]
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def read_corpus(path=CORPUS_PATH):
+    """
+    A function to read the bundled games.
+    :returns a list of games, each a list of (start, end) pairs
+    """
+    games = []
+    with open(path) as corpus_file:
+        for line in corpus_file:
+            if line.strip():
+                games.append([tuple(move.split("-")) for move in line.split()])
+    return games
+
+
+def time_scenario(scenario, number, repeat):
+    """
+    A function to time a scenario, run number times per repeat.
+    The scenario returns the time its measured part took.
+    :returns the fastest time per operation in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        elapsed = 0.0
+        for _ in range(number):
+            elapsed += scenario()
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / number
+
+
+def load_positions():
+    """A function to set up a game for each fixed position"""
+    games = []
+    for fen, move in BENCHMARK_POSITIONS:
+        game = XiangqiGame()
+        game.load_fen(fen)
+        games.append((game, move))
+    return games
+
+
+def benchmark_board_construction():
+    """A function to time building a XiangqiBoard"""
+    start_time = time.perf_counter()
+    XiangqiBoard()
+    return time.perf_counter() - start_time
+
+
+def benchmark_game_construction():
+    """A function to time starting a new XiangqiGame"""
+    start_time = time.perf_counter()
+    XiangqiGame()
+    return time.perf_counter() - start_time
+
+
+def benchmark_make_move(positions):
+    """A function to time one make_move from each fixed position, taking the moves back untimed"""
+    elapsed = 0.0
+    for game, (start, end) in positions:
+        start_time = time.perf_counter()
+        game.make_move(start, end)
+        elapsed += time.perf_counter() - start_time
+        game.undo_move()
+    return elapsed / len(positions)
+
+
+def benchmark_legal_moves(positions):
+    """A function to time listing both colors' moves in each fixed position"""
+    start_time = time.perf_counter()
+    for game, move in positions:
+        game.get_game_board().get_all_legal_moves_by_color("Red")
+        game.get_game_board().get_all_legal_moves_by_color("Black")
+    return (time.perf_counter() - start_time) / len(positions)
+
+
+def benchmark_check_detection(positions):
+    """A function to time updating and reading the check status in each fixed position"""
+    start_time = time.perf_counter()
+    for game, move in positions:
+        game.update_check()
+        game.is_in_check("Red")
+        game.is_in_check("Black")
+    return (time.perf_counter() - start_time) / len(positions)
+
+
+def benchmark_incremental_check(positions):
+    """A function to time the check update after the fixed move in each position, making the moves untimed"""
+    elapsed = 0.0
+    for game, (start, end) in positions:
+        game.make_move(start, end)
+        move = game.get_move_history()[-1]
+        start_time = time.perf_counter()
+        game.update_check(move)
+        elapsed += time.perf_counter() - start_time
+        game.undo_move()
+    return elapsed / len(positions)
+
+
+def benchmark_game_replay(games):
+    """A function to time replaying every bundled game from the start, per move"""
+    move_count = 0
+    start_time = time.perf_counter()
+    for moves in games:
+        game = XiangqiGame()
+        for start, end in moves:
+            game.make_move(start, end)
+        move_count += len(moves)
+    return (time.perf_counter() - start_time) / move_count
+
+
+def run_benchmarks(repeat=5, corpus_path=CORPUS_PATH):
+    """
+    A function to run every scenario.
+    :returns a dictionary of results that can be written as JSON
+    """
+    positions = load_positions()
+    games = read_corpus(corpus_path)
+    scenarios = [
+        ("board_construction", lambda: benchmark_board_construction(), 50),
+        ("game_construction", lambda: benchmark_game_construction(), 50),
+        ("make_move", lambda: benchmark_make_move(positions), 5),
+        ("legal_moves_by_color", lambda: benchmark_legal_moves(positions), 20),
+        ("check_detection", lambda: benchmark_check_detection(positions), 10),
+        ("incremental_check", lambda: benchmark_incremental_check(positions), 5),
+        ("game_replay", lambda: benchmark_game_replay(games), 1),
+    ]
+
+    results = {}
+    for name, scenario, number in scenarios:
+        seconds = time_scenario(scenario, number, repeat)
+        results[name] = {"seconds_per_operation": seconds, "operations_per_second": 1 / seconds if seconds else 0}
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "scenarios": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    A function to find scenarios that got slower than the baseline by more than the threshold, 0.1 being 10%.
+    :returns a list of (scenario, baseline seconds, current seconds, ratio)
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        if name not in baseline["scenarios"]:
+            continue
+        baseline_seconds = baseline["scenarios"][name]["seconds_per_operation"]
+        current_seconds = result["seconds_per_operation"]
+        if baseline_seconds and current_seconds / baseline_seconds > 1 + threshold:
+            regressions.append((name, baseline_seconds, current_seconds, current_seconds / baseline_seconds))
+    return regressions
+
+
+def main(argv=None):
+    # run the benchmarks, write or compare the results, and return the exit code
+    parser = argparse.ArgumentParser(description="Benchmark the Xiangqi game")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results from an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline, 0.1 for 10%%")
+    parser.add_argument("--repeat", type=int, default=5, help="times to run each scenario")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="games to replay")
+    arguments = parser.parse_args(argv)
+
+    results = run_benchmarks(arguments.repeat, arguments.corpus)
+    for name, result in results["scenarios"].items():
+        print("%-22s %12.1f us" % (name, result["seconds_per_operation"] * 1e6))
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(baseline, results, arguments.threshold)
+        for name, baseline_seconds, current_seconds, ratio in regressions:
+            print("regression: %s %.1f us -> %.1f us (%.2fx)" % (name, baseline_seconds * 1e6,
+                                                                 current_seconds * 1e6, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
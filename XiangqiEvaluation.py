@@ -0,0 +1,189 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A static evaluation for Xiangqi positions.
+# Scores are in centipawns and are positive when Red is ahead.
+#
+# Material and piece-square values are kept up to date incrementally by the XiangqiBoard
+# as pieces move, so that part of the evaluation costs nothing at a node.
+# Mobility and king safety are read from the move lists the board already keeps for each piece.
+#
+# Tables are keyed by the game piece names and written from Red's side of the board,
+# row 0 being Black's back rank. Black looks them up with the row mirrored.
+
+# material values by game piece name
+MATERIAL_VALUES = {
+    " G ": 6000,
+    " A ": 200,
+    " E ": 200,
+    " H ": 400,
+    " R ": 900,
+    " C ": 450,
+    " S ": 100,
+}
+
+# piece-square tables by game piece name
+PIECE_SQUARE_TABLES = {
+    " G ": [
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, -18, -16, -18, 0, 0, 0],
+        [0, 0, 0, -10, -8, -10, 0, 0, 0],
+        [0, 0, 0, -4, 0, -4, 0, 0, 0],
+    ],
+    " A ": [
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, -2, 0, -2, 0, 0, 0],
+        [0, 0, 0, 0, 3, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ],
+    " E ": [
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, -2, 0, 0, 0, -2, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [-2, 0, 0, 0, 3, 0, 0, 0, -2],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ],
+    " H ": [
+        [4, 8, 16, 12, 4, 12, 16, 8, 4],
+        [4, 10, 28, 16, 8, 16, 28, 10, 4],
+        [12, 14, 16, 20, 18, 20, 16, 14, 12],
+        [8, 24, 18, 24, 20, 24, 18, 24, 8],
+        [6, 16, 14, 18, 16, 18, 14, 16, 6],
+        [4, 12, 16, 14, 12, 14, 16, 12, 4],
+        [2, 6, 8, 6, 10, 6, 8, 6, 2],
+        [4, 2, 8, 8, 4, 8, 8, 2, 4],
+        [0, 2, 4, 4, -2, 4, 4, 2, 0],
+        [0, -4, 0, 0, 0, 0, 0, -4, 0],
+    ],
+    " R ": [
+        [14, 14, 12, 18, 16, 18, 12, 14, 14],
+        [16, 20, 18, 24, 26, 24, 18, 20, 16],
+        [12, 12, 12, 18, 18, 18, 12, 12, 12],
+        [12, 18, 16, 22, 22, 22, 16, 18, 12],
+        [12, 14, 12, 18, 18, 18, 12, 14, 12],
+        [12, 16, 14, 20, 20, 20, 14, 16, 12],
+        [6, 10, 8, 14, 14, 14, 8, 10, 6],
+        [4, 8, 6, 14, 12, 14, 6, 8, 4],
+        [8, 4, 8, 16, 8, 16, 8, 4, 8],
+        [-2, 10, 6, 14, 12, 14, 6, 10, -2],
+    ],
+    " C ": [
+        [6, 4, 0, -10, -12, -10, 0, 4, 6],
+        [2, 2, 0, -4, -14, -4, 0, 2, 2],
+        [2, 2, 0, -10, -8, -10, 0, 2, 2],
+        [0, 0, -2, 4, 10, 4, -2, 0, 0],
+        [0, 0, 0, 2, 8, 2, 0, 0, 0],
+        [-2, 0, 4, 2, 6, 2, 4, 0, -2],
+        [0, 0, 0, 2, 4, 2, 0, 0, 0],
+        [4, 0, 8, 6, 10, 6, 8, 0, 4],
+        [0, 2, 4, 6, 6, 6, 4, 2, 0],
+        [0, 0, 2, 6, 6, 6, 2, 0, 0],
+    ],
+    " S ": [
+        [0, 3, 6, 9, 12, 9, 6, 3, 0],
+        [18, 36, 56, 80, 120, 80, 56, 36, 18],
+        [14, 26, 42, 60, 80, 60, 42, 26, 14],
+        [10, 20, 30, 34, 40, 34, 30, 20, 10],
+        [6, 12, 18, 18, 20, 18, 18, 12, 6],
+        [2, 0, 8, 0, 8, 0, 8, 0, 2],
+        [0, 0, -2, 0, 4, 0, -2, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ],
+}
+
+# weights for the terms that are not kept incrementally
+MOBILITY_WEIGHT = 2
+PALACE_ATTACK_PENALTY = 8
+IN_CHECK_PENALTY = 50
+
+# the palace squares of each color as algebraic strings
+PALACE_SQUARES = {
+    "Red": {col + row for col in "def" for row in ("1", "2", "3")},
+    "Black": {col + row for col in "def" for row in ("8", "9", "10")},
+}
+
+
+def get_piece_square_value(game_piece, row, col):
+    """
+    A function to return the material plus piece-square value of a game piece standing on a location.
+    :returns the value in centipawns, positive for Red pieces and negative for Black pieces
+    """
+    name = game_piece.get_game_piece_name()
+    if game_piece.get_game_piece_color() == "Red":
+        return MATERIAL_VALUES[name] + PIECE_SQUARE_TABLES[name][row][col]
+    return -(MATERIAL_VALUES[name] + PIECE_SQUARE_TABLES[name][9 - row][col])
+
+
+def get_material_score(board):
+    """A function to compute the material plus piece-square score of a board from scratch"""
+    score = 0
+    for row in range(10):
+        for col in range(9):
+            current_piece = board.get_game_piece_by_location(row, col)
+            if current_piece:
+                score += get_piece_square_value(current_piece, row, col)
+    return score
+
+
+def get_mobility_score(board):
+    """A function to return the difference in available moves between Red and Black, weighted"""
+    red_moves = len(board.get_all_legal_moves_by_color("Red"))
+    black_moves = len(board.get_all_legal_moves_by_color("Black"))
+    return MOBILITY_WEIGHT * (red_moves - black_moves)
+
+
+def get_king_safety_score(board):
+    """
+    A function to score how exposed each general is.
+    Each palace square the enemy can move to and being in check count against a side.
+    """
+    score = 0
+    red_moves = set(board.get_all_legal_moves_by_color("Red"))
+    black_moves = set(board.get_all_legal_moves_by_color("Black"))
+
+    score -= PALACE_ATTACK_PENALTY * len(PALACE_SQUARES["Red"] & black_moves)
+    score += PALACE_ATTACK_PENALTY * len(PALACE_SQUARES["Black"] & red_moves)
+
+    for general in board.get_generals():
+        if general.get_check_status():
+            if general.get_game_piece_color() == "Red":
+                score -= IN_CHECK_PENALTY
+            else:
+                score += IN_CHECK_PENALTY
+    return score
+
+
+def evaluate(game, positional_terms=True):
+    """
+    A function to evaluate a game's position for the side whose turn it is.
+    The material and piece-square part comes from the board's incremental score.
+    Mobility and king safety are added unless positional_terms is False.
+    :returns the score in centipawns, positive when the side to move is ahead
+    """
+    board = game.get_game_board()
+    score = board.get_material_score()
+    if positional_terms:
+        score += get_mobility_score(board)
+        score += get_king_safety_score(board)
+
+    if game.get_turn_order_color() == "Red":
+        return score
+    return -score
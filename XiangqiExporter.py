@@ -0,0 +1,198 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: Exports positions from replayed Xiangqi games as plane encoded training data.
+# Each position is stored as 14 planes of 10x9 bytes, one plane per piece type and color,
+# Red pieces first in the order General, Advisor, Elephant, Horse, Chariot, Cannon, Soldier.
+# Every position also gets a side to move label, 0 for Red and 1 for Black, and a result label
+# of 1 for a red win, -1 for a black win and 0 for a draw or an unfinished game.
+#
+# Positions are buffered in chunks and written to memory mapped .npy shards so datasets
+# larger than the available memory can be produced.
+
+import os
+
+import numpy
+from numpy.lib.format import open_memmap
+
+from XiangqiGame import XiangqiGame, General, Advisor, Elephant, Horse, Chariot, Cannon, Soldier
+
+# plane index by piece type, black planes are offset by the number of piece types
+PLANE_BY_PIECE_TYPE = {General: 0, Advisor: 1, Elephant: 2, Horse: 3, Chariot: 4, Cannon: 5, Soldier: 6}
+PLANE_COUNT = 14
+
+# result labels by game state
+RESULT_BY_GAME_STATE = {"RED_WON": 1, "BLACK_WON": -1, "DRAW": 0, "UNFINISHED": 0}
+
+
+def encode_board(board, planes=None):
+    """
+    A function to encode a XiangqiBoard as 14 planes of 10x9 bytes.
+    Writes into planes if an array is passed in, otherwise a new array is created.
+    :returns the plane array
+    """
+    if planes is None:
+        planes = numpy.zeros((PLANE_COUNT, 10, 9), dtype=numpy.uint8)
+    else:
+        planes[...] = 0
+
+    for row, board_row in enumerate(board.get_board()):
+        for col, current_piece in enumerate(board_row):
+            if current_piece != "...":
+                plane = PLANE_BY_PIECE_TYPE[type(current_piece)]
+                if current_piece.get_game_piece_color() == "Black":
+                    plane += 7
+                planes[plane, row, col] = 1
+    return planes
+
+
+class XiangqiExporter:
+    """Represents a writer of plane encoded positions to memory mapped .npy shards"""
+
+    def __init__(self, output_dir, shard_size=65536, chunk_size=4096, prefix="positions"):
+        """
+        Initializes the exporter. Shards hold up to shard_size positions, and positions are buffered
+        in memory chunk_size at a time before they are written to the current shard.
+        """
+        self._output_dir = output_dir
+        self._shard_size = shard_size
+        self._chunk_size = min(chunk_size, shard_size)
+        self._prefix = prefix
+        self._shard_paths = []
+        self._position_count = 0
+
+        # the shard being written and how many rows it holds
+        self._shard = None
+        self._shard_rows = 0
+
+        # the in memory chunk waiting to be written
+        self._chunk_planes = numpy.zeros((self._chunk_size, PLANE_COUNT, 10, 9), dtype=numpy.uint8)
+        self._chunk_side = numpy.zeros(self._chunk_size, dtype=numpy.uint8)
+        self._chunk_result = numpy.zeros(self._chunk_size, dtype=numpy.int8)
+        self._chunk_rows = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def get_shard_paths(self):
+        """A method to return the (planes, side, result) file paths of every shard written so far"""
+        return self._shard_paths
+
+    def get_position_count(self):
+        """A method to return the number of positions exported so far"""
+        return self._position_count
+
+    def add_game(self, moves, result=None):
+        """
+        A method to replay a game from a list of (start, end) move pairs and export every position before each move.
+        The result is taken from the replayed game's state unless one of the game state strings or "DRAW" is passed in.
+        :returns the number of positions exported, or False if a move in the record is not legal
+        :raises ValueError if the result is not one of those strings
+        """
+        if result is not None and result not in RESULT_BY_GAME_STATE:
+            raise ValueError("not a game result: " + str(result))
+        game = XiangqiGame()
+        positions = []
+
+        # replay the game, keeping the encoded position before each move
+        for start, end in moves:
+            planes = encode_board(game.get_game_board())
+            side = 0 if game.get_turn_order_color() == "Red" else 1
+            if not game.make_move(start, end):
+                return False
+            positions.append((planes, side))
+
+        if result is None:
+            result = game.get_game_state()
+        result_label = RESULT_BY_GAME_STATE[result]
+
+        for planes, side in positions:
+            self.add_position(planes, side, result_label)
+        return len(positions)
+
+    def add_games(self, games):
+        """
+        A method to export a stream of games, each a (moves, result) pair, where result may be None.
+        Games with illegal moves are skipped.
+        :returns the number of positions exported
+        """
+        count = 0
+        for moves, result in games:
+            added = self.add_game(moves, result)
+            if added:
+                count += added
+        return count
+
+    def add_position(self, planes, side, result_label):
+        """A method to buffer one encoded position and write the chunk out once it is full"""
+        self._chunk_planes[self._chunk_rows] = planes
+        self._chunk_side[self._chunk_rows] = side
+        self._chunk_result[self._chunk_rows] = result_label
+        self._chunk_rows += 1
+        self._position_count += 1
+
+        if self._chunk_rows == self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        """A method to write the buffered chunk to the memory mapped shards"""
+        written = 0
+        while written < self._chunk_rows:
+            if self._shard is None:
+                self.open_shard()
+
+            # copy as much of the chunk as fits in the current shard
+            count = min(self._chunk_rows - written, self._shard_size - self._shard_rows)
+            planes, side, result = self._shard
+            planes[self._shard_rows:self._shard_rows + count] = self._chunk_planes[written:written + count]
+            side[self._shard_rows:self._shard_rows + count] = self._chunk_side[written:written + count]
+            result[self._shard_rows:self._shard_rows + count] = self._chunk_result[written:written + count]
+            self._shard_rows += count
+            written += count
+
+            if self._shard_rows == self._shard_size:
+                self.close_shard()
+        self._chunk_rows = 0
+
+    def open_shard(self):
+        """A method to create the next set of memory mapped shard files"""
+        base = os.path.join(self._output_dir, "%s_%05d" % (self._prefix, len(self._shard_paths)))
+        paths = (base + "_planes.npy", base + "_side.npy", base + "_result.npy")
+        self._shard = (
+            open_memmap(paths[0], mode="w+", dtype=numpy.uint8, shape=(self._shard_size, PLANE_COUNT, 10, 9)),
+            open_memmap(paths[1], mode="w+", dtype=numpy.uint8, shape=(self._shard_size,)),
+            open_memmap(paths[2], mode="w+", dtype=numpy.int8, shape=(self._shard_size,)),
+        )
+        self._shard_paths.append(paths)
+        self._shard_rows = 0
+
+    def close_shard(self):
+        """A method to flush the current shard to disk, trimming it if it was only partly filled"""
+        if self._shard is None:
+            return
+        for array in self._shard:
+            array.flush()
+        self._shard = None
+
+        if self._shard_rows < self._shard_size:
+            for path in self._shard_paths[-1]:
+                # copy the filled rows into a file of the exact size, one chunk at a time
+                full = numpy.load(path, mmap_mode="r")
+                trimmed = open_memmap(path + ".tmp", mode="w+", dtype=full.dtype,
+                                      shape=(self._shard_rows,) + full.shape[1:])
+                for start in range(0, self._shard_rows, self._chunk_size):
+                    end = min(start + self._chunk_size, self._shard_rows)
+                    trimmed[start:end] = full[start:end]
+                trimmed.flush()
+                del full, trimmed
+                os.replace(path + ".tmp", path)
+        self._shard_rows = 0
+
+    def close(self):
+        """A method to write out any buffered positions and close the last shard"""
+        self.flush()
+        self.close_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
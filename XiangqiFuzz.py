@@ -0,0 +1,324 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A differential fuzzer for Xiangqi move generation.
+# Random games are played and at every half move the moves of two generators are compared.
+# A generator is a function taking a XiangqiGame and returning the set of (start, end) moves for the side to move.
+# The reference generator here works straight from the board grid with the written rules, independent of
+# the piece move lists, so it can check the game's own generator or a faster one that replaces it.
+#
+# Both generators allow moves that leave a piece pinned to its general, as make_move does,
+# but a general may not step onto a location the other side attacks or face the other general on an open file.
+# Random games only use moves that don't leave the mover's general open.
+# A failing game is shrunk to the fewest moves, then to the fewest pieces, that still show the difference.
+#
+# Run as a script:
+#   python XiangqiFuzz.py --games 100 --seed 1
+
+import argparse
+import random
+import sys
+import time
+
+from XiangqiGame import XiangqiGame, General, Advisor, Elephant, Horse, Chariot, Cannon, Soldier, \
+    ORTHOGONAL_STEPS, DIAGONAL_STEPS, ELEPHANT_STEPS, HORSE_STEPS, LOCATION_NAMES, LOCATION_COORDINATES
+
+START_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w"
+DEFAULT_MAX_PLIES = 200
+
+
+def is_in_palace(row, col, color):
+    """A function to determine if a location is in a color's palace"""
+    return 3 <= col <= 5 and (7 <= row <= 9 if color == "Red" else 0 <= row <= 2)
+
+
+def is_on_own_side(row, color):
+    """A function to determine if a row is on a color's side of the river"""
+    return row >= 5 if color == "Red" else row <= 4
+
+
+def get_piece_moves(squares, row, col):
+    """A function to list the locations the piece on a location could move to by the written rules"""
+    piece = squares[row][col]
+    color = piece.get_game_piece_color()
+    piece_type = type(piece)
+    ends = []
+
+    if piece_type in (Chariot, Cannon):
+        for row_step, col_step in ORTHOGONAL_STEPS:
+            screened = False
+            row_end, col_end = row + row_step, col + col_step
+            while 0 <= row_end < 10 and 0 <= col_end < 9:
+                target = squares[row_end][col_end]
+                if target == "...":
+                    if not screened:
+                        ends.append((row_end, col_end))
+                else:
+                    if piece_type == Chariot or screened:
+                        ends.append((row_end, col_end))
+                        break
+                    screened = True
+                row_end += row_step
+                col_end += col_step
+    elif piece_type == Horse:
+        for row_step, col_step in HORSE_STEPS:
+            if abs(row_step) == 2:
+                leg = squares[row + row_step // 2][col] if 0 <= row + row_step // 2 < 10 else "..."
+            else:
+                leg = squares[row][col + col_step // 2] if 0 <= col + col_step // 2 < 9 else "..."
+            if leg == "...":
+                ends.append((row + row_step, col + col_step))
+    elif piece_type == Elephant:
+        for row_step, col_step in ELEPHANT_STEPS:
+            row_end, col_end = row + row_step, col + col_step
+            if 0 <= row_end < 10 and 0 <= col_end < 9 and is_on_own_side(row_end, color) and \
+                    squares[row + row_step // 2][col + col_step // 2] == "...":
+                ends.append((row_end, col_end))
+    elif piece_type == Advisor:
+        ends = [(row + row_step, col + col_step) for row_step, col_step in DIAGONAL_STEPS
+                if is_in_palace(row + row_step, col + col_step, color)]
+    elif piece_type == General:
+        ends = [(row + row_step, col + col_step) for row_step, col_step in ORTHOGONAL_STEPS
+                if is_in_palace(row + row_step, col + col_step, color)]
+    elif piece_type == Soldier:
+        forward = -1 if color == "Red" else 1
+        ends = [(row + forward, col)]
+        if not is_on_own_side(row, color):
+            ends += [(row, col - 1), (row, col + 1)]
+
+    return [(row_end, col_end) for row_end, col_end in ends
+            if 0 <= row_end < 10 and 0 <= col_end < 9 and
+            (squares[row_end][col_end] == "..." or squares[row_end][col_end].get_game_piece_color() != color)]
+
+
+def is_general_open(squares, color):
+    """A function to determine if a color's general could be taken, or faces the other general on an open file"""
+    generals = {}
+    for row in range(10):
+        for col in range(9):
+            if type(squares[row][col]) == General:
+                generals[squares[row][col].get_game_piece_color()] = (row, col)
+    if len(generals) != 2:
+        return False
+    row, col = generals[color]
+    other_row, other_col = generals["Black" if color == "Red" else "Red"]
+    if col == other_col and all(squares[between][col] == "..."
+                                for between in range(min(row, other_row) + 1, max(row, other_row))):
+        return True
+    for other_row in range(10):
+        for other_col in range(9):
+            piece = squares[other_row][other_col]
+            if piece != "..." and piece.get_game_piece_color() != color and type(piece) != General and \
+                    (row, col) in get_piece_moves(squares, other_row, other_col):
+                return True
+    return False
+
+
+def get_moved_squares(squares, row_start, col_start, row_end, col_end):
+    """A function to return a copy of the board grid with a move made"""
+    moved = [list(row) for row in squares]
+    moved[row_end][col_end] = moved[row_start][col_start]
+    moved[row_start][col_start] = "..."
+    return moved
+
+
+def get_reference_moves(game, legal_only=False):
+    """
+    A function to list the side to move's moves by the written rules, generals kept off attacked locations.
+    With legal_only, moves that leave the mover's general open are left out as well.
+    :returns a set of (start, end) pairs
+    """
+    squares = game.get_game_board().get_board()
+    color = game.get_turn_order_color()
+    moves = set()
+    for row in range(10):
+        for col in range(9):
+            piece = squares[row][col]
+            if piece == "..." or piece.get_game_piece_color() != color:
+                continue
+            for row_end, col_end in get_piece_moves(squares, row, col):
+                if legal_only or type(piece) == General:
+                    if is_general_open(get_moved_squares(squares, row, col, row_end, col_end), color):
+                        continue
+                moves.add((LOCATION_NAMES[row][col], LOCATION_NAMES[row_end][col_end]))
+    return moves
+
+
+def get_game_moves(game):
+    """A function to list the moves make_move would accept for the side to move, from the game's piece move lists"""
+    return {move.get_locations() for move in game.get_available_moves(game.get_turn_order_color())}
+
+
+def make_game_move(game, start, end):
+    """A function to make a move in a game without checking it again"""
+    row_start, col_start = LOCATION_COORDINATES[start]
+    row_end, col_end = LOCATION_COORDINATES[end]
+    game.apply_move(game.get_game_board().create_move(row_start, col_start, row_end, col_end))
+
+
+def find_difference(fen, moves, first_generator=get_game_moves, second_generator=get_reference_moves):
+    """
+    A function to replay moves from a position and compare the generators in the final position.
+    :returns (moves only the first generator has, moves only the second has), or False if they agree
+        or the moves can't be played
+    """
+    game = XiangqiGame()
+    if not game.load_fen(fen):
+        return False
+    for start, end in moves:
+        if (start, end) not in get_reference_moves(game, legal_only=True):
+            return False
+        make_game_move(game, start, end)
+    first_moves = first_generator(game)
+    second_moves = second_generator(game)
+    if first_moves == second_moves:
+        return False
+    return first_moves - second_moves, second_moves - first_moves
+
+
+def shrink_moves(fen, moves, first_generator=get_game_moves, second_generator=get_reference_moves):
+    """A function to drop moves from a failing game, pairs first to keep the side to move, while it still fails"""
+    changed = True
+    while changed:
+        changed = False
+        for size in (2, 1):
+            index = 0
+            while index + size <= len(moves):
+                shorter = moves[:index] + moves[index + size:]
+                if find_difference(fen, shorter, first_generator, second_generator):
+                    moves = shorter
+                    changed = True
+                else:
+                    index += 1
+    return moves
+
+
+def shrink_position(fen, first_generator=get_game_moves, second_generator=get_reference_moves):
+    """A function to take pieces other than the generals off a failing position while it still fails"""
+    game = XiangqiGame()
+    game.load_fen(fen)
+    changed = True
+    while changed:
+        changed = False
+        for row in range(10):
+            for col in range(9):
+                piece = game.get_game_board().get_game_piece_by_location(row, col)
+                if not piece or type(piece) == General:
+                    continue
+                smaller_game = XiangqiGame()
+                placement = [(type(elem)(None, elem.get_game_piece_color()), elem_row, elem_col)
+                             for elem_row in range(10) for elem_col in range(9)
+                             for elem in [game.get_game_board().get_game_piece_by_location(elem_row, elem_col)]
+                             if elem and (elem_row, elem_col) != (row, col)]
+                smaller_game.set_up_position(placement, game.get_turn_order_color())
+                smaller_fen = smaller_game.get_fen()
+                if find_difference(smaller_fen, [], first_generator, second_generator):
+                    fen = smaller_fen
+                    game = smaller_game
+                    changed = True
+    return fen
+
+
+def play_random_game(generator, fen=START_FEN, max_plies=DEFAULT_MAX_PLIES,
+                     first_generator=get_game_moves, second_generator=get_reference_moves):
+    """
+    A function to play a random game, comparing the generators at every half move.
+    :returns (moves played, plies compared, difference or False), the moves ending at the position that differed
+    """
+    game = XiangqiGame()
+    game.load_fen(fen)
+    moves = []
+    for ply in range(max_plies + 1):
+        first_moves = first_generator(game)
+        second_moves = second_generator(game)
+        if first_moves != second_moves:
+            return moves, ply + 1, (first_moves - second_moves, second_moves - first_moves)
+        legal_moves = sorted(get_reference_moves(game, legal_only=True))
+        if not legal_moves or game.get_game_state() != "UNFINISHED" or ply == max_plies:
+            return moves, ply + 1, False
+        start, end = generator.choice(legal_moves)
+        make_game_move(game, start, end)
+        moves.append((start, end))
+    return moves, max_plies + 1, False
+
+
+class XiangqiFuzzer:
+    """Represents a fuzzing run comparing two move generators over random games"""
+
+    def __init__(self, first_generator=get_game_moves, second_generator=get_reference_moves, seed=None,
+                 max_plies=DEFAULT_MAX_PLIES, fen=START_FEN):
+        """Initializes a run comparing two generators, by default the game's against the reference"""
+        self._first_generator = first_generator
+        self._second_generator = second_generator
+        self._random = random.Random(seed)
+        self._max_plies = max_plies
+        self._fen = fen
+        self._ply_count = 0
+        self._elapsed_time = 0.0
+        self._failures = []
+
+    def get_ply_count(self):
+        """A method to return the number of positions compared"""
+        return self._ply_count
+
+    def get_plies_per_second(self):
+        """A method to return the fuzzing rate"""
+        if not self._elapsed_time:
+            return 0
+        return self._ply_count / self._elapsed_time
+
+    def get_failures(self):
+        """A method to return the shrunk failures as (FEN, moves, moves only the first has, moves only the second has)"""
+        return self._failures
+
+    def run(self, game_count, shrink=True):
+        """
+        A method to play random games, shrinking each failing one.
+        :returns the list of failures found in this run
+        """
+        failures = []
+        for _ in range(game_count):
+            start_time = time.perf_counter()
+            moves, plies, difference = play_random_game(self._random, self._fen, self._max_plies,
+                                                        self._first_generator, self._second_generator)
+            self._elapsed_time += time.perf_counter() - start_time
+            self._ply_count += plies
+            if difference:
+                failures.append(self.shrink(moves) if shrink else (self._fen, moves) + difference)
+        self._failures.extend(failures)
+        return failures
+
+    def shrink(self, moves):
+        """A method to shrink a failing game to a short move list and then to a small position"""
+        moves = shrink_moves(self._fen, moves, self._first_generator, self._second_generator)
+        game = XiangqiGame()
+        game.load_fen(self._fen)
+        for start, end in moves:
+            make_game_move(game, start, end)
+        fen = shrink_position(game.get_fen(), self._first_generator, self._second_generator)
+        difference = find_difference(fen, [], self._first_generator, self._second_generator)
+        if difference:
+            return (fen, []) + difference
+        return (self._fen, moves) + find_difference(self._fen, moves, self._first_generator,
+                                                    self._second_generator)
+
+
+def main(argv=None):
+    # fuzz the game's move generation against the reference and print what was found
+    parser = argparse.ArgumentParser(description="Compare Xiangqi move generators over random games")
+    parser.add_argument("--games", type=int, default=10, help="random games to play")
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES, help="half moves per game")
+    arguments = parser.parse_args(argv)
+
+    fuzzer = XiangqiFuzzer(seed=arguments.seed, max_plies=arguments.max_plies)
+    failures = fuzzer.run(arguments.games)
+    for fen, moves, first_only, second_only in failures:
+        print("%s %s game only: %s reference only: %s" % (fen, " ".join("-".join(move) for move in moves),
+                                                         sorted(first_only), sorted(second_only)))
+    print("%d plies, %.1f plies per second, %d failures" % (fuzzer.get_ply_count(), fuzzer.get_plies_per_second(),
+                                                           len(failures)))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
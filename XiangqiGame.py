@@ -10,6 +10,17 @@
 # The board can be displayed by calling display_game_board.
 # Rules follow movement based on wikipeida.
 
+import random
+
+import XiangqiEvaluation
+
+# random 64 bit keys used to hash positions, one for each piece name and color on each location,
+# and one more that is mixed in when it is Black's turn
+_key_generator = random.Random(20200227)
+POSITION_KEYS = {(name, color): [[_key_generator.getrandbits(64) for _ in range(9)] for _ in range(10)]
+                 for color in ("Red", "Black") for name in (" G ", " A ", " E ", " H ", " R ", " C ", " S ")}
+BLACK_TO_MOVE_KEY = _key_generator.getrandbits(64)
+
 
 class XiangqiGame:
     """Represents a xiangqi game with a board and game pieces."""
@@ -19,11 +30,17 @@ class XiangqiGame:
         self._game_state = "UNFINISHED"
         self._game_board = XiangqiBoard()
         self._turn_order = 0
+        self._move_history = []
+        self._check_debug_mode = False
 
     def get_game_board(self):
         """A method to return the current game's board"""
         return self._game_board
 
+    def get_move_history(self):
+        """A method to return the moves made so far as XiangqiMove objects"""
+        return [entry[0] for entry in self._move_history]
+
     def get_game_state(self):
         """Returns the current game's state"""
         return self._game_state
@@ -50,8 +67,55 @@ class XiangqiGame:
                         if color == "Black":
                             return black_general.get_check_status()
 
-    def update_check(self):
-        """A method to update the check status for each general"""
+    def get_check_debug_mode(self):
+        """A method to return whether incremental check updates are compared with a full recompute"""
+        return self._check_debug_mode
+
+    def set_check_debug_mode(self, true_false=bool):
+        """
+        A method to turn the check debug mode on or off. In debug mode every incremental check update
+        is followed by a full recompute from both colors' move lists, and a difference raises an AssertionError.
+        :type true_false: bool
+        """
+        self._check_debug_mode = true_false
+
+    def update_check(self, move=None):
+        """
+        A method to update the check status for each general after a move was made or taken back.
+        A general's status can only change if the move's start or end location is on its file or rank,
+        or close enough to it to be a horse leg, elephant eye or short range attacker. Those generals are
+        checked with get_attackers, the others keep their status. Without a move every status is recomputed.
+        """
+        if move is None:
+            self.recompute_check()
+            return
+
+        board = self.get_game_board()
+        squares = board.get_board()
+        locations = ((move.get_start_row(), move.get_start_col()), (move.get_end_row(), move.get_end_col()))
+
+        # the generals never leave their palaces, so only those squares are searched
+        for row in PALACE_ROWS:
+            for col in PALACE_COLS:
+                general = squares[row][col]
+                if type(general) != General:
+                    continue
+                for move_row, move_col in locations:
+                    if move_row == row or move_col == col or abs(move_row - row) <= 2 and abs(move_col - col) <= 2:
+                        other_color = "Black" if general.get_game_piece_color() == "Red" else "Red"
+                        general.update_check_status(bool(board.get_attackers(row, col, other_color)))
+                        break
+
+        # cross-check the incremental statuses against the full recompute
+        if self._check_debug_mode:
+            statuses = [general.get_check_status() for general in board.get_generals()]
+            self.recompute_check()
+            if statuses != [general.get_check_status() for general in board.get_generals()]:
+                raise AssertionError("incremental check update differs from full recompute after " +
+                                     move.get_start() + "-" + move.get_end())
+
+    def recompute_check(self):
+        """A method to recompute the check status for each general from both colors' full move lists"""
         # populate the two lists of moves by color
         red_move_list = self.get_game_board().get_all_legal_moves_by_color("Red")
         black_move_list = self.get_game_board().get_all_legal_moves_by_color("Black")
@@ -68,12 +132,14 @@ class XiangqiGame:
                             black_general = self.get_game_board().get_game_piece_by_location(row, col)
                             black_general_location = black_general.convert_coordinates_to_string(row, col)
 
-        # check if the generals current location is in the list of enemy moves, update to true if found
-        if red_general_location in black_move_list:
+        # check if the generals current location is in the list of enemy moves, update to true if found,
+        # generals facing each other on an open file both see the other like get_attackers does
+        generals_facing = self.get_game_board().is_general_facing()
+        if red_general_location in black_move_list or generals_facing:
             red_general.update_check_status(True)
         else:
             red_general.update_check_status(False)
-        if black_general_location in red_move_list:
+        if black_general_location in red_move_list or generals_facing:
             black_general.update_check_status(True)
         else:
             black_general.update_check_status(False)
@@ -98,6 +164,167 @@ class XiangqiGame:
             if black_general.get_legal_moves() == [] and not self.is_in_check("Red"):
                 self.set_game_state("RED_WON")
 
+    def set_up_position(self, placement, color="Red"):
+        """
+        A method to set the game up from a list of (game piece, row, col) placements with color to move.
+        The move history is cleared and the game state is set back to unfinished.
+        :returns True if the position was set up, False if it doesn't have one general of each color
+        """
+        # the check rules need one general of each color on the board
+        general_colors = sorted(elem[0].get_game_piece_color() for elem in placement if type(elem[0]) == General)
+        if general_colors != ["Black", "Red"]:
+            return False
+
+        self.get_game_board().set_up_game_pieces(placement)
+        self.update_game_board()
+        self.get_game_board().remove_game_piece_legal_move()
+        self.update_check()
+        self.set_game_state("UNFINISHED")
+        self._turn_order = 0 if color == "Red" else 1
+        self._move_history = []
+        return True
+
+    def load_fen(self, fen):
+        """
+        A method to set the game up from a FEN string, for example
+        "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w".
+        Upper case letters are Red pieces and lower case letters are Black pieces.
+        :returns True if the position was loaded, False if the string could not be read
+        """
+        fields = fen.split()
+        rows = fields[0].split("/") if fields else []
+        if len(rows) != 10:
+            return False
+
+        placement = []
+        for row, row_string in enumerate(rows):
+            col = 0
+            for letter in row_string:
+                if letter.isdigit():
+                    col += int(letter)
+                elif letter.lower() in FEN_PIECE_TYPES and col < 9:
+                    color = "Red" if letter.isupper() else "Black"
+                    placement.append((FEN_PIECE_TYPES[letter.lower()](None, color), row, col))
+                    col += 1
+                else:
+                    return False
+            if col != 9:
+                return False
+
+        color = "Black" if len(fields) > 1 and fields[1] in ("b", "B") else "Red"
+        return self.set_up_position(placement, color)
+
+    def get_fen(self):
+        """A method to return the current position as a FEN string"""
+        rows = []
+        for row in range(10):
+            row_string = ""
+            empty_count = 0
+            for col in range(9):
+                current_piece = self.get_game_board().get_game_piece_by_location(row, col)
+                if current_piece:
+                    if empty_count:
+                        row_string += str(empty_count)
+                        empty_count = 0
+                    letter = FEN_LETTERS[type(current_piece)]
+                    if current_piece.get_game_piece_color() == "Red":
+                        letter = letter.upper()
+                    row_string += letter
+                else:
+                    empty_count += 1
+            if empty_count:
+                row_string += str(empty_count)
+            rows.append(row_string)
+        return "/".join(rows) + (" w" if self.get_turn_order_color() == "Red" else " b")
+
+    def to_packed(self):
+        """
+        A method to pack the position into PACKED_POSITION_SIZE bytes, for keeping idle games small.
+        The piece codes of locations a10 to i1 are stored two to a byte, followed by the game state and turn count.
+        The move history is not kept.
+        :returns the packed position as bytes
+        """
+        codes = []
+        for row in range(10):
+            for col in range(9):
+                current_piece = self.get_game_board().get_game_piece_by_location(row, col)
+                codes.append(get_piece_code(current_piece) if current_piece else 0)
+        packed = bytearray(codes[index] << 4 | codes[index + 1] for index in range(0, 90, 2))
+        packed.append(PACKED_GAME_STATES.index(self.get_game_state()))
+        packed += self.get_turn_order_count().to_bytes(2, "big")
+        return bytes(packed)
+
+    @classmethod
+    def from_packed(cls, packed):
+        """
+        A method to make a game from a position packed by to_packed, with an empty move history.
+        :returns the game, or False if the bytes are not a packed position
+        """
+        if len(packed) != PACKED_POSITION_SIZE or packed[45] >= len(PACKED_GAME_STATES):
+            return False
+
+        placement = []
+        for index in range(90):
+            code = packed[index // 2] >> 4 if index % 2 == 0 else packed[index // 2] & 15
+            if code:
+                if code & 7 not in PIECE_TYPES_BY_CODE:
+                    return False
+                color = "Black" if code & 8 else "Red"
+                placement.append((PIECE_TYPES_BY_CODE[code & 7](None, color), index // 9, index % 9))
+
+        game = cls()
+        turn_order = int.from_bytes(packed[46:48], "big")
+        if not game.set_up_position(placement, "Red" if turn_order % 2 == 0 else "Black"):
+            return False
+        game.set_game_state(PACKED_GAME_STATES[packed[45]])
+        game._turn_order = turn_order
+        return game
+
+    def get_available_moves(self, color):
+        """
+        A method to return every move make_move would accept for a color's pieces.
+        :returns a list of XiangqiMove
+        """
+        return self.get_game_board().generate_moves(color)
+
+    def validate_moves(self, moves):
+        """
+        A method to check many (start, end) moves like "b3", "b10" for the side to move without making them.
+        The moves make_move would accept are generated once and each candidate is looked up in them.
+        :returns a list with True for each move make_move would accept and False otherwise
+        """
+        legal_moves = {move.get_locations() for move in self.get_available_moves(self.get_turn_order_color())}
+        return [tuple(move) in legal_moves for move in moves]
+
+    def can_capture_general(self, color):
+        """
+        A method to determine if a color could take the other general on its move,
+        either with one of its moves or because the generals face each other on an open file.
+        :returns True if the other general can be taken, False otherwise
+        """
+        generals = {}
+        for general in self.get_game_board().get_generals():
+            generals[general.get_game_piece_color()] = general
+        if len(generals) != 2:
+            return False
+
+        # flying generals, nothing between them on the same file
+        if self.get_game_board().is_general_facing():
+            return True
+
+        other_general = generals["Black" if color == "Red" else "Red"]
+        target = (other_general.get_game_piece_location_row(), other_general.get_game_piece_location_col())
+        for move in self.get_available_moves(color):
+            if (move.get_end_row(), move.get_end_col()) == target:
+                return True
+        return False
+
+    def get_position_key(self):
+        """A method to return a 64 bit hash of the current position, including whose turn it is"""
+        if self.get_turn_order_color() == "Black":
+            return self.get_game_board().get_position_key() ^ BLACK_TO_MOVE_KEY
+        return self.get_game_board().get_position_key()
+
     def get_turn_order_color(self):
         """A method to return which color's turn it is"""
         if self._turn_order % 2 == 0:
@@ -116,33 +343,16 @@ class XiangqiGame:
     def convert_string_to_coordinates(self, start, end):
         """
         A method to convert the alpha numeric string characters to integers.
+        Anything that isn't one of the 90 locations, including values that aren't strings, gives False.
         :returns list of integer indexes in order of row_start, row_end, col_start, col_end"""
-        try:
-            # set up start and end as list so we can pop the first element
-            start_list = list(start)
-            end_list = list(end)
-
-            # create dictionary to cross reference the string moves to indexes
-            move_dict_row = {"1": 9, "2": 8, "3": 7, "4": 6, "5": 5, "6": 4, "7": 3, "8": 2, "9": 1, "10": 0}
-            move_dict_col = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4, "f": 5, "g": 6, "h": 7, "i": 8}
-
-            # pop the first elements and store them as column index
-            col_start = move_dict_col[start_list.pop(0)]
-            col_end = move_dict_col[end_list.pop(0)]
-
-            # Convert the remaining elements back to strings and store the row index
-            start_string = "".join([str(elem) for elem in start_list])
-            end_string = "".join([str(elem) for elem in end_list])
-            row_start = move_dict_row[start_string]
-            row_end = move_dict_row[end_string]
-
-            converted_list = [row_start, row_end, col_start, col_end]
-
-            return converted_list
-
-        # print error message if location not found in dictionary
-        except KeyError:
+        # look both locations up in the table of every location, only strings can be in it
+        if type(start) != str or type(end) != str:
+            return False
+        start_coordinates = LOCATION_COORDINATES.get(start)
+        end_coordinates = LOCATION_COORDINATES.get(end)
+        if start_coordinates is None or end_coordinates is None:
             return False
+        return [start_coordinates[0], end_coordinates[0], start_coordinates[1], end_coordinates[1]]
 
     def get_potential_move_status(self, row_start, row_end, col_start, col_end):
         """
@@ -220,8 +430,10 @@ class XiangqiGame:
         if start == end:
             return False
 
-        # convert and store the index values
+        # convert and store the index values, locations that aren't on the board are not legal
         converted_list = self.convert_string_to_coordinates(start, end)
+        if not converted_list:
+            return False
         row_start = converted_list[0]
         row_end = converted_list[1]
         col_start = converted_list[2]
@@ -229,6 +441,8 @@ class XiangqiGame:
 
         # store the piece we want to moves information
         piece_to_move = self.get_game_board().get_game_piece_by_location(row_start, col_start)
+        if not piece_to_move:  # nothing to move on the start location
+            return False
         color_to_move = piece_to_move.get_game_piece_color()
         color_to_receive = self.get_game_board().get_game_piece_color_by_location(row_end, col_end)
 
@@ -246,15 +460,54 @@ class XiangqiGame:
         # elif not self.get_potential_move_status(row_start, row_end, col_start, col_end):  # prevent revealed check etc.
         #     return False
         else:
-            # move the piece, update its location, and update the turn order
-            self.get_game_board().get_board()[row_end][col_end] = piece_to_move
-            self.get_game_board().get_board()[row_start][col_start] = "..."
+            return self.apply_move(self.get_game_board().create_move(row_start, col_start, row_end, col_end))
+
+    def apply_move(self, move):
+        """
+        A method to make a XiangqiMove taken from get_available_moves, without checking it again.
+        Moves the piece, records the move in the history, updates the game state and the turn order.
+        :returns True
+        """
+        # move the piece, update its location, and update the turn order
+        captured_piece = self.get_game_board().move_game_piece(move.get_start_row(), move.get_start_col(),
+                                                               move.get_end_row(), move.get_end_col())
+        self._move_history.append((move, captured_piece, self.get_game_state()))
+        self.update_legal_moves(move)
+        self.update_check(move)
+        self.update_game_status()
+        self.update_turn_order()
+        return True
+
+    def undo_move(self):
+        """
+        A method to take back the last move made, restoring any captured piece, the game state and the turn order.
+        :returns True if a move was taken back, False if no moves have been made
+        """
+        if not self._move_history:
+            return False
+
+        move, captured_piece, game_state = self._move_history.pop()
+        self.get_game_board().restore_game_piece(move.get_start_row(), move.get_start_col(),
+                                                 move.get_end_row(), move.get_end_col(), captured_piece)
+        self.update_legal_moves(move)
+        self.update_check(move)
+        self.set_game_state(game_state)
+        self._turn_order -= 1
+        return True
+
+    def update_legal_moves(self, move):
+        """
+        A method to work out the pieces' moves again after a move was made or taken back.
+        Only the pieces the move can change are worked out again, see XiangqiBoard.update_legal_moves_near,
+        unless the board's moves have not been worked out for every piece yet.
+        """
+        board = self.get_game_board()
+        if not board.get_legal_moves_current():
             self.update_game_board()
-            self.get_game_board().remove_game_piece_legal_move()
-            self.update_check()
-            self.update_game_status()
-            self.update_turn_order()
-            return True
+            board.remove_game_piece_legal_move()
+            return
+        board.update_legal_moves_near(((move.get_start_row(), move.get_start_col()),
+                                       (move.get_end_row(), move.get_end_col())))
 
     def update_game_board(self):
         """A method to update all the items on the board"""
@@ -289,11 +542,32 @@ class XiangqiGame:
 class XiangqiBoard:
     """Represents a Xiangqi board"""
 
+    # board in the starting position that new boards copy their pieces from, built by the first board made
+    _starting_template = None
+
     def __init__(self):
         """
-        Initializes the game board with game pieces at starting locations,
-        and updates those pieces' location data
+        Initializes the game board with game pieces at starting locations.
+        The pieces are copied from a starting template, and their move lists are only worked out when first needed.
         """
+        template = XiangqiBoard._starting_template
+        if template is None:
+            template = XiangqiBoard.__new__(XiangqiBoard)
+            template.set_up_starting_template()
+            XiangqiBoard._starting_template = template
+
+        self._game_board = [[square if square == "..." else square.clone() for square in row]
+                            for row in template.get_board()]
+        self._material_score = template.get_material_score()
+        self._position_key = template.get_position_key()
+        self._rank_masks = list(template._rank_masks)
+        self._file_masks = list(template._file_masks)
+
+        # the copied pieces' move lists are filled in by the first full update
+        self._legal_moves_current = False
+
+    def set_up_starting_template(self):
+        """A method to place the game pieces at their starting locations, used to build the starting template"""
         # set up the game board with pieces in default locations
         self._game_board = [["..."] * 9 for _ in range(10)]
         self._game_board[0][4] = General(None, "Black")
@@ -333,12 +607,294 @@ class XiangqiBoard:
         for row in range(10):
             for col in range(9):
                 if self.get_board()[row][col] != "...":
-                    self.get_board()[row][col].update_game_piece_location(row, col)
+                    self.get_board()[row][col].set_game_piece_location(row, col)
+
+        # material and piece-square score, kept up to date as pieces move
+        self._material_score = XiangqiEvaluation.get_material_score(self)
+
+        # hash of the piece placement, kept up to date as pieces move
+        self._position_key = self.compute_position_key()
+
+        # occupied locations of each rank and file, kept up to date as pieces move
+        self.compute_occupancy()
 
     def get_board(self):
         """A method to return the current game board"""
         return self._game_board
 
+    def set_up_game_pieces(self, placement):
+        """
+        A method to clear the board and place game pieces from a list of (game piece, row, col).
+        Piece locations, the material score and the position key are updated, move lists are left to the game.
+        """
+        self._game_board = [["..."] * 9 for _ in range(10)]
+        for game_piece, row, col in placement:
+            self._game_board[row][col] = game_piece
+            game_piece.set_game_piece_location(row, col)
+        self._material_score = XiangqiEvaluation.get_material_score(self)
+        self._position_key = self.compute_position_key()
+        self.compute_occupancy()
+
+    def get_material_score(self):
+        """A method to return the incrementally kept material and piece-square score, positive when Red is ahead"""
+        return self._material_score
+
+    def get_position_key(self):
+        """A method to return the incrementally kept 64 bit hash of the piece placement"""
+        return self._position_key
+
+    def compute_position_key(self):
+        """A method to compute the 64 bit hash of the piece placement from scratch"""
+        position_key = 0
+        for row in range(10):
+            for col in range(9):
+                current_piece = self.get_game_piece_by_location(row, col)
+                if current_piece:
+                    position_key ^= get_piece_position_key(current_piece, row, col)
+        return position_key
+
+    def get_rank_mask(self, row):
+        """A method to return a rank's occupancy as 9 bits, bit col set when that location holds a piece"""
+        return self._rank_masks[row]
+
+    def get_file_mask(self, col):
+        """A method to return a file's occupancy as 10 bits, bit row set when that location holds a piece"""
+        return self._file_masks[col]
+
+    def compute_occupancy(self):
+        """A method to compute the rank and file occupancy masks from scratch"""
+        self._rank_masks = [0] * 10
+        self._file_masks = [0] * 9
+        for row in range(10):
+            for col in range(9):
+                if self._game_board[row][col] != "...":
+                    self._rank_masks[row] |= 1 << col
+                    self._file_masks[col] |= 1 << row
+
+    def get_generals(self):
+        """A method to return the generals left on the board"""
+        generals = []
+        for row in range(10):
+            for col in range(9):
+                if type(self.get_game_piece_by_location(row, col)) == General:
+                    generals.append(self.get_game_piece_by_location(row, col))
+        return generals
+
+    def is_general_facing(self):
+        """
+        A method to determine if the two generals stand on the same file with nothing between them.
+        :returns True if they face each other, False otherwise
+        """
+        generals = self.get_generals()
+        if len(generals) != 2:
+            return False
+        upper_general, lower_general = generals
+        upper_row, upper_col = upper_general.get_game_piece_location_row(), upper_general.get_game_piece_location_col()
+        if upper_col != lower_general.get_game_piece_location_col():
+            return False
+        return FILE_BLOCKERS[upper_row][self._file_masks[upper_col]][2] == lower_general.get_game_piece_location_row()
+
+    def create_move(self, row_start, col_start, row_end, col_end):
+        """A method to describe moving the piece on a start location to an end location as a XiangqiMove"""
+        captured_piece = self._game_board[row_end][col_end]
+        if captured_piece == "...":
+            return XiangqiMove(row_start * 9 + col_start, row_end * 9 + col_end,
+                               get_piece_code(self._game_board[row_start][col_start]))
+        return XiangqiMove(row_start * 9 + col_start, row_end * 9 + col_end,
+                           get_piece_code(self._game_board[row_start][col_start]), get_piece_code(captured_piece),
+                           XiangqiMove.CAPTURE_FLAG)
+
+    def generate_moves(self, color, captures=True, quiet_moves=True):
+        """
+        A method to list the moves make_move would accept for a color's pieces, from the pieces' move lists.
+        Captures or quiet moves can be left out.
+        :returns a list of XiangqiMove in board order
+        """
+        moves = []
+        for row in range(10):
+            for col in range(9):
+                current_piece = self.get_game_piece_by_location(row, col)
+                if current_piece and current_piece.get_game_piece_color() == color:
+                    for move in current_piece.get_legal_moves():
+                        coordinates = LOCATION_COORDINATES.get(move)
+                        if coordinates is None:
+                            continue
+                        row_end, col_end = coordinates
+                        end_color = self.get_game_piece_color_by_location(row_end, col_end)
+                        if end_color == color:
+                            continue
+                        if (captures if end_color else quiet_moves) and \
+                                row_end in current_piece.get_legal_moveset_row() and \
+                                col_end in current_piece.get_legal_moveset_col():
+                            moves.append(self.create_move(row, col, row_end, col_end))
+        return moves
+
+    def get_capture_moves(self, color):
+        """
+        A method to list a color's captures, most valuable victim first and least valuable attacker first
+        among the same victims. The captures are bucketed by capture order, so no sort is needed.
+        :returns a list of XiangqiMove
+        """
+        buckets = [[] for _ in range(CAPTURE_ORDER_COUNT)]
+        for move in self.generate_moves(color, quiet_moves=False):
+            buckets[move.get_capture_order()].append(move)
+        return [move for bucket in reversed(buckets) for move in bucket]
+
+    def get_quiet_moves(self, color):
+        """A method to list a color's moves that don't capture, in board order"""
+        return self.generate_moves(color, captures=False)
+
+    def get_attackers(self, row, col, color, squares=None):
+        """
+        A method to find a color's pieces that could capture on a location, following cannon screens,
+        horse legs and elephant eyes. squares can be a copy of the board with pieces taken off.
+        :returns a list of (game piece, row, col)
+        """
+        if squares is None:
+            squares = self.get_board()
+        attackers = []
+
+        # chariots see the first piece along a line, cannons the piece after a screen,
+        # and a general sees the other general along an open file
+        for row_step, col_step in ORTHOGONAL_STEPS:
+            screens = 0
+            current_row = row + row_step
+            current_col = col + col_step
+            while 0 <= current_row < 10 and 0 <= current_col < 9:
+                current_piece = squares[current_row][current_col]
+                if current_piece != "...":
+                    if current_piece.get_game_piece_color() == color:
+                        if screens == 0 and type(current_piece) == Chariot or \
+                                screens == 1 and type(current_piece) == Cannon or \
+                                screens == 0 and type(current_piece) == General and col_step == 0 and \
+                                type(squares[row][col]) == General:
+                            attackers.append((current_piece, current_row, current_col))
+                    screens += 1
+                    if screens == 2:
+                        break
+                current_row += row_step
+                current_col += col_step
+
+        # the pieces that move one or two steps
+        for row_step, col_step in ORTHOGONAL_STEPS + DIAGONAL_STEPS + ELEPHANT_STEPS + HORSE_STEPS:
+            current_row = row - row_step
+            current_col = col - col_step
+            if not (0 <= current_row < 10 and 0 <= current_col < 9):
+                continue
+            current_piece = squares[current_row][current_col]
+            if current_piece == "..." or current_piece.get_game_piece_color() != color:
+                continue
+            piece_type = type(current_piece)
+            if abs(row_step) + abs(col_step) == 1:
+                if piece_type == General:
+                    attacks = row in current_piece.get_legal_moveset_row() and \
+                              col in current_piece.get_legal_moveset_col()
+                elif piece_type == Soldier:
+                    forward = -1 if color == "Red" else 1
+                    crossed_river = current_row <= 4 if color == "Red" else current_row >= 5
+                    attacks = row_step == forward or row_step == 0 and crossed_river
+                else:
+                    attacks = False
+            elif abs(row_step) == abs(col_step) == 1:
+                attacks = piece_type == Advisor and row in current_piece.get_legal_moveset_row() and \
+                          col in current_piece.get_legal_moveset_col()
+            elif abs(row_step) == abs(col_step) == 2:
+                attacks = piece_type == Elephant and row in current_piece.get_legal_moveset_row() and \
+                          squares[current_row + row_step // 2][current_col + col_step // 2] == "..."
+            else:
+                # the horse's leg is the square next to it in the long direction
+                if abs(row_step) == 2:
+                    leg = squares[current_row + row_step // 2][current_col]
+                else:
+                    leg = squares[current_row][current_col + col_step // 2]
+                attacks = piece_type == Horse and leg == "..."
+            if attacks:
+                attackers.append((current_piece, current_row, current_col))
+        return attackers
+
+    def static_exchange_evaluation(self, row_start, col_start, row_end, col_end):
+        """
+        A method to work out the material result of a capture and the captures back and forth that follow
+        on the same location, each side taking with its least valuable piece and stopping when that's better.
+        Pieces that step off a file or rank can open a line for a chariot or a screen for a cannon.
+        :returns the net gain in centipawns for the side making the capture
+        """
+        squares = [list(row) for row in self.get_board()]
+        moving_piece = squares[row_start][col_start]
+        captured_piece = squares[row_end][col_end]
+
+        gains = [XiangqiEvaluation.MATERIAL_VALUES[captured_piece.get_game_piece_name()]
+                 if captured_piece != "..." else 0]
+        squares[row_start][col_start] = "..."
+        squares[row_end][col_end] = moving_piece
+        piece_value = XiangqiEvaluation.MATERIAL_VALUES[moving_piece.get_game_piece_name()]
+        color = "Black" if moving_piece.get_game_piece_color() == "Red" else "Red"
+
+        while True:
+            attackers = self.get_attackers(row_end, col_end, color, squares)
+            if not attackers:
+                break
+            attacker, row, col = min(attackers, key=lambda elem: XiangqiEvaluation.MATERIAL_VALUES[
+                elem[0].get_game_piece_name()])
+            gains.append(piece_value - gains[-1])
+            squares[row][col] = "..."
+            squares[row_end][col_end] = attacker
+            piece_value = XiangqiEvaluation.MATERIAL_VALUES[attacker.get_game_piece_name()]
+            color = "Black" if color == "Red" else "Red"
+
+        # either side can stop taking back when that loses material
+        while len(gains) > 1:
+            gains[-2] = -max(-gains[-2], gains[-1])
+            gains.pop()
+        return gains[0]
+
+    def move_game_piece(self, row_start, col_start, row_end, col_end):
+        """
+        A method to move a game piece on the board and update the material score.
+        Piece move lists are not updated here.
+        :returns the captured piece, or "..." if the end location was empty
+        """
+        piece_to_move = self._game_board[row_start][col_start]
+        captured_piece = self._game_board[row_end][col_end]
+
+        self._material_score -= XiangqiEvaluation.get_piece_square_value(piece_to_move, row_start, col_start)
+        self._material_score += XiangqiEvaluation.get_piece_square_value(piece_to_move, row_end, col_end)
+        if captured_piece != "...":
+            self._material_score -= XiangqiEvaluation.get_piece_square_value(captured_piece, row_end, col_end)
+            self._position_key ^= get_piece_position_key(captured_piece, row_end, col_end)
+        self._position_key ^= get_piece_position_key(piece_to_move, row_start, col_start)
+        self._position_key ^= get_piece_position_key(piece_to_move, row_end, col_end)
+
+        self._rank_masks[row_start] &= ~(1 << col_start)
+        self._file_masks[col_start] &= ~(1 << row_start)
+        self._rank_masks[row_end] |= 1 << col_end
+        self._file_masks[col_end] |= 1 << row_end
+
+        self._game_board[row_end][col_end] = piece_to_move
+        self._game_board[row_start][col_start] = "..."
+        return captured_piece
+
+    def restore_game_piece(self, row_start, col_start, row_end, col_end, captured_piece):
+        """A method to reverse move_game_piece, putting back the captured piece and the material score"""
+        moved_piece = self._game_board[row_end][col_end]
+
+        self._material_score -= XiangqiEvaluation.get_piece_square_value(moved_piece, row_end, col_end)
+        self._material_score += XiangqiEvaluation.get_piece_square_value(moved_piece, row_start, col_start)
+        if captured_piece != "...":
+            self._material_score += XiangqiEvaluation.get_piece_square_value(captured_piece, row_end, col_end)
+            self._position_key ^= get_piece_position_key(captured_piece, row_end, col_end)
+        self._position_key ^= get_piece_position_key(moved_piece, row_end, col_end)
+        self._position_key ^= get_piece_position_key(moved_piece, row_start, col_start)
+
+        self._rank_masks[row_start] |= 1 << col_start
+        self._file_masks[col_start] |= 1 << row_start
+        if captured_piece == "...":
+            self._rank_masks[row_end] &= ~(1 << col_end)
+            self._file_masks[col_end] &= ~(1 << row_end)
+
+        self._game_board[row_start][col_start] = moved_piece
+        self._game_board[row_end][col_end] = captured_piece
+
     def is_on_board(self, row, col):
         """A method to check if a location exists on the game board"""
         if row in range(len(self.get_board())):
@@ -440,6 +996,57 @@ class XiangqiBoard:
 
                     else:
                         pass
+        self._legal_moves_current = True
+
+    def get_legal_moves_current(self):
+        """A method to determine if every piece's move list has been worked out by a full update"""
+        return self._legal_moves_current
+
+    def update_game_piece_legal_moves(self, row, col):
+        """A method to work out one piece's move list again, the way remove_game_piece_legal_move does for all"""
+        current_piece = self._game_board[row][col]
+        current_piece.update_game_piece_location(row, col)
+
+        # remove friendly fire
+        legal_moves = current_piece.get_legal_moves()
+        for elem in list(legal_moves):
+            coordinates = LOCATION_COORDINATES.get(elem)
+            if coordinates is not None and self.get_game_piece_color_by_location(*coordinates) == \
+                    current_piece.get_game_piece_color():
+                legal_moves.remove(elem)
+
+        if type(current_piece) == Elephant:
+            self.blind_the_elephant(row, col)
+        elif type(current_piece) == Horse:
+            self.hobble_the_horse(row, col)
+        elif type(current_piece) == Chariot:
+            self.block_the_chariot_and_cannon(row, col)
+            self.chariot_hit_detection(row, col)
+        elif type(current_piece) == Cannon:
+            self.block_the_chariot_and_cannon(row, col)
+            self.cannon_hit_detection(row, col)
+
+    def update_legal_moves_near(self, locations):
+        """
+        A method to work out the move lists again after the pieces on some locations changed.
+        A piece's list only depends on the pieces around it, so only these are worked out again: pieces within
+        two rows and columns of a changed location, which covers steps, horse legs and elephant eyes, chariots
+        and cannons on a changed location's rank or file, and the generals, whose safety depends on every attacker.
+        """
+        for row in range(10):
+            for col in range(9):
+                current_piece = self._game_board[row][col]
+                if current_piece == "...":
+                    continue
+                piece_type = type(current_piece)
+                for changed_row, changed_col in locations:
+                    if piece_type == General or abs(changed_row - row) <= 2 and abs(changed_col - col) <= 2 or \
+                            piece_type in (Chariot, Cannon) and (changed_row == row or changed_col == col):
+                        self.update_game_piece_legal_moves(row, col)
+                        if piece_type == General:
+                            self.fly_the_general(row, col)
+                        break
+        self.prevent_self_check()
 
     def remove_friendly_fire(self):
         """A method to remove any same color locations in a piece's move list"""
@@ -471,49 +1078,25 @@ class XiangqiBoard:
                             self.get_game_piece_by_location(row, col).get_legal_moves().remove(elem)
 
     def prevent_self_check(self):
-        """A method to remove the self checking moves from the general's list of movement."""
-        # list for holding available moves
-        red_general_flight = []
-        black_general_flight = []
-
-        # set up the generals and locations for reference
-        for row in range(0, 10):
-            for col in range(0, 9):
-                if type(self.get_game_piece_by_location(row, col)) == General:
-                    current_piece = self.get_game_piece_by_location(row, col)
-                    if current_piece.get_game_piece_color() == "Red":
-                        red_general = self.get_game_piece_by_location(row, col)
-                        red_general_flight = current_piece.get_flying_moves()
-                    else:
-                        black_general = self.get_game_piece_by_location(row, col)
-                        black_general_flight = current_piece.get_flying_moves()
-
-        # check for red general
-        if red_general.get_game_piece_color() == "Red":
-            for elem in current_piece.get_legal_moves():
-                if elem in self.get_all_legal_moves_by_color("Black"):
-                    try:
-                        red_general.get_legal_moves().remove(elem)
-                    except ValueError:
-                        pass
-                if elem in black_general_flight:
-                    try:
-                        red_general.get_legal_moves().remove(elem)
-                    except ValueError:
-                        pass
-        # black general
-        if black_general.get_game_piece_color() == "Black":
-            for elem in black_general.get_legal_moves():
-                if elem in self.get_all_legal_moves_by_color("Red"):
-                    try:
-                        black_general.get_legal_moves().remove(elem)
-                    except ValueError:
-                        pass
-                if elem in red_general_flight:
-                    try:
-                        black_general.get_legal_moves().remove(elem)
-                    except ValueError:
-                        pass
+        """
+        A method to remove the self checking moves from the general's list of movement.
+        Each location is tried with the general standing on it, so get_attackers sees the lines it opens
+        behind itself, cannon screens and the other general along an open file.
+        """
+        squares = self.get_board()
+        for general in self.get_generals():
+            row = general.get_game_piece_location_row()
+            col = general.get_game_piece_location_col()
+            other_color = "Black" if general.get_game_piece_color() == "Red" else "Red"
+            squares[row][col] = "..."
+            for elem in list(general.get_legal_moves()):
+                elem_row, elem_col = LOCATION_COORDINATES[elem]
+                captured_piece = squares[elem_row][elem_col]
+                squares[elem_row][elem_col] = general
+                if self.get_attackers(elem_row, elem_col, other_color):
+                    general.get_legal_moves().remove(elem)
+                squares[elem_row][elem_col] = captured_piece
+            squares[row][col] = general
 
     def get_all_legal_moves_by_color(self, color):
         """A method to get all available moves by each piece based upon color
@@ -540,58 +1123,29 @@ class XiangqiBoard:
             return black_move_list
 
     def fly_the_general(self, row, col):
-        """A method to add flying moves for the Generals"""
-        # check each piece on the board to update them all after each move
+        """
+        A method to add flying moves for the Generals, the locations in the other palace the General sees
+        along an open file, up to the first opposing piece
+        """
         current_piece = self.get_game_piece_by_location(row, col)
         current_piece.get_flying_moves().clear()
+        upper_first, upper_second, lower_first, lower_second = FILE_BLOCKERS[row][self._file_masks[col]]
 
-        # check for the red general flying moves
+        # the file has to be open up to the other palace
         if current_piece.get_game_piece_color() == "Red":
-            for num in range((row - 1), -1, -1):  # check for empty spaces from the general's location
-                if self.get_board()[num][col] != "..." and num > 2:  # if row is blocked
-                    break
-                elif num in range(0, 3):  # go until the next palace
-                    if self.get_game_piece_by_location(num, col):
-                        if self.get_game_piece_color_by_location(num, col) == current_piece.get_game_piece_color():
-                            try:
-                                current_piece.get_flying_moves().append(
-                                    current_piece.convert_coordinates_to_string(num, col))
-                            except ValueError:
-                                break
-                        else:
-                            break
-                    elif self.get_board()[num][col] == "...":
-                        try:
-                            current_piece.get_flying_moves().append(
-                                current_piece.convert_coordinates_to_string(num, col))
-                        except ValueError:
-                            pass
-                else:
-                    pass
-
-        # check for the black general flying moves
+            if upper_first is not None and upper_first > 2:
+                return
+            palace_rows = (2, 1, 0)
         else:
-            for num in range((row + 1), 10, 1):
-                if self.get_board()[num][col] != "..." and num < 7:  # if row is blocked
-                    break
-                elif num in range(7, 10):  # go until the next palace
-                    if self.get_game_piece_by_location(num, col):
-                        if self.get_game_piece_color_by_location(row, col) == current_piece.get_game_piece_color():
-                            try:
-                                current_piece.get_flying_moves().append(
-                                 current_piece.convert_coordinates_to_string(num, col))
-                            except ValueError:
-                                break
-                        else:
-                            break
-                    elif self.get_board()[num][col] == "...":
-                        try:
-                            current_piece.get_flying_moves().append(
-                                current_piece.convert_coordinates_to_string(num, col))
-                        except ValueError:
-                            pass
-                else:
-                    pass
+            if lower_first is not None and lower_first < 7:
+                return
+            palace_rows = (7, 8, 9)
+
+        for num in palace_rows:
+            if self._game_board[num][col] != "..." and \
+                    self._game_board[num][col].get_game_piece_color() != current_piece.get_game_piece_color():
+                break
+            current_piece.get_flying_moves().append(LOCATION_NAMES[num][col])
 
     def hobble_the_horse(self, row, col):
         """A method to determine if the horse's movement is blocked, and to update the list of moves if so"""
@@ -627,7 +1181,7 @@ class XiangqiBoard:
                 pass
 
         # check lower location
-        blocking_piece = self.get_game_piece_by_location(row - 1, col)
+        blocking_piece = self.get_game_piece_by_location(row + 1, col)
         if blocking_piece:
             try:
                 current_piece.get_legal_moves().remove(
@@ -700,227 +1254,55 @@ class XiangqiBoard:
         # assign the chariot to current the piece
         current_piece = self.get_game_piece_by_location(row, col)
 
-        # check left and right to remove illegal moves in the list
-        for col_num in range(9):
-            if col_num < col:
-                if self.get_game_piece_by_location(row, col_num):
-
-                    # remove the left side blocked options
-                    for blocked_col in range((col_num + 1)):
-                        try:
-                            current_piece.get_legal_moves().remove(
-                                current_piece.convert_coordinates_to_string(row, blocked_col))
-                        except ValueError:
-                            pass
-            elif col_num > col:
-                if self.get_game_piece_by_location(row, col_num):
-
-                    # remove the right side blocked options
-                    for blocked_col in range(9, (col_num - 1), -1):
-                        try:
-                            current_piece.get_legal_moves().remove(
-                                current_piece.convert_coordinates_to_string(row, blocked_col))
-                        except ValueError:
-                            pass
-
-        # check up and down to remove illegal moves in the list
-        for row_num in range(10):
-            if row_num < row:
-                if self.get_game_piece_by_location(row_num, col):
-
-                    # remove lower blocked options
-                    for blocked_row in range(0, (row_num + 1)):
-                        try:
-                            current_piece.get_legal_moves().remove(
-                                current_piece.convert_coordinates_to_string(blocked_row, col))
-                        except ValueError:
-                            pass
-            elif row_num > row:
-                if self.get_game_piece_by_location(row_num, col):
-
-                    # remove upper blocked options
-                    for blocked_row in range(row_num, 10):
-                        try:
-                            current_piece.get_legal_moves().remove(
-                                current_piece.convert_coordinates_to_string(blocked_row, col))
-                        except ValueError:
-                            pass
+        # only the locations before the first piece in each direction are left
+        left_first, left_second, right_first, right_second = RANK_BLOCKERS[col][self._rank_masks[row]]
+        upper_first, upper_second, lower_first, lower_second = FILE_BLOCKERS[row][self._file_masks[col]]
+        left_first = -1 if left_first is None else left_first
+        right_first = 9 if right_first is None else right_first
+        upper_first = -1 if upper_first is None else upper_first
+        lower_first = 10 if lower_first is None else lower_first
+
+        legal_moves = current_piece.get_legal_moves()
+        for elem in list(legal_moves):
+            elem_row, elem_col = LOCATION_COORDINATES[elem]
+            if elem_row == row and not left_first < elem_col < right_first or \
+                    elem_col == col and not upper_first < elem_row < lower_first:
+                legal_moves.remove(elem)
 
     def chariot_hit_detection(self, row, col):
         """A method to add functionality so the chariot can land on opposing pieces"""
         # assign the chariot to the current piece
         current_piece = self.get_game_piece_by_location(row, col)
-
-        # check left direction
-        for num in range((col - 1), -1, -1):
-            if self.get_game_piece_by_location(row, num):  # if we find another piece
-                if self.get_game_piece_by_location(row,
-                                                   num).get_game_piece_color() != current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(row, num))
-                        break
-                    except ValueError:
-                        break
-                else:
-                    break
-
-        # check right direction
-        for num in range((col + 1), 9):
-            if self.get_game_piece_by_location(row, num):  # if we find another piece
-                if self.get_game_piece_by_location(row,
-                                                   num).get_game_piece_color() != current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(row, num))
-                        break
-                    except ValueError:
-                        break
-                else:
-                    break
-
-        # check upper direction
-        for num in range((row - 1), -1, -1):
-            if self.get_game_piece_by_location(num, col):
-                if self.get_game_piece_by_location(num, col).get_game_piece_color() != \
-                        current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(num, col))
-                        break
-                    except ValueError:
-                        break
-                else:
-                    break
-
-        # check lower direction
-        for num in range((row + 1), 10):
-            if self.get_game_piece_by_location(num, col):
-                if self.get_game_piece_by_location(num,
-                                                   col).get_game_piece_color() != current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(num, col))
-                        break
-                    except ValueError:
-                        break
-                else:
-                    break
+        left_first, left_second, right_first, right_second = RANK_BLOCKERS[col][self._rank_masks[row]]
+        upper_first, upper_second, lower_first, lower_second = FILE_BLOCKERS[row][self._file_masks[col]]
+
+        # the first piece in each direction can be taken if it is an opposing piece
+        for blocking_row, blocking_col in ((row, left_first), (row, right_first), (upper_first, col),
+                                           (lower_first, col)):
+            if blocking_row is None or blocking_col is None:
+                continue
+            if self._game_board[blocking_row][blocking_col].get_game_piece_color() != \
+                    current_piece.get_game_piece_color():
+                current_piece.get_legal_moves().append(LOCATION_NAMES[blocking_row][blocking_col])
 
     def cannon_hit_detection(self, row, col):
-        """A method to add functionality so the cannon can land on opposing pieces"""
+        """
+        A method to add functionality so the cannon can land on opposing pieces.
+        Past the first piece, the screen, only the next piece can be taken, and only if it is an opposing piece.
+        """
         # assign the cannon to the current the piece
         current_piece = self.get_game_piece_by_location(row, col)
-        can_attack = False
-
-        # check left direction, start at the piece and work your way to the edge
-        for num in range((col - 1), -1, -1):
-            if can_attack:
-                if not self.get_game_piece_by_location(row, num):
-                    if current_piece.convert_coordinates_to_string(row, num) not in current_piece.get_legal_moves():
-                        try:
-                            current_piece.get_legal_moves().append(
-                                current_piece.convert_coordinates_to_string(row, num))
-                        except ValueError:
-                            pass
-                elif self.get_game_piece_by_location(
-                        row, num).get_game_piece_color() != current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(row, num))
-                        break
-                    except ValueError:
-                        break
-                else:
-                    break
-
-            # add the functionality to attack if we found a first piece
-            if self.get_game_piece_by_location(row, num):
-                can_attack = True
-
-        # check right direction
-        can_attack = False
-        for num in range((col + 1), 9):
-            if can_attack:
-
-                # add empty places to allow for attacking those locations
-                if not self.get_game_piece_by_location(row, num):
-                    if current_piece.convert_coordinates_to_string(row, num) not in current_piece.get_legal_moves():
-                        try:
-                            current_piece.get_legal_moves().append(
-                                current_piece.convert_coordinates_to_string(row, num))
-                        except ValueError:
-                            pass
-
-                # add enemy locations
-                elif self.get_game_piece_by_location(
-                        row, num).get_game_piece_color() != current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(row, num))
-                        break
-                    except ValueError:
-                        break
-
-            # add the functionality to attack if we found a first piece
-            if self.get_game_piece_by_location(row, num):
-                can_attack = True
-
-        # check upper direction
-        can_attack = False
-        for num in range((row - 1), -1, -1):
-            if can_attack:
-
-                # add empty places to allow for attacking those locations
-                if self.get_board()[num][col] == "...":
-                    if current_piece.convert_coordinates_to_string(num, col) not in current_piece.get_legal_moves():
-                        try:
-                            current_piece.get_legal_moves().append(
-                                current_piece.convert_coordinates_to_string(num, col))
-                        except ValueError:
-                            pass
-
-                # add enemy locations
-                elif self.get_game_piece_by_location(
-                        num, col).get_game_piece_color() != current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(num, col))
-                        break
-                    except ValueError:
-                        break
+        left_first, left_second, right_first, right_second = RANK_BLOCKERS[col][self._rank_masks[row]]
+        upper_first, upper_second, lower_first, lower_second = FILE_BLOCKERS[row][self._file_masks[col]]
 
-            # add the functionality to attack if we found a first piece
-            if self.get_game_piece_by_location(num, col):
-                can_attack = True
-
-        # check lower direction
-        can_attack = False
-        for num in range((row + 1), 10):
-            if can_attack:
-
-                # add empty places to allow for attacking those locations
-                if not self.get_game_piece_by_location(num, col):
-                    if current_piece.convert_coordinates_to_string(num, col) not in current_piece.get_legal_moves():
-                        try:
-                            current_piece.get_legal_moves().append(
-                                current_piece.convert_coordinates_to_string(num, col))
-                        except ValueError:
-                            pass
-
-                # add enemy locations
-                elif self.get_game_piece_by_location(
-                        num, col).get_game_piece_color() != current_piece.get_game_piece_color():
-                    try:
-                        current_piece.get_legal_moves().append(
-                            current_piece.convert_coordinates_to_string(num, col))
-                        break
-                    except ValueError:
-                        break
-
-            # add the functionality to attack if we found a first piece
-            if self.get_game_piece_by_location(num, col):
-                can_attack = True
+        # the second piece in each direction can be taken if it is an opposing piece
+        for target_row, target_col in ((row, left_second), (row, right_second), (upper_second, col),
+                                       (lower_second, col)):
+            if target_row is None or target_col is None:
+                continue
+            if self._game_board[target_row][target_col].get_game_piece_color() != \
+                    current_piece.get_game_piece_color():
+                current_piece.get_legal_moves().append(LOCATION_NAMES[target_row][target_col])
 
 
 class XiangqiPiece:
@@ -957,17 +1339,23 @@ class XiangqiPiece:
         A method to convert the integers indexes to alpha numeric characters
         :returns the row and column as concatenated strings
         """
-        try:
-            # Create dictionary to cross reference
-            convert_dict_row = {0: "10", 1: "9", 2: "8", 3: "7", 4: "6", 5: "5", 6: "4", 7: "3", 8: "2", 9: "1"}
-            convert_dict_col = {0: "a", 1: "b", 2: "c", 3: "d", 4: "e", 5: "f", 6: "g", 7: "h", 8: "i"}
+        if 0 <= row < 10 and 0 <= col < 9:
+            return LOCATION_NAMES[row][col]
+        return "N/A"
+
+    def set_game_piece_location(self, row, col):
+        """A method to set a game piece's location, leaving its moves to be worked out when first needed"""
+        self._location_row = row
+        self._location_col = col
+        self._legal_moves = None
 
-            # convert and store the values as strings, then return them together
-            row_string = convert_dict_row[row]
-            col_string = convert_dict_col[col]
-            return col_string + row_string
-        except KeyError:
-            return "N/A"
+    def clone(self):
+        """A method to return a copy of the game piece with its own move list"""
+        game_piece = self.__class__.__new__(self.__class__)
+        game_piece.__dict__.update(self.__dict__)
+        if self._legal_moves is not None:
+            game_piece._legal_moves = list(self._legal_moves)
+        return game_piece
 
     def update_game_piece_location(self, row, col):
         """A method to update a game piece's location and available moves"""
@@ -1000,7 +1388,9 @@ class XiangqiPiece:
         return self._moveset_col
 
     def get_legal_moves(self):
-        """A method to get all the available legal moves"""
+        """A method to get all the available legal moves, worked out from the location the first time"""
+        if self._legal_moves is None and self._location_row is not None:
+            self.update_game_piece_location(self._location_row, self._location_col)
         return self._legal_moves
 
     def update_general_legal_moves(self, row, col):
@@ -1172,6 +1562,12 @@ class General(XiangqiPiece):
         """A method to return the flying general's moves"""
         return self._flying_moves
 
+    def clone(self):
+        """A method to return a copy of the General with its own move lists"""
+        game_piece = super().clone()
+        game_piece._flying_moves = list(self._flying_moves)
+        return game_piece
+
     def get_check_status(self):
         """A method to return current in check status for a General"""
         return self._in_check
@@ -1257,14 +1653,194 @@ class Soldier(XiangqiPiece):
         self._name = " S "
         self._color = color
 
+        # any file can be reached by stepping sideways once across the river, the move list keeps
+        # the soldier on its file before that
         if self.get_game_piece_color() == "Red":
             self._moveset_row = range(0, 7)
-            if self.get_game_piece_location_row() != 9:
-                self._moveset_col = (0, 2, 4, 6, 8)
         else:
             self._moveset_row = range(3, 10)
-            if self.get_game_piece_location_row() != 0:
-                self._moveset_col = (0, 2, 4, 6, 8)
+
+
+class XiangqiMove:
+    """
+    Represents a move packed into a single integer: start location index in bits 0-6, end location index
+    in bits 7-13, moving piece code in bits 14-17, captured piece code in bits 18-21 and flags from bit 22.
+    Location indexes are row * 9 + col. Moves can't be changed once made.
+    The pieces' own move lists are still location names like "e2", as get_legal_moves returns them,
+    and XiangqiBoard.generate_moves builds the moves from those lists.
+    """
+
+    __slots__ = ("_value",)
+
+    CAPTURE_FLAG = 1
+
+    def __init__(self, start_index, end_index, moving_piece_code, captured_piece_code=0, flags=0):
+        """Initializes the move from its parts, piece codes are made by get_piece_code"""
+        self._value = start_index | (end_index << 7) | (moving_piece_code << 14) | (captured_piece_code << 18) | \
+            (flags << 22)
+
+    @classmethod
+    def from_value(cls, value):
+        """A method to rebuild a move from its packed integer"""
+        move = cls.__new__(cls)
+        move._value = value
+        return move
+
+    def get_value(self):
+        """A method to return the packed integer"""
+        return self._value
+
+    def get_start_index(self):
+        """A method to return the start location index"""
+        return self._value & 0x7F
+
+    def get_end_index(self):
+        """A method to return the end location index"""
+        return (self._value >> 7) & 0x7F
+
+    def get_start_row(self):
+        """A method to return the start row"""
+        return (self._value & 0x7F) // 9
+
+    def get_start_col(self):
+        """A method to return the start column"""
+        return (self._value & 0x7F) % 9
+
+    def get_end_row(self):
+        """A method to return the end row"""
+        return ((self._value >> 7) & 0x7F) // 9
+
+    def get_end_col(self):
+        """A method to return the end column"""
+        return ((self._value >> 7) & 0x7F) % 9
+
+    def get_start(self):
+        """A method to return the start location as an alpha numeric string like "e1" """
+        return LOCATION_NAMES[self.get_start_row()][self.get_start_col()]
+
+    def get_end(self):
+        """A method to return the end location as an alpha numeric string like "e2" """
+        return LOCATION_NAMES[self.get_end_row()][self.get_end_col()]
+
+    def get_locations(self):
+        """A method to return the move as a (start, end) pair of strings, as make_move takes them"""
+        return self.get_start(), self.get_end()
+
+    def get_moving_piece_code(self):
+        """A method to return the code of the piece that moves"""
+        return (self._value >> 14) & 0xF
+
+    def get_captured_piece_code(self):
+        """A method to return the code of the piece taken, 0 if nothing is taken"""
+        return (self._value >> 18) & 0xF
+
+    def get_flags(self):
+        """A method to return the move's flags"""
+        return self._value >> 22
+
+    def get_capture_order(self):
+        """
+        A method to return the most valuable victim, least valuable attacker order of a capture,
+        from 0 to CAPTURE_ORDER_COUNT - 1 with higher first, or 0 for a quiet move
+        """
+        if not self.is_capture():
+            return 0
+        return (CAPTURE_RANKS[self.get_captured_piece_code() & 7] * 7
+                + 6 - CAPTURE_RANKS[self.get_moving_piece_code() & 7])
+
+    def is_capture(self):
+        """A method to determine if the move takes a piece"""
+        return bool(self.get_flags() & self.CAPTURE_FLAG)
+
+    def __eq__(self, other):
+        return isinstance(other, XiangqiMove) and self._value == other._value
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def __repr__(self):
+        return "XiangqiMove(%s, %s)" % self.get_locations()
+
+
+# codes for the kinds of game pieces, Black pieces have 8 added
+PIECE_CODES = {General: 1, Advisor: 2, Elephant: 3, Horse: 4, Chariot: 5, Cannon: 6, Soldier: 7}
+PIECE_NAMES_BY_CODE = {1: " G ", 2: " A ", 3: " E ", 4: " H ", 5: " R ", 6: " C ", 7: " S "}
+PIECE_TYPES_BY_CODE = {code: piece_type for piece_type, code in PIECE_CODES.items()}
+
+# the squares of both palaces
+PALACE_ROWS = (0, 1, 2, 7, 8, 9)
+PALACE_COLS = (3, 4, 5)
+
+# value ranks of the piece kinds by code, lowest first, used to order captures
+CAPTURE_RANKS = {7: 0, 2: 1, 3: 1, 4: 2, 6: 3, 5: 4, 1: 5}
+CAPTURE_ORDER_COUNT = 6 * 7
+
+# row and column steps of the pieces, used to find the pieces attacking a location
+ORTHOGONAL_STEPS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+DIAGONAL_STEPS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+ELEPHANT_STEPS = [(-2, -2), (-2, 2), (2, -2), (2, 2)]
+HORSE_STEPS = [(-2, -1), (-2, 1), (2, -1), (2, 1), (-1, -2), (1, -2), (-1, 2), (1, 2)]
+
+
+def get_line_blockers(length):
+    """
+    A function to build the blocker table of a rank or file with length locations. For each position and
+    occupancy mask it holds the (first, second) pieces toward index 0 then the (first, second) toward the far end,
+    as indexes along the line or None.
+    """
+    table = []
+    for position in range(length):
+        position_table = []
+        for mask in range(1 << length):
+            lower = [num for num in range(position - 1, -1, -1) if mask >> num & 1][:2]
+            higher = [num for num in range(position + 1, length) if mask >> num & 1][:2]
+            lower += [None] * (2 - len(lower))
+            higher += [None] * (2 - len(higher))
+            position_table.append(tuple(lower + higher))
+        table.append(position_table)
+    return table
+
+
+# blockers along a rank by col and rank mask, left then right, and along a file by row and file mask, up then down
+RANK_BLOCKERS = get_line_blockers(9)
+FILE_BLOCKERS = get_line_blockers(10)
+
+# packed positions are the 90 location piece codes two to a byte, the game state and the turn count
+PACKED_GAME_STATES = ("UNFINISHED", "RED_WON", "BLACK_WON")
+PACKED_POSITION_SIZE = 48
+
+
+def get_piece_code(game_piece):
+    """A function to return the code of a game piece's kind and color"""
+    if game_piece.get_game_piece_color() == "Black":
+        return PIECE_CODES[type(game_piece)] + 8
+    return PIECE_CODES[type(game_piece)]
+
+
+def get_piece_name_by_code(piece_code):
+    """A function to return the game piece name for a piece code, or False for 0"""
+    return PIECE_NAMES_BY_CODE.get(piece_code & 7, False)
+
+
+# game piece types by FEN letter, "h" and "e" are accepted for the horse and elephant as well
+FEN_PIECE_TYPES = {"k": General, "a": Advisor, "b": Elephant, "e": Elephant, "n": Horse, "h": Horse,
+                   "r": Chariot, "c": Cannon, "p": Soldier}
+FEN_LETTERS = {General: "k", Advisor: "a", Elephant: "b", Horse: "n", Chariot: "r", Cannon: "c", Soldier: "p"}
+
+
+def convert_coordinates_to_location(row, col):
+    """A function to convert a row and column index to an alpha numeric location like "e1" """
+    return "abcdefghi"[col] + str(10 - row)
+
+
+# alpha numeric location names by row and column, and row and column by location name
+LOCATION_NAMES = [[convert_coordinates_to_location(row, col) for col in range(9)] for row in range(10)]
+LOCATION_COORDINATES = {LOCATION_NAMES[row][col]: (row, col) for row in range(10) for col in range(9)}
+
+
+def get_piece_position_key(game_piece, row, col):
+    """A function to return the hash key of a game piece standing on a location"""
+    return POSITION_KEYS[(game_piece.get_game_piece_name(), game_piece.get_game_piece_color())][row][col]
 
 
 def main():
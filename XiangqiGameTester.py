@@ -2,8 +2,32 @@
 # Date: 03/01/2020
 # Description: a file that contains unit tests for the XiangqiGame.py file.
 
+import io
+import os
+import tempfile
 import unittest
 import XiangqiGame as Game
+import XiangqiEvaluation as Evaluation
+import XiangqiFuzz as Fuzz
+import XiangqiOpeningBook as OpeningBook
+import XiangqiTablebase as Tablebase
+import XiangqiSearch as Search
+import XiangqiAnalysis as Analysis
+import XiangqiArchive as Archive
+import XiangqiBenchmark as Benchmark
+import XiangqiMatch as Match
+import XiangqiMate as Mate
+import XiangqiMoveTree as MoveTree
+import XiangqiNotation as Notation
+import XiangqiRender as Render
+import XiangqiUcci as Ucci
+
+try:
+    import numpy
+    import XiangqiBatch as Batch
+    import XiangqiExporter as Exporter
+except ImportError:
+    numpy = None
 
 
 class TestStore(unittest.TestCase):
@@ -198,10 +222,10 @@ class TestStore(unittest.TestCase):
             self.assertEqual(['h9', 'h8', 'h6', 'h5', 'h4', 'h3', 'h2', 'f7'],
                              g1.get_game_board().get_game_piece_by_location(3, 7).get_legal_moves())
         with self.subTest():
-            self.assertEqual(['f9', 'a8', 'b8', 'c8', 'd8', 'e8', 'g8', 'h8', 'i8', 'f6', 'f5', 'f4', 'f3'],
+            self.assertEqual(['f9', 'a8', 'b8', 'c8', 'd8', 'e8', 'g8', 'h8', 'i8', 'f3'],
                              g1.get_game_board().get_game_piece_by_location(2, 5).get_legal_moves())
         with self.subTest():
-            self.assertEqual(['f6', 'f5', 'f4', 'd7', 'c7', 'h7', 'f9', 'f10', 'f2'],
+            self.assertEqual(['f6', 'f5', 'f4', 'c7', 'h7', 'f10'],
                              g1.get_game_board().get_game_piece_by_location(3, 5).get_legal_moves())
         with self.subTest():
             self.assertEqual(['f6', 'f5', 'f4', 'f2', 'a3', 'b3', 'c3', 'd3', 'e3', 'g3', 'h3', 'i3', 'f8'],
@@ -277,3 +301,868 @@ class TestStore(unittest.TestCase):
         g1.make_move("b9", "b8")
         g1.make_move("b3", "e3")
         self.assertEqual("RED_WON", g1.get_game_state())
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_21(self):
+        """A test to check the plane encoding of the starting board"""
+        planes = Exporter.encode_board(Game.XiangqiGame().get_game_board())
+        with self.subTest():
+            self.assertEqual((14, 10, 9), planes.shape)
+        with self.subTest():
+            self.assertEqual(32, planes.sum())
+        with self.subTest():
+            self.assertEqual(1, planes[0, 9, 4])  # red general
+        with self.subTest():
+            self.assertEqual(1, planes[11, 0, 8])  # black chariot
+        with self.subTest():
+            self.assertEqual(5, planes[13].sum())  # black soldiers
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_22(self):
+        """A test to check replayed games are written across trimmed shards with their labels"""
+        moves = [("a1", "a2"), ("a10", "a9"), ("e1", "e2"), ("a9", "a10"), ("a2", "d2")]
+        with tempfile.TemporaryDirectory() as output_dir:
+            with Exporter.XiangqiExporter(output_dir, shard_size=4, chunk_size=3) as exporter:
+                self.assertEqual(5, exporter.add_game(moves, "RED_WON"))
+                self.assertFalse(exporter.add_game([("e1", "e3")]))
+            paths = exporter.get_shard_paths()
+            with self.subTest():
+                self.assertEqual(2, len(paths))
+            with self.subTest():
+                self.assertEqual((1, 14, 10, 9), numpy.load(paths[1][0], mmap_mode="r").shape)
+            with self.subTest():
+                self.assertEqual([0, 1, 0, 1], list(numpy.load(paths[0][1])))
+            with self.subTest():
+                self.assertEqual([1], list(numpy.load(paths[1][2])))
+            with self.subTest():
+                self.assertTrue(os.path.exists(paths[0][0]))
+
+            # drawn games are labelled 0 and results that aren't game states are refused
+            with Exporter.XiangqiExporter(os.path.join(output_dir, "draws")) as exporter:
+                with self.subTest():
+                    self.assertEqual(5, exporter.add_game(moves, "DRAW"))
+                with self.subTest():
+                    self.assertRaises(ValueError, exporter.add_game, moves, "RED_WINS")
+            with self.subTest():
+                self.assertEqual([0] * 5, list(numpy.load(exporter.get_shard_paths()[0][2])))
+
+    def test_23(self):
+        """A test to check the incremental material score matches a full recount through moves and captures"""
+        g1 = Game.XiangqiGame()
+        with self.subTest():
+            self.assertEqual(0, g1.get_game_board().get_material_score())
+        for start, end in [("h3", "h10"), ("i10", "h10"), ("b3", "b10"), ("a10", "b10")]:
+            g1.make_move(start, end)
+            with self.subTest():
+                self.assertEqual(Evaluation.get_material_score(g1.get_game_board()),
+                                 g1.get_game_board().get_material_score())
+        with self.subTest():
+            self.assertEqual(0, Evaluation.evaluate(Game.XiangqiGame()))
+
+    def test_24(self):
+        """A test to check undoing moves restores captured pieces, the score and the turn order"""
+        g1 = Game.XiangqiGame()
+        g1.make_move("h3", "h10")  # red cannon takes the horse
+        score = g1.get_game_board().get_material_score()
+        g1.make_move("i10", "h10")  # black chariot takes the cannon
+        with self.subTest():
+            self.assertTrue(g1.undo_move())
+        with self.subTest():
+            self.assertEqual(score, g1.get_game_board().get_material_score())
+        with self.subTest():
+            self.assertEqual(" C ", g1.get_game_board().get_game_piece_name_by_location(0, 7))
+        with self.subTest():
+            self.assertEqual("Black", g1.get_turn_order_color())
+        g1.undo_move()
+        with self.subTest():
+            self.assertEqual(" H ", g1.get_game_board().get_game_piece_name_by_location(0, 7))
+        with self.subTest():
+            self.assertEqual(0, g1.get_game_board().get_material_score())
+        with self.subTest():
+            self.assertFalse(g1.undo_move())
+
+    def test_25(self):
+        """A test to check position keys are kept incrementally and match for transposed move orders"""
+        g1 = Game.XiangqiGame()
+        g2 = Game.XiangqiGame()
+        start_key = g1.get_position_key()
+        for start, end in [("b1", "c3"), ("b10", "c8"), ("h1", "g3")]:
+            g1.make_move(start, end)
+        for start, end in [("h1", "g3"), ("b10", "c8"), ("b1", "c3")]:
+            g2.make_move(start, end)
+        with self.subTest():
+            self.assertEqual(g1.get_position_key(), g2.get_position_key())
+        with self.subTest():
+            self.assertEqual(g1.get_game_board().compute_position_key(), g1.get_game_board().get_position_key())
+        with self.subTest():
+            self.assertNotEqual(start_key, g1.get_position_key())
+        g1.undo_move()
+        g1.undo_move()
+        g1.undo_move()
+        with self.subTest():
+            self.assertEqual(start_key, g1.get_position_key())
+
+    def test_26(self):
+        """A test to check the opening book is built, mapped and searched correctly"""
+        builder = OpeningBook.XiangqiOpeningBookBuilder()
+        builder.add_game([("h3", "e3"), ("h8", "e8"), ("b1", "c3")], "RED_WON")
+        builder.add_game([("h3", "e3"), ("b10", "c8")], "UNFINISHED")
+        builder.add_game([("b3", "e3"), ("h8", "e8")], "BLACK_WON")
+        builder.add_game([("h3", "e3"), ("h8", "e8")], "BLACK_WON")
+        with self.subTest():
+            self.assertFalse(builder.add_game([("e1", "e3")]))
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, "opening.book")
+            with self.subTest():
+                self.assertEqual(5, builder.write(path))
+            with OpeningBook.XiangqiOpeningBook(path) as book:
+                g1 = Game.XiangqiGame()
+                with self.subTest():
+                    self.assertEqual([("h3", "e3", 3)], book.get_moves(g1))
+                g1.make_move("h3", "e3")
+                with self.subTest():
+                    self.assertEqual([("h8", "e8", 2), ("b10", "c8", 1)], book.get_moves(g1))
+                with self.subTest():
+                    self.assertIn(book.choose_move(g1), [("h8", "e8"), ("b10", "c8")])
+                g1.make_move("a10", "a9")
+                with self.subTest():
+                    self.assertFalse(book.choose_move(g1))
+
+    def test_27(self):
+        """A test to check positions are read from and written to FEN strings"""
+        g1 = Game.XiangqiGame()
+        with self.subTest():
+            self.assertEqual("rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w", g1.get_fen())
+        with self.subTest():
+            self.assertTrue(g1.load_fen("3k5/9/9/9/9/9/9/9/4R4/4K4 b"))
+        with self.subTest():
+            self.assertEqual("3k5/9/9/9/9/9/9/9/4R4/4K4 b", g1.get_fen())
+        with self.subTest():
+            self.assertEqual("Black", g1.get_turn_order_color())
+        with self.subTest():
+            self.assertTrue(g1.make_move("d10", "d9"))
+        with self.subTest():
+            self.assertFalse(g1.load_fen("3k5/9/9/9/9/9/9/9/4R4/9 w"))  # no red general
+        with self.subTest():
+            self.assertFalse(g1.load_fen("3k6/9/9/9/9/9/9/9/4R4/4K4 w"))
+        with self.subTest():
+            self.assertFalse(g1.load_fen("3K5/9/9/9/9/9/9/9/4R4/4K4 w"))  # two red generals
+        with self.subTest():
+            self.assertFalse(g1.set_up_position([(Game.General(None, "Red"), 0, 3), (Game.General(None, "Red"), 9, 4)]))
+
+    def test_28(self):
+        """A test to check tablebase values are worked back from mated positions with their distances"""
+        successors = [([], []), ([0], []), ([1], []), ([3], []), None, ([], [2]), ([1, 3], [])]
+        self.assertEqual([2, 3, 4, 0, 1, 3, 0], list(Tablebase.solve_positions(successors)))
+
+    def test_29(self):
+        """A test to check a small tablebase is generated and probed, by the search and to adjudicate games"""
+        with tempfile.TemporaryDirectory() as output_dir:
+            Tablebase.generate_tablebase("kKA", output_dir, processes=1)
+            with self.subTest():
+                self.assertTrue(os.path.exists(os.path.join(output_dir, "KAk.xtb")))
+            with self.subTest():
+                self.assertTrue(os.path.exists(os.path.join(output_dir, "Kk.xtb")))
+            tablebase = Tablebase.XiangqiTablebase(output_dir)
+            g1 = Game.XiangqiGame()
+            g1.load_fen("3k5/9/9/9/9/9/9/9/4A4/4K4 w")
+            with self.subTest():
+                self.assertEqual(("DRAW", 0), tablebase.probe(g1))
+            with self.subTest():
+                self.assertEqual("DRAW", tablebase.get_adjudicated_state(g1))
+            with self.subTest():
+                self.assertEqual(0, Search.XiangqiSearch(g1, tablebase=tablebase).search(2).get_score())
+            with self.subTest():
+                self.assertEqual(("UNFINISHED", 0), Match.play_game("3k5/9/9/9/9/9/9/9/4A4/4K4 w", {"depth": 1},
+                                                                    {"depth": 1}, tablebase=tablebase))
+            g1.load_fen("4k4/9/9/9/9/9/9/9/3A5/4K4 b")  # generals face each other
+            with self.subTest():
+                self.assertFalse(tablebase.probe(g1))
+            with self.subTest():
+                self.assertFalse(tablebase.probe(Game.XiangqiGame()))
+            tablebase.close()
+
+    def test_30(self):
+        """A test to check the search finds a mate in one or an open general and leaves the game as it found it"""
+        g1 = Game.XiangqiGame()
+        g1.load_fen("3k5/9/R8/9/9/9/9/9/8R/4K4 w")
+        result = Search.XiangqiSearch(g1).search(3)
+        with self.subTest():
+            self.assertEqual(Search.MATE_SCORE - 1, result.get_score())
+        with self.subTest():
+            self.assertEqual([result.get_best_move()], result.get_principal_variation())
+        with self.subTest():
+            self.assertEqual("3k5/9/R8/9/9/9/9/9/8R/4K4 w", g1.get_fen())
+        with self.subTest():
+            self.assertEqual([], g1.get_move_history())
+
+        # a general left open is taken at the root without making the capture
+        g2 = Game.XiangqiGame()
+        g2.load_fen("4k4/9/9/9/9/9/9/9/4R4/3K5 w")
+        result = Search.XiangqiSearch(g2).search(2)
+        with self.subTest():
+            self.assertEqual((Search.MATE_SCORE, ("e2", "e10")),
+                             (result.get_score(), result.get_best_move().get_locations()))
+        with self.subTest():
+            self.assertEqual("4k4/9/9/9/9/9/9/9/4R4/3K5 w", g2.get_fen())
+
+        # a check the other side can answer by taking the checking piece is not a mate
+        g3 = Game.XiangqiGame()
+        g3.load_fen("3k5/9/9/9/9/9/9/9/r7R/4K4 w")
+        result = Search.XiangqiSearch(g3).search(2)
+        with self.subTest():
+            self.assertLess(abs(result.get_score()), Search.MATE_THRESHOLD)
+        with self.subTest():
+            self.assertEqual(2, result.get_depth())
+
+    def test_31(self):
+        """A test to check the shared transposition table and the parallel search"""
+        table = Search.SharedTranspositionTable(1024)
+        try:
+            move = Game.XiangqiGame().get_game_board().create_move(9, 4, 8, 4)
+            table.put(123456789, 4, Search.LOWER_BOUND, -350, move)
+            with self.subTest():
+                self.assertEqual((4, Search.LOWER_BOUND, -350, move), table.get(123456789))
+            with self.subTest():
+                self.assertIsNone(table.get(123456789 + 1024))
+            other = Search.SharedTranspositionTable(1024, table.get_name())
+            with self.subTest():
+                self.assertEqual((4, Search.LOWER_BOUND, -350, move), other.get(123456789))
+            other.close()
+        finally:
+            table.close()
+            table.unlink()
+
+        g1 = Game.XiangqiGame()
+        g1.load_fen("3k5/9/R8/9/9/9/9/9/8R/4K4 w")
+        result = Search.parallel_search(g1, 2, workers=2)
+        with self.subTest():
+            self.assertEqual(Search.MATE_SCORE - 1, result.get_score())
+        with self.subTest():
+            self.assertGreater(result.get_node_count(), 0)
+
+    def test_32(self):
+        """A test to check moves are generated, made and recorded as packed move objects"""
+        g1 = Game.XiangqiGame()
+        moves = g1.get_available_moves("Red")
+        with self.subTest():
+            self.assertIn(("b3", "b10"), [move.get_locations() for move in moves])
+        capture = [move for move in moves if move.get_locations() == ("b3", "b10")][0]
+        with self.subTest():
+            self.assertTrue(capture.is_capture())
+        with self.subTest():
+            self.assertEqual(" H ", Game.get_piece_name_by_code(capture.get_captured_piece_code()))
+        with self.subTest():
+            self.assertEqual(Game.PIECE_CODES[Game.Cannon], capture.get_moving_piece_code())
+        with self.subTest():
+            self.assertEqual(capture, Game.XiangqiMove.from_value(capture.get_value()))
+        with self.subTest():
+            self.assertEqual((7, 1, 0, 1), (capture.get_start_row(), capture.get_start_col(),
+                                            capture.get_end_row(), capture.get_end_col()))
+        g1.apply_move(capture)
+        g1.make_move("a10", "b10")
+        history = g1.get_move_history()
+        with self.subTest():
+            self.assertEqual([("b3", "b10"), ("a10", "b10")], [move.get_locations() for move in history])
+        with self.subTest():
+            self.assertEqual(Game.PIECE_CODES[Game.Cannon], history[1].get_captured_piece_code())
+
+    def test_33(self):
+        """A test to ensure badly formed or empty start locations are refused without errors"""
+        g1 = Game.XiangqiGame()
+        for start, end in [("z1", "a2"), ("a11", "a1"), ("a0", "a1"), ("", "a1"), ("a1", "a 2"),
+                           (None, "a1"), (5, 6), (["a", "1"], "a2"), ("a5", "a6"), ("e6", "e7")]:
+            with self.subTest(start=start, end=end):
+                self.assertFalse(g1.make_move(start, end))
+        with self.subTest():
+            self.assertEqual([9, 0, 0, 8], g1.convert_string_to_coordinates("a1", "i10"))
+        with self.subTest():
+            self.assertFalse(g1.convert_string_to_coordinates("j1", "a1"))
+        with self.subTest():
+            self.assertEqual("Red", g1.get_turn_order_color())
+
+    def test_34(self):
+        """A test to check the bundled benchmark games replay and regressions are found against a baseline"""
+        for moves in Benchmark.read_corpus():
+            g1 = Game.XiangqiGame()
+            with self.subTest(moves=moves[:2]):
+                self.assertTrue(all(g1.make_move(start, end) for start, end in moves))
+        baseline = {"scenarios": {"make_move": {"seconds_per_operation": 0.010},
+                                  "game_replay": {"seconds_per_operation": 0.010}}}
+        current = {"scenarios": {"make_move": {"seconds_per_operation": 0.0105},
+                                 "game_replay": {"seconds_per_operation": 0.012},
+                                 "new_scenario": {"seconds_per_operation": 1.0}}}
+        regressions = Benchmark.compare_results(baseline, current, 0.1)
+        with self.subTest():
+            self.assertEqual(["game_replay"], [regression[0] for regression in regressions])
+        with self.subTest():
+            self.assertAlmostEqual(1.2, regressions[0][3])
+
+    def test_35(self):
+        """A test to check the move tree streams each half move with its statistics, caches positions and finds mates"""
+        g1 = Game.XiangqiGame()
+        g1.load_fen("3k5/9/R8/9/9/9/9/9/8R/4K4 w")
+        tree = MoveTree.XiangqiMoveTree(g1)
+        levels = tree.explore(2)
+        ply, edges, statistics = next(levels)
+        with self.subTest():
+            self.assertEqual({"replies": 36, "checks": 4, "captures": 0, "mates": 4}, statistics)
+        with self.subTest():
+            self.assertFalse(any(tree.get_node(child_key).is_expanded() for parent_key, move, child_key in edges))
+        ply, edges, statistics = next(levels)
+        with self.subTest():
+            self.assertEqual(2, ply)
+        with self.subTest():
+            self.assertEqual(33, statistics["replies"])
+        with self.subTest():
+            self.assertEqual(statistics, MoveTree.XiangqiMoveTree(g1, max_nodes=5).get_statistics(2)[1])
+        with self.subTest():
+            self.assertEqual(tree.get_root(), tree.get_node(g1.get_position_key()))
+
+        # a check answered by taking the checking piece is not a mate, and the capture is explored
+        g2 = Game.XiangqiGame()
+        g2.load_fen("3k5/9/9/9/9/9/9/9/r7R/4K4 w")
+        levels = MoveTree.XiangqiMoveTree(g2).explore(2)
+        ply, edges, statistics = next(levels)
+        with self.subTest():
+            self.assertEqual((2, 0), (statistics["checks"], statistics["mates"]))
+        check_key = [child_key for parent_key, move, child_key in edges if move.get_locations() == ("i2", "d2")][0]
+        ply, edges, statistics = next(levels)
+        with self.subTest():
+            self.assertIn(("a2", "d2"), [move.get_locations() for parent_key, move, child_key in edges
+                                         if parent_key == check_key])
+
+    def test_36(self):
+        """A test to check new games copy the starting pieces and work out their moves the first time they are needed"""
+        g1 = Game.XiangqiGame()
+        g2 = Game.XiangqiGame()
+        horse = g1.get_game_board().get_game_piece_by_location(9, 1)
+        with self.subTest():
+            self.assertIsNone(horse._legal_moves)
+        with self.subTest():
+            self.assertTrue({"a3", "c3", "d2"}.issubset(horse.get_legal_moves()))
+        with self.subTest():
+            self.assertIsNot(horse, g2.get_game_board().get_game_piece_by_location(9, 1))
+        with self.subTest():
+            self.assertTrue(g1.make_move("b1", "c3"))
+        with self.subTest():
+            self.assertEqual(" H ", g2.get_game_board().get_game_piece_name_by_location(9, 1))
+        with self.subTest():
+            self.assertIsNone(g2.get_game_board().get_game_piece_by_location(9, 1)._legal_moves)
+        with self.subTest():
+            self.assertEqual(g2.get_game_board().compute_position_key(), g2.get_position_key())
+        with self.subTest():
+            self.assertEqual(Evaluation.get_material_score(g2.get_game_board()),
+                             g2.get_game_board().get_material_score())
+
+    def test_37(self):
+        """A test to check a game packed into bytes comes back with the same position, turn and state"""
+        g1 = Game.XiangqiGame()
+        g1.make_move("h3", "e3")
+        g1.make_move("h10", "g8")
+        packed = g1.to_packed()
+        with self.subTest():
+            self.assertEqual(Game.PACKED_POSITION_SIZE, len(packed))
+        g2 = Game.XiangqiGame.from_packed(packed)
+        with self.subTest():
+            self.assertEqual(g1.get_fen(), g2.get_fen())
+        with self.subTest():
+            self.assertEqual(2, g2.get_turn_order_count())
+        with self.subTest():
+            self.assertEqual(g1.get_position_key(), g2.get_position_key())
+        with self.subTest():
+            self.assertTrue(g2.make_move("e3", "e7"))
+        with self.subTest():
+            self.assertFalse(Game.XiangqiGame.from_packed(packed[:-1]))
+        with self.subTest():
+            self.assertFalse(Game.XiangqiGame.from_packed(bytes(Game.PACKED_POSITION_SIZE)))
+        g1.set_game_state("RED_WON")
+        with self.subTest():
+            self.assertEqual("RED_WON", Game.XiangqiGame.from_packed(g1.to_packed()).get_game_state())
+
+    def test_38(self):
+        """A test to check captures are listed apart from quiet moves, most valuable victim and least attacker first"""
+        g1 = Game.XiangqiGame()
+        g1.load_fen("3k5/9/9/9/2r1n4/2P1R4/9/9/9/4K4 w")
+        board = g1.get_game_board()
+        captures = board.get_capture_moves("Red")
+        with self.subTest():
+            self.assertEqual([("c5", "c6"), ("e5", "e6")], [move.get_locations() for move in captures])
+        with self.subTest():
+            self.assertEqual([" R ", " H "], [Game.get_piece_name_by_code(move.get_captured_piece_code())
+                                              for move in captures])
+        with self.subTest():
+            self.assertEqual([("e6", "c5"), ("c6", "c5")],
+                             [move.get_locations() for move in board.get_capture_moves("Black")])
+        quiet_moves = board.get_quiet_moves("Red")
+        with self.subTest():
+            self.assertFalse(any(move.is_capture() for move in quiet_moves))
+        with self.subTest():
+            self.assertEqual(sorted(g1.get_available_moves("Red"), key=Game.XiangqiMove.get_value),
+                             sorted(captures + quiet_moves, key=Game.XiangqiMove.get_value))
+        with self.subTest():
+            self.assertEqual(0, quiet_moves[0].get_capture_order())
+
+    def test_39(self):
+        """A test to check static exchange evaluation follows cannon screens and horse legs"""
+        positions = [
+            ("3k5/9/9/9/4r4/4P4/4N4/4C4/9/3K5 b", (4, 4, 5, 4), -800),  # the horse screens the cannon
+            ("3k5/9/9/9/4r4/4P4/9/4C4/9/3K5 b", (4, 4, 5, 4), 100),  # no screen for the cannon
+            ("3k5/9/9/9/4r4/4P4/9/3N5/9/3K5 b", (4, 4, 5, 4), -800),  # the horse takes back
+            ("3k5/9/9/9/4r4/4P4/3P5/3N5/9/3K5 b", (4, 4, 5, 4), 100),  # the horse's leg is blocked
+            ("4k4/9/4r4/9/4p4/9/4R4/9/4C4/3K5 w", (6, 4, 4, 4), -800),  # the cannon loses its screen
+        ]
+        for fen, move, gain in positions:
+            g1 = Game.XiangqiGame()
+            g1.load_fen(fen)
+            with self.subTest(fen=fen):
+                self.assertEqual(gain, g1.get_game_board().static_exchange_evaluation(*move))
+        g1 = Game.XiangqiGame()
+        with self.subTest():
+            self.assertEqual([(9, 6), (9, 2)], [(row, col) for piece, row, col
+                                                in g1.get_game_board().get_attackers(7, 4, "Red")])
+
+    def test_40(self):
+        """A test to check the analysis lists the best moves of a position and of every position in a game"""
+        table = Search.TranspositionTable()
+        lines = Analysis.analyse_position("3k5/9/R8/9/9/9/9/9/8R/4K4 w", 2, 30.0, 1, table)
+        with self.subTest():
+            self.assertEqual(2, len(lines))
+        with self.subTest():
+            self.assertNotEqual(lines[0].get_best_move(), lines[1].get_best_move())
+        with self.subTest():
+            self.assertEqual([Search.MATE_SCORE - 1] * 2, [line.get_score() for line in lines])
+        with self.subTest():
+            self.assertFalse(Analysis.analyse_position("not a position"))
+        with self.subTest():
+            self.assertEqual([], Analysis.analyse_position("3k5/4R4/9/9/9/9/9/9/9/4K4 b", 2, 30.0, 1))
+        g1 = Game.XiangqiGame()
+        g1.load_fen("3k5/9/R8/9/9/9/9/9/8R/4K4 w")
+        g1.make_move("a8", "a7")
+        fen = g1.get_fen()
+        analysis = Analysis.analyse_game(g1, 1, 30.0, 1, processes=1)
+        with self.subTest():
+            self.assertEqual(["3k5/9/R8/9/9/9/9/9/8R/4K4 w", fen], [elem[0] for elem in analysis])
+        with self.subTest():
+            self.assertEqual([1, 1], [len(elem[1]) for elem in analysis])
+        with self.subTest():
+            self.assertEqual(fen, g1.get_fen())
+
+    def test_41(self):
+        """A test to check the UCCI front end sets positions, searches in a thread and answers while searching"""
+        with self.subTest():
+            self.assertEqual(("h3", "e3"), Ucci.convert_iccs_to_locations("h2e2"))
+        with self.subTest():
+            self.assertFalse(Ucci.convert_iccs_to_locations("h2e"))
+        with self.subTest():
+            self.assertEqual((Ucci.DEFAULT_DEPTH, 2.0), Ucci.get_search_limits("time 60000".split()))
+        with self.subTest():
+            self.assertEqual((Ucci.DEFAULT_DEPTH, 4.0),
+                             Ucci.get_search_limits("time 60000 increment 1000 movestogo 20".split()))
+        with self.subTest():
+            self.assertEqual((6, 2.0), Ucci.get_search_limits("depth 6 movetime 2000 time 600000".split()))
+        with self.subTest():
+            self.assertEqual((4, None), Ucci.get_search_limits("depth 4".split()))
+        output = io.StringIO()
+        engine = Ucci.XiangqiUcciEngine(output)
+        engine.run(io.StringIO("ucci\nposition startpos moves h2e2 h9g7\nisready\n"))
+        with self.subTest():
+            self.assertEqual(["id name " + Ucci.ENGINE_NAME, "id author " + Ucci.ENGINE_AUTHOR, "ucciok", "readyok"],
+                             output.getvalue().splitlines())
+        with self.subTest():
+            self.assertEqual(" H ", engine.get_game().get_game_board().get_game_piece_name_by_location(2, 6))
+        engine.handle_command("position startpos")
+        engine.handle_command("go depth 30")
+        engine.handle_command("isready")
+        with self.subTest():
+            self.assertTrue(engine.is_searching())
+        engine.handle_command("stop")
+        with self.subTest():
+            self.assertFalse(engine.is_searching())
+        with self.subTest():
+            self.assertEqual("readyok", output.getvalue().splitlines()[4])
+        engine.handle_command("position fen 3k5/9/R8/9/9/9/9/9/8R/4K4 w - - 0 1")
+        engine.handle_command("go depth 1")
+        engine.wait_for_search()
+        with self.subTest():
+            self.assertIn("score mate 1", output.getvalue().splitlines()[-2])
+        with self.subTest():
+            self.assertTrue(output.getvalue().splitlines()[-1].startswith("bestmove "))
+
+    def test_42(self):
+        """A test to check the match runner plays both colors of each opening and the SPRT stops a clear result"""
+        with self.subTest():
+            self.assertEqual(Match.SPRT_ACCEPT_H1, Match.check_sprt(60, 20, 20, 0, 50))
+        with self.subTest():
+            self.assertEqual(Match.SPRT_ACCEPT_H0, Match.check_sprt(20, 20, 60, 0, 50))
+        with self.subTest():
+            self.assertFalse(Match.check_sprt(3, 0, 2))
+        match = Match.XiangqiMatch({"depth": 1}, {"depth": 1}, ["3k5/9/R8/9/9/9/9/9/8R/4K4 w"], game_count=2,
+                                   processes=2, max_plies=3)
+        games = sorted(match.play())
+        with self.subTest():
+            self.assertEqual([(0, True, "RED_WON", 1), (1, False, "RED_WON", 0)],
+                             [(game[0], game[2], game[3], game[5]) for game in games])
+        with self.subTest():
+            self.assertEqual((1, 0, 1), (match.get_wins(), match.get_draws(), match.get_losses()))
+
+    def test_43(self):
+        """A test to check WXF and ICCS moves are read against the position and archives are streamed by game"""
+        g1 = Game.XiangqiGame()
+        g1.load_fen("4k4/9/9/9/9/9/9/4C4/9/4CK3 w")
+        with self.subTest():
+            self.assertEqual(("e3", "f3"), Notation.convert_wxf_to_locations(g1, "C+=4"))
+        with self.subTest():
+            self.assertEqual(("e1", "e2"), Notation.convert_wxf_to_locations(g1, "-C+1"))
+        with self.subTest():
+            self.assertFalse(Notation.convert_wxf_to_locations(g1, "C5+1"))
+        with self.subTest():
+            self.assertEqual(("h3", "e3"), Notation.convert_iccs_to_locations("H2-E2"))
+        archive = "\n".join(['[Event "WXF"]', "", "1. C2=5 H8+7 2. H2+3 R9=8 1-0", "",
+                             "h2e2 h9g7 *", "", "C2=5 X9+9", "",
+                             '[FEN "3k5/9/R8/9/9/9/9/9/8R/4K4 w"]', "R9=6", ""])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.txt")
+            with open(path, "w") as archive_file:
+                archive_file.write(archive)
+            reader = Notation.XiangqiNotationReader(path)
+            games = list(reader.read_games())
+        with self.subTest():
+            self.assertEqual(({"Event": "WXF", "Result": "1-0"}, [("h3", "e3"), ("h10", "g8"), ("h1", "g3"),
+                                                                  ("i10", "h10")]), games[0])
+        with self.subTest():
+            self.assertEqual([("h3", "e3"), ("h10", "g8")], games[1][1])
+        with self.subTest():
+            self.assertEqual([("a8", "d8")], games[2][1])
+        with self.subTest():
+            self.assertEqual((3, 1), (len(games), reader.get_skipped_count()))
+
+    def test_44(self):
+        """
+        A test to check the fuzzer finds and shrinks a generator difference, a default run of the game's moves
+        against the reference is clean, and the horse is hobbled from below
+        """
+        g1 = Game.XiangqiGame()
+        g1.load_fen("4k4/9/9/9/4N4/4P4/9/9/9/3K5 w")
+        with self.subTest():
+            self.assertEqual(["g5", "g7", "f8", "d8", "c7", "c5"],
+                             g1.get_game_board().get_game_piece_by_location(4, 4).get_legal_moves())
+
+        def get_moves_without_advisors(game):
+            # a generator that forgets the advisors
+            return {move for move in Fuzz.get_reference_moves(game)
+                    if type(game.get_game_board().get_game_piece_by_location(
+                        *Game.LOCATION_COORDINATES[move[0]])) != Game.Advisor}
+
+        fuzzer = Fuzz.XiangqiFuzzer(get_moves_without_advisors, seed=3, max_plies=20)
+        failures = fuzzer.run(1)
+        with self.subTest():
+            self.assertEqual([("4k4/9/9/9/9/9/9/9/9/4KA3 w", [], set(), {("f1", "e2")})], failures)
+        fuzzer = Fuzz.XiangqiFuzzer(Fuzz.get_reference_moves, seed=3, max_plies=10)
+        with self.subTest():
+            self.assertEqual([], fuzzer.run(1))
+        with self.subTest():
+            self.assertEqual(11, fuzzer.get_ply_count())
+        with self.subTest():
+            self.assertGreater(fuzzer.get_plies_per_second(), 0)
+
+        # the game's own moves against the reference, as the script runs them
+        fuzzer = Fuzz.XiangqiFuzzer(seed=1)
+        with self.subTest():
+            self.assertEqual([], fuzzer.run(2))
+
+        # a soldier across the river steps sideways onto any file
+        g2 = Game.XiangqiGame()
+        g2.load_fen("4k4/9/9/9/P8/9/9/9/9/4K4 w")
+        with self.subTest():
+            self.assertTrue(g2.make_move("a6", "b6"))
+
+    def test_45(self):
+        """A test to check the mate solver proves and disproves mates within its budget and checks puzzle files"""
+        fen = "4k4/9/9/9/9/9/9/9/8R/3K5 w"
+        with self.subTest():
+            self.assertEqual((Mate.DISPROVEN, []), Mate.solve_puzzle(fen, 1))
+        result, line = Mate.solve_puzzle(fen, 2, table_size=64)
+        with self.subTest():
+            self.assertEqual(Mate.PROVEN, result)
+        g1 = Game.XiangqiGame()
+        g1.load_fen(fen)
+        for move in line:
+            g1.apply_move(move)
+        with self.subTest():
+            self.assertEqual([], Mate.XiangqiMateSolver(g1).get_legal_moves())
+        with self.subTest():
+            self.assertEqual(3, len(line))
+        with self.subTest():
+            self.assertEqual((Mate.UNKNOWN, []), Mate.solve_puzzle(fen, 2, node_limit=3))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "puzzles.txt")
+            with open(path, "w") as puzzle_file:
+                puzzle_file.write("# chariot mates\n3k5/9/R8/9/9/9/9/9/8R/4K4 w 1\n\n" + fen + " 1\n")
+            results = list(Mate.verify_puzzles(path, processes=2))
+        with self.subTest():
+            self.assertEqual([(2, Mate.PROVEN), (4, Mate.DISPROVEN)],
+                             [(line_number, result[0]) for line_number, fen, mate_length, result in results])
+
+    def test_46(self):
+        """A test to check the incremental check and move list updates find discovered checks and cannon screens"""
+        g1 = Game.XiangqiGame()
+        g1.load_fen("4k4/9/9/9/4N4/9/9/9/4R4/3K5 w")
+        g1.set_check_debug_mode(True)
+        with self.subTest():
+            self.assertTrue(g1.get_check_debug_mode())
+        with self.subTest():
+            self.assertTrue(g1.make_move("e6", "d8"))
+        with self.subTest():
+            self.assertTrue(g1.is_in_check("Black"))
+        with self.subTest():
+            self.assertFalse(g1.is_in_check("Red"))
+
+        # a stale status on a general the move can't reach is caught by the debug mode
+        g1.get_game_board().get_game_piece_by_location(9, 3).update_check_status(True)
+        with self.subTest():
+            self.assertRaises(AssertionError, g1.make_move, "e10", "f10")
+
+        g2 = Game.XiangqiGame()
+        g2.load_fen("4k4/9/9/9/9/9/3N5/4C4/9/3K5 w")
+        g2.set_check_debug_mode(True)
+        with self.subTest():
+            self.assertTrue(g2.make_move("d4", "e6"))
+        with self.subTest():
+            self.assertTrue(g2.is_in_check("Black"))
+        with self.subTest():
+            self.assertTrue(g2.undo_move())
+        with self.subTest():
+            self.assertFalse(g2.is_in_check("Black"))
+
+        # the chariot steps off the file and leaves the generals facing each other
+        g3 = Game.XiangqiGame()
+        g3.load_fen("4k4/9/9/9/9/4R4/9/9/9/4K4 w")
+        g3.set_check_debug_mode(True)
+        with self.subTest():
+            self.assertTrue(g3.make_move("e5", "a5"))
+        with self.subTest():
+            self.assertTrue(g3.is_in_check("Red"))
+        with self.subTest():
+            self.assertTrue(g3.is_in_check("Black"))
+
+        # a cannon with two pieces in front of it doesn't give check
+        g4 = Game.XiangqiGame()
+        g4.load_fen("4k4/9/9/3P5/4p4/4C4/9/9/9/3K5 w")
+        g4.set_check_debug_mode(True)
+        with self.subTest():
+            self.assertTrue(g4.make_move("d7", "e7"))
+        with self.subTest():
+            self.assertFalse(g4.is_in_check("Black"))
+        with self.subTest():
+            self.assertEqual(['e4', 'e3', 'e2', 'e1', 'a5', 'b5', 'c5', 'd5', 'f5', 'g5', 'h5', 'i5'],
+                             g4.get_game_board().get_game_piece_by_location(5, 4).get_legal_moves())
+
+        # the move lists worked out near each move match working out every piece again, through captures and undo
+        def get_move_lists(game):
+            return [(row, col, list(square.get_legal_moves())) for row, board_row in
+                    enumerate(game.get_game_board().get_board()) for col, square in enumerate(board_row)
+                    if square != "..."]
+
+        g5 = Game.XiangqiGame()
+        for start, end in Benchmark.read_corpus()[0][:16]:
+            g5.make_move(start, end)
+            move_lists = get_move_lists(g5)
+            g5.update_game_board()
+            g5.get_game_board().remove_game_piece_legal_move()
+            with self.subTest(move=(start, end)):
+                self.assertEqual(get_move_lists(g5), move_lists)
+        g5.undo_move()
+        move_lists = get_move_lists(g5)
+        g5.update_game_board()
+        g5.get_game_board().remove_game_piece_legal_move()
+        with self.subTest():
+            self.assertEqual(get_move_lists(g5), move_lists)
+
+    def test_47(self):
+        """A test to check the rank and file occupancy masks follow moves and the blocker tables find pieces"""
+        g1 = Game.XiangqiGame()
+        board = g1.get_game_board()
+        with self.subTest():
+            self.assertEqual(0b010000010, board.get_rank_mask(2))
+        with self.subTest():
+            self.assertEqual(0b1010000101, board.get_file_mask(1))
+        with self.subTest():
+            self.assertEqual((1, None, 7, None), Game.RANK_BLOCKERS[4][board.get_rank_mask(2)])
+        with self.subTest():
+            self.assertEqual((2, 0, 9, None), Game.FILE_BLOCKERS[7][board.get_file_mask(1)])
+
+        # capture the horse with the cannon, then take the move back
+        g1.make_move("b3", "b10")
+        with self.subTest():
+            self.assertEqual(0b1000000101, board.get_file_mask(1))
+        with self.subTest():
+            self.assertEqual(0b010000000, board.get_rank_mask(7))
+        g1.undo_move()
+        with self.subTest():
+            self.assertEqual(0b1010000101, board.get_file_mask(1))
+
+        # the masks agree with a recount after some moves
+        for start, end in [("h3", "e3"), ("h10", "g8"), ("e4", "e5"), ("e7", "e6"), ("e5", "e6")]:
+            g1.make_move(start, end)
+        masks = [board.get_rank_mask(row) for row in range(10)] + [board.get_file_mask(col) for col in range(9)]
+        board.compute_occupancy()
+        with self.subTest():
+            self.assertEqual(masks, [board.get_rank_mask(row) for row in range(10)] +
+                             [board.get_file_mask(col) for col in range(9)])
+
+        # generals facing each other on an open file
+        g2 = Game.XiangqiGame()
+        g2.load_fen("4k4/9/9/9/9/9/9/9/9/4K4 w")
+        with self.subTest():
+            self.assertTrue(g2.can_capture_general("Red"))
+        with self.subTest():
+            self.assertEqual(["e8", "e9"], g2.get_game_board().get_game_piece_by_location(9, 4).get_flying_moves())
+        with self.subTest():
+            self.assertEqual(["e3", "e2"], g2.get_game_board().get_game_piece_by_location(0, 4).get_flying_moves())
+
+    def test_48(self):
+        """A test to check the renderer draws frames from cached ranks and sends spectators the changed locations"""
+        g1 = Game.XiangqiGame()
+        renderer = Render.XiangqiRenderer(g1)
+        frame = renderer.get_frame().split("\n")
+        with self.subTest():
+            self.assertEqual("10 r n b a k a b n r", frame[0])
+        with self.subTest():
+            self.assertEqual(" 3 . C . . . . . C .", frame[7])
+        with self.subTest():
+            self.assertEqual("   a b c d e f g h i", frame[10])
+
+        # a spectator starts from the first frame's delta and follows the moves
+        spectator = Render.XiangqiRenderer()
+        spectator.apply_delta(Render.parse_delta(Render.format_delta(renderer.get_position_delta())))
+        untouched_row = renderer.get_row_string(0)
+        g1.make_move("h3", "e3")
+        delta = renderer.get_move_delta(g1.get_move_history()[-1])
+        with self.subTest():
+            self.assertEqual("h3. e3C", Render.format_delta(delta))
+        spectator.apply_delta(Render.parse_delta("h3. e3C"))
+        with self.subTest():
+            self.assertEqual(renderer.get_frame(), spectator.get_frame())
+        with self.subTest():
+            self.assertIs(untouched_row, renderer.get_row_string(0))
+        with self.subTest():
+            self.assertEqual(" 3 . C . . C . . . .", renderer.get_row_string(7))
+        with self.subTest():
+            self.assertFalse(Render.parse_delta("j3C"))
+
+        # taking the move back and loading a position
+        move = g1.get_move_history()[-1]
+        g1.undo_move()
+        with self.subTest():
+            self.assertEqual([("h3", "C"), ("e3", ".")], renderer.get_move_delta(move))
+        g1.load_fen("4k4/9/9/9/9/9/9/9/9/4K4 w")
+        with self.subTest():
+            self.assertEqual(30, len(renderer.get_delta()))
+        unicode_renderer = Render.XiangqiRenderer(g1, use_unicode=True, use_color=True)
+        with self.subTest():
+            self.assertEqual(" 1 ．．．．\033[31m帥\033[0m．．．．", unicode_renderer.get_row_string(9))
+
+    def test_49(self):
+        """A test to check the archive stores replayed games by position and counts the moves played from them"""
+        games = [({"Result": "1-0"}, [("h3", "e3"), ("h10", "g8"), ("h1", "g3")]),
+                 ({"Result": "0-1"}, [("h3", "e3"), ("b8", "e8")]),
+                 ({}, [("h3", "e3"), ("h10", "g8")]),
+                 ({}, [("a1", "b5")])]
+        with tempfile.TemporaryDirectory() as directory:
+            archive = Archive.XiangqiArchive(os.path.join(directory, "games.db"))
+            with self.subTest():
+                self.assertEqual(2, archive.ingest(games[:2], processes=2, batch_size=1))
+            with self.subTest():
+                self.assertEqual(1, archive.ingest(games[2:], processes=1))
+            with self.subTest():
+                self.assertEqual(1, archive.get_skipped_count())
+            with self.subTest():
+                self.assertEqual(3, archive.get_game_count())
+
+            g1 = Game.XiangqiGame()
+            with self.subTest():
+                self.assertEqual([("h3-e3", 3, 1, 0, 1)], archive.get_move_statistics(g1))
+            g1.make_move("h3", "e3")
+            with self.subTest():
+                self.assertEqual([("h10-g8", 2, 1, 0, 0), ("b8-e8", 1, 0, 0, 1)],
+                                 archive.get_move_statistics(g1.get_fen()))
+            g1.make_move("h10", "g8")
+            with self.subTest():
+                self.assertEqual([(1, 2), (3, 2)], archive.get_games_reaching(g1.get_position_key()))
+            with self.subTest():
+                self.assertEqual([(1, 2)], archive.get_games_reaching(g1, limit=1))
+            with self.subTest():
+                self.assertEqual([("h3", "e3"), ("b8", "e8")], archive.get_game_moves(2))
+            with self.subTest():
+                self.assertFalse(archive.get_move_statistics("not a position"))
+            archive.close()
+
+    def test_50(self):
+        """A test to check many moves are validated at once without changing the game"""
+        g1 = Game.XiangqiGame()
+        moves = [("h3", "e3"), ("h3", "h11"), ("a1", "b5"), ("e7", "e6"), ("b3", "b10"), ["b1", "c3"], ("e1", "e1")]
+        with self.subTest():
+            self.assertEqual([True, False, False, False, True, True, False], g1.validate_moves(moves))
+        with self.subTest():
+            self.assertEqual([], g1.get_move_history())
+        with self.subTest():
+            self.assertEqual([], g1.validate_moves([]))
+
+        # each answer agrees with make_move on the same position
+        g1.make_move("h3", "e3")
+        moves = [("h10", "g8"), ("e3", "e7"), ("e7", "e6"), ("a10", "a8"), ("i10", "i8")]
+        results = g1.validate_moves(moves)
+        for move, result in zip(moves, results):
+            with self.subTest():
+                self.assertEqual(result, g1.make_move(*move))
+            if result:
+                g1.undo_move()
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_51(self):
+        """A test to check moves are generated and made on many boards at once"""
+        batch = Batch.XiangqiBatch(3)
+        move_boards, move_starts, move_ends = batch.generate_moves()
+        with self.subTest():
+            self.assertEqual([44, 44, 44], numpy.bincount(move_boards).tolist())
+
+        # the same moves as the written rules, with a hobbled horse, a blocked chariot and a cannon screen
+        g1 = Game.XiangqiGame()
+        g1.load_fen("3k5/9/9/9/2r1n4/2P1R4/9/4C4/9/4K4 w")
+        g2 = Game.XiangqiGame()
+        g2.load_fen("3k5/9/9/9/2r1n4/2P1R4/9/4C4/9/4K4 b")
+        batch = Batch.XiangqiBatch.from_games([g1, g2])
+        move_boards, move_starts, move_ends = batch.generate_moves()
+        for board_index, game in enumerate([g1, g2]):
+            squares = game.get_game_board().get_board()
+            color = game.get_turn_order_color()
+            expected = {(row * 9 + col, row_end * 9 + col_end) for row in range(10) for col in range(9)
+                        if squares[row][col] != "..." and squares[row][col].get_game_piece_color() == color
+                        for row_end, col_end in Fuzz.get_piece_moves(squares, row, col)}
+            with self.subTest():
+                self.assertEqual(expected, {(int(start), int(end)) for board, start, end in
+                                            zip(move_boards, move_starts, move_ends) if board == board_index})
+
+        # one move per board in a single step, the second board sitting this one out
+        captured = batch.apply_moves(numpy.array([5 * 9 + 4, -1]), numpy.array([4 * 9 + 4, -1]))
+        with self.subTest():
+            self.assertEqual([12, 0], captured.tolist())
+        g1.make_move("e5", "e6")
+        with self.subTest():
+            self.assertEqual(g1.get_fen(), batch.to_game(0).get_fen())
+        with self.subTest():
+            self.assertEqual(g2.get_fen(), batch.to_game(1).get_fen())
+        starts, ends = batch.choose_random_moves(batch.generate_moves(), numpy.random.default_rng(1))
+        with self.subTest():
+            self.assertTrue((starts >= 0).all())
+
+        # a board that lost its general can't become a game
+        batch.apply_moves(numpy.array([4 * 9 + 4, -1]), numpy.array([0 * 9 + 3, -1]))
+        with self.subTest():
+            self.assertFalse(batch.to_game(0))
+
+        # nor can a board with two generals of the same color, the black general on d10 turned red
+        batch.get_boards()[1, 0 * 9 + 3] = 1
+        with self.subTest():
+            self.assertFalse(batch.to_game(1))
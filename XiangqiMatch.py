@@ -0,0 +1,241 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A match runner that plays two search settings against each other.
+# Each opening is played twice, once with each setting as Red, in a pool of processes.
+# Results are reported as each game finishes. A game ends when get_game_state is no longer unfinished,
+# when a side has no move, or as a draw after a number of half moves.
+#
+# The match stops early with a sequential probability ratio test (SPRT). After every game the log likelihood
+# ratio of the first setting being elo1 stronger than the second, against being elo0 stronger, is compared
+# with bounds from the allowed error rates, and the match ends once either bound is crossed.
+# A setting is a dictionary of XiangqiSearch.search arguments, for example {"depth": 2, "time_limit": 0.5}.
+#
+# With a tablebase directory, both searches probe the tables and a game is adjudicated from them
+# as soon as it reaches a position a table covers.
+
+import math
+import multiprocessing
+
+from XiangqiGame import XiangqiGame
+from XiangqiSearch import XiangqiSearch
+from XiangqiTablebase import XiangqiTablebase
+
+# openings as moves from the starting position
+DEFAULT_OPENING_MOVES = [
+    [],
+    [("h3", "e3"), ("h10", "g8")],
+    [("h3", "e3"), ("b8", "e8")],
+    [("c4", "c5"), ("g7", "g6")],
+    [("b1", "c3"), ("h10", "g8")],
+    [("c1", "e3"), ("h8", "e8")],
+]
+
+DEFAULT_MAX_PLIES = 150
+
+# SPRT outcomes
+SPRT_ACCEPT_H0 = "H0"
+SPRT_ACCEPT_H1 = "H1"
+
+
+def get_opening_fens(opening_moves=None):
+    """A function to play out lists of opening moves from the starting position and return their FEN strings"""
+    if opening_moves is None:
+        opening_moves = DEFAULT_OPENING_MOVES
+    fens = []
+    for moves in opening_moves:
+        game = XiangqiGame()
+        for start, end in moves:
+            game.make_move(start, end)
+        fens.append(game.get_fen())
+    return fens
+
+
+def play_game(fen, red_setting, black_setting, max_plies=DEFAULT_MAX_PLIES, tablebase=None):
+    """
+    A function to play a game from a position between two search settings.
+    A side with no move, or whose chosen move the game refuses, loses.
+    With a XiangqiTablebase the game ends with the table's result once a table covers the position.
+    :returns (game state, number of half moves played), the state being "UNFINISHED" for a draw
+    """
+    game = XiangqiGame()
+    game.load_fen(fen)
+    plies = 0
+    while game.get_game_state() == "UNFINISHED" and plies < max_plies:
+        if tablebase is not None:
+            adjudicated_state = tablebase.get_adjudicated_state(game)
+            if adjudicated_state:
+                return ("UNFINISHED" if adjudicated_state == "DRAW" else adjudicated_state), plies
+        color = game.get_turn_order_color()
+        setting = red_setting if color == "Red" else black_setting
+        move = XiangqiSearch(game, tablebase=tablebase).search(**setting).get_best_move()
+        if move is None or not game.make_move(*move.get_locations()):
+            return ("BLACK_WON" if color == "Red" else "RED_WON"), plies
+        plies += 1
+    return game.get_game_state(), plies
+
+
+def _play_match_game(arguments):
+    """A function run in each process of the match, playing one game"""
+    game_number, fen, first_is_red, first_setting, second_setting, max_plies, tablebase_directory = arguments
+
+    # each process maps the tables itself
+    tablebase = XiangqiTablebase(tablebase_directory) if tablebase_directory is not None else None
+    if first_is_red:
+        game_state, plies = play_game(fen, first_setting, second_setting, max_plies, tablebase)
+    else:
+        game_state, plies = play_game(fen, second_setting, first_setting, max_plies, tablebase)
+    if tablebase is not None:
+        tablebase.close()
+    return game_number, fen, first_is_red, game_state, plies
+
+
+def get_expected_score(elo):
+    """A function to return the expected score of a side that is elo points stronger"""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def get_sprt_bounds(alpha=0.05, beta=0.05):
+    """A function to return the lower and upper log likelihood ratio bounds for the error rates"""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def get_sprt_llr(wins, draws, losses, elo0=0, elo1=10):
+    """
+    A function to return the log likelihood ratio of elo1 against elo0 for a set of results,
+    using the normal approximation to the game scores.
+    Half a game of each result is added so a run of only wins or only losses still has a variance.
+    """
+    if not wins + draws + losses:
+        return 0.0
+    wins += 0.5
+    draws += 0.5
+    losses += 0.5
+    game_count = wins + draws + losses
+    score = (wins + draws / 2) / game_count
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / game_count
+    score0 = get_expected_score(elo0)
+    score1 = get_expected_score(elo1)
+    return game_count * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def check_sprt(wins, draws, losses, elo0=0, elo1=10, alpha=0.05, beta=0.05):
+    """
+    A function to run the SPRT on a set of results.
+    :returns SPRT_ACCEPT_H1 or SPRT_ACCEPT_H0 once a bound is crossed, False while more games are needed
+    """
+    lower_bound, upper_bound = get_sprt_bounds(alpha, beta)
+    llr = get_sprt_llr(wins, draws, losses, elo0, elo1)
+    if llr >= upper_bound:
+        return SPRT_ACCEPT_H1
+    if llr <= lower_bound:
+        return SPRT_ACCEPT_H0
+    return False
+
+
+class XiangqiMatch:
+    """Represents a match between two search settings, scored from the first setting's side"""
+
+    def __init__(self, first_setting, second_setting, openings=None, game_count=100, processes=None,
+                 max_plies=DEFAULT_MAX_PLIES, elo0=0, elo1=10, alpha=0.05, beta=0.05, tablebase_directory=None):
+        """
+        Initializes a match of up to game_count games from a list of opening FEN strings,
+        played in a pool of processes, one per CPU by default, probing the tables in tablebase_directory if given
+        """
+        self._first_setting = first_setting
+        self._second_setting = second_setting
+        self._openings = openings if openings is not None else get_opening_fens()
+        self._game_count = game_count
+        self._processes = processes
+        self._max_plies = max_plies
+        self._tablebase_directory = tablebase_directory
+        self._sprt_settings = (elo0, elo1, alpha, beta)
+        self._wins = 0
+        self._draws = 0
+        self._losses = 0
+        self._sprt_result = False
+
+    def get_wins(self):
+        """A method to return the number of games the first setting won"""
+        return self._wins
+
+    def get_draws(self):
+        """A method to return the number of drawn games"""
+        return self._draws
+
+    def get_losses(self):
+        """A method to return the number of games the first setting lost"""
+        return self._losses
+
+    def get_game_total(self):
+        """A method to return the number of games played"""
+        return self._wins + self._draws + self._losses
+
+    def get_llr(self):
+        """A method to return the current SPRT log likelihood ratio"""
+        elo0, elo1, alpha, beta = self._sprt_settings
+        return get_sprt_llr(self._wins, self._draws, self._losses, elo0, elo1)
+
+    def get_sprt_result(self):
+        """A method to return the SPRT outcome, or False if the match ended without one"""
+        return self._sprt_result
+
+    def get_game_list(self):
+        """A method to list the games of the match as (game number, opening FEN, whether the first setting is Red)"""
+        games = []
+        for game_number in range(self._game_count):
+            fen = self._openings[(game_number // 2) % len(self._openings)]
+            games.append((game_number, fen, game_number % 2 == 0))
+        return games
+
+    def record_result(self, first_is_red, game_state):
+        """A method to add a game's result to the score, returning the first setting's score of 1, 0.5 or 0"""
+        if game_state == "UNFINISHED":
+            self._draws += 1
+            return 0.5
+        if (game_state == "RED_WON") == first_is_red:
+            self._wins += 1
+            return 1
+        self._losses += 1
+        return 0
+
+    def play(self):
+        """
+        A method to play the match, yielding each game as it finishes as
+        (game number, opening FEN, whether the first setting was Red, game state, half moves, score, SPRT outcome).
+        The remaining games are cancelled once the SPRT reaches an outcome.
+        """
+        arguments = [(game_number, fen, first_is_red, self._first_setting, self._second_setting, self._max_plies,
+                      self._tablebase_directory) for game_number, fen, first_is_red in self.get_game_list()]
+        elo0, elo1, alpha, beta = self._sprt_settings
+        with multiprocessing.Pool(self._processes) as pool:
+            for game_number, fen, first_is_red, game_state, plies in pool.imap_unordered(_play_match_game,
+                                                                                         arguments):
+                score = self.record_result(first_is_red, game_state)
+                self._sprt_result = check_sprt(self._wins, self._draws, self._losses, elo0, elo1, alpha, beta)
+                yield game_number, fen, first_is_red, game_state, plies, score, self._sprt_result
+                if self._sprt_result:
+                    pool.terminate()
+                    return
+
+    def run(self):
+        """
+        A method to play the whole match.
+        :returns (wins, draws, losses, SPRT outcome) from the first setting's side
+        """
+        for _ in self.play():
+            pass
+        return self._wins, self._draws, self._losses, self._sprt_result
+
+
+def main():
+    # play a short match between a one and a two half move search when run as a script
+    match = XiangqiMatch({"depth": 2}, {"depth": 1}, game_count=12, max_plies=60)
+    for game_number, fen, first_is_red, game_state, plies, score, sprt_result in match.play():
+        print("game %d: %s in %d half moves, score %.1f, LLR %.2f" % (game_number, game_state, plies, score,
+                                                                      match.get_llr()))
+    print("+%d =%d -%d %s" % (match.get_wins(), match.get_draws(), match.get_losses(),
+                              match.get_sprt_result() or "no SPRT result"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A mate in N solver for Xiangqi puzzles using depth-first proof-number search (df-pn).
+# The side to move is the attacker. A side with no legal move has lost, so mate and stalemate both count.
+# Every position is stored in a proof table under its position key and the half moves left, with its
+# proof and disproof numbers and its legal moves. The table is bounded and drops the least recently used entries.
+# The numbers are kept from the side to move's view: phi is the cost to prove a win, delta the cost to disprove it.
+# The search stops when the root is proven or disproven, or when the node budget runs out.
+#
+# A puzzle file has one puzzle per line, a FEN string followed by the number of moves to mate in, for example
+#   3k5/9/R8/9/9/9/9/9/8R/4K4 w 1
+# Blank lines and lines starting with # are skipped.
+#
+# Run as a script:
+#   python XiangqiMate.py puzzles.txt
+
+import multiprocessing
+import sys
+from collections import OrderedDict
+
+from XiangqiGame import XiangqiGame, get_piece_name_by_code
+
+INFINITE_NUMBER = 1 << 30
+
+# solver results
+PROVEN = "PROVEN"
+DISPROVEN = "DISPROVEN"
+UNKNOWN = "UNKNOWN"
+
+DEFAULT_NODE_LIMIT = 100000
+DEFAULT_TABLE_SIZE = 1 << 18
+
+
+class NodeLimitReached(Exception):
+    """Raised inside the search when the node budget runs out"""
+
+
+class XiangqiMateSolver:
+    """Represents a df-pn mate solver for a game's current position"""
+
+    def __init__(self, game, node_limit=DEFAULT_NODE_LIMIT, table_size=DEFAULT_TABLE_SIZE):
+        """Initializes a solver that searches at most node_limit positions and stores at most table_size"""
+        self._game = game
+        self._node_limit = node_limit
+        self._table_size = table_size
+        self._table = OrderedDict()
+        self._node_count = 0
+
+    def get_node_count(self):
+        """A method to return the number of positions expanded"""
+        return self._node_count
+
+    def get_table_size(self):
+        """A method to return the number of positions in the proof table"""
+        return len(self._table)
+
+    def get_legal_moves(self):
+        """
+        A method to list the side to move's moves that don't leave its general open,
+        with the position key each one leads to
+        :returns a list of (XiangqiMove, position key)
+        """
+        game = self._game
+        color = game.get_turn_order_color()
+        other_color = "Black" if color == "Red" else "Red"
+        legal_moves = []
+        for move in game.get_available_moves(color):
+            if get_piece_name_by_code(move.get_captured_piece_code()) == " G ":
+                continue
+            game.apply_move(move)
+            if not game.can_capture_general(other_color):
+                legal_moves.append((move, game.get_position_key()))
+            game.undo_move()
+        return legal_moves
+
+    def get_entry(self, position_key, remaining):
+        """A method to look up a position in the proof table, as [phi, delta, legal moves] or None"""
+        entry = self._table.get((position_key, remaining))
+        if entry is not None:
+            self._table.move_to_end((position_key, remaining))
+        return entry
+
+    def put_entry(self, position_key, remaining, entry):
+        """A method to store a position in the proof table, dropping the least recently used if it is full"""
+        self._table[(position_key, remaining)] = entry
+        self._table.move_to_end((position_key, remaining))
+        while len(self._table) > self._table_size:
+            self._table.popitem(last=False)
+
+    def get_numbers(self, position_key, remaining, attacker_to_move):
+        """A method to return a position's (phi, delta), estimating 1 and 1 for positions not searched yet"""
+        entry = self.get_entry(position_key, remaining)
+        if entry is not None:
+            return entry[0], entry[1]
+        if attacker_to_move and remaining <= 0:
+            return INFINITE_NUMBER, 0
+        return 1, 1
+
+    def expand(self, remaining, attacker_to_move):
+        """A method to find the current position's entry, creating it with its legal moves if needed"""
+        position_key = self._game.get_position_key()
+        entry = self.get_entry(position_key, remaining)
+        if entry is None:
+            self._node_count += 1
+            if self._node_count > self._node_limit:
+                raise NodeLimitReached()
+            legal_moves = self.get_legal_moves() if remaining > 0 or not attacker_to_move else []
+            if not legal_moves and (remaining > 0 or not attacker_to_move):
+                entry = [INFINITE_NUMBER, 0, legal_moves]  # no moves, the side to move has lost
+            elif remaining <= 0:
+                # out of half moves: the attacker has failed, the defender has held
+                entry = [INFINITE_NUMBER, 0, legal_moves] if attacker_to_move else [0, INFINITE_NUMBER, legal_moves]
+            else:
+                entry = [1, 1, legal_moves]
+            self.put_entry(position_key, remaining, entry)
+        return position_key, entry
+
+    def search_node(self, phi_threshold, delta_threshold, remaining, attacker_to_move):
+        """A method for the df-pn search of the current position, until a number reaches its threshold"""
+        position_key, entry = self.expand(remaining, attacker_to_move)
+        legal_moves = entry[2]
+        while True:
+            if entry[0] == 0 or entry[1] == 0:
+                return
+
+            # the children's numbers are from the other side's view
+            children = [self.get_numbers(child_key, remaining - 1, not attacker_to_move)
+                        for move, child_key in legal_moves]
+            phi = min(child[1] for child in children)
+            delta = min(sum(child[0] for child in children), INFINITE_NUMBER)
+            entry[0] = phi
+            entry[1] = delta
+            self.put_entry(position_key, remaining, entry)
+            if phi >= phi_threshold or delta >= delta_threshold:
+                return
+
+            # search the most promising child until it stops being the best or its numbers change enough
+            best_index = min(range(len(children)), key=lambda index: children[index][1])
+            second_delta = min([child[1] for index, child in enumerate(children) if index != best_index],
+                               default=INFINITE_NUMBER)
+            child_phi, child_delta = children[best_index]
+            child_phi_threshold = min(delta_threshold - (delta - child_phi), INFINITE_NUMBER)
+            child_delta_threshold = min(phi_threshold, second_delta + 1)
+
+            self._game.apply_move(legal_moves[best_index][0])
+            try:
+                self.search_node(child_phi_threshold, child_delta_threshold, remaining - 1, not attacker_to_move)
+            finally:
+                self._game.undo_move()
+
+    def solve(self, mate_length):
+        """
+        A method to find a forced mate in mate_length moves of the side to move.
+        :returns (PROVEN and the mating line as a list of XiangqiMove), (DISPROVEN, []) if there is none,
+            or (UNKNOWN, []) if the node budget ran out first
+        """
+        self._node_count = 0
+        remaining = 2 * mate_length - 1
+        try:
+            self.search_node(INFINITE_NUMBER, INFINITE_NUMBER, remaining, True)
+            phi, delta = self.get_numbers(self._game.get_position_key(), remaining, True)
+            if phi != 0:
+                return DISPROVEN, []
+            return PROVEN, self.get_line(remaining)
+        except NodeLimitReached:
+            return UNKNOWN, []
+
+    def get_line(self, remaining):
+        """A method to follow a proven position's moves through the proof table, searching again if needed"""
+        line = []
+        attacker_to_move = True
+        while True:
+            # a proven position dropped from the table is searched again
+            self.search_node(INFINITE_NUMBER, INFINITE_NUMBER, remaining, attacker_to_move)
+            entry = self.get_entry(self._game.get_position_key(), remaining)
+            proven_moves = [(move, child_key) for move, child_key in entry[2]
+                            if self.get_numbers(child_key, remaining - 1, not attacker_to_move)[attacker_to_move]
+                            == 0 or not attacker_to_move]
+            if not proven_moves:
+                break
+            move = proven_moves[0][0]
+            self._game.apply_move(move)
+            line.append(move)
+            remaining -= 1
+            attacker_to_move = not attacker_to_move
+        for _ in line:
+            self._game.undo_move()
+        return line
+
+
+def read_puzzles(path):
+    """
+    A function to read a puzzle file a line at a time.
+    :yields (line number, FEN string, mate length) for each puzzle
+    """
+    with open(path) as puzzle_file:
+        for line_number, line in enumerate(puzzle_file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split()
+            yield line_number, " ".join(fields[:-1]), int(fields[-1])
+
+
+def solve_puzzle(fen, mate_length, node_limit=DEFAULT_NODE_LIMIT, table_size=DEFAULT_TABLE_SIZE):
+    """
+    A function to solve a puzzle from a FEN string.
+    :returns (result, mating line as a list of XiangqiMove), or False if the FEN string could not be read
+    """
+    game = XiangqiGame()
+    if not game.load_fen(fen):
+        return False
+    return XiangqiMateSolver(game, node_limit, table_size).solve(mate_length)
+
+
+def _verify_puzzle(arguments):
+    """A function run in each process of the batch mode, solving one puzzle"""
+    line_number, fen, mate_length, node_limit, table_size = arguments
+    return line_number, fen, mate_length, solve_puzzle(fen, mate_length, node_limit, table_size)
+
+
+def verify_puzzles(path, processes=None, node_limit=DEFAULT_NODE_LIMIT, table_size=DEFAULT_TABLE_SIZE):
+    """
+    A function to solve every puzzle in a file in a pool of processes.
+    :yields (line number, FEN string, mate length, solve result) in file order
+    """
+    arguments = ((line_number, fen, mate_length, node_limit, table_size)
+                 for line_number, fen, mate_length in read_puzzles(path))
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(_verify_puzzle, arguments)
+
+
+def main(argv=None):
+    # verify a puzzle file and print each result
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python XiangqiMate.py puzzles.txt")
+        return 2
+    failures = 0
+    for line_number, fen, mate_length, result in verify_puzzles(argv[0]):
+        if not result or result[0] != PROVEN:
+            failures += 1
+            print("%d: %s mate in %d: %s" % (line_number, fen, mate_length, result[0] if result else "bad FEN"))
+        else:
+            print("%d: %s" % (line_number, " ".join(move.get_start() + "-" + move.get_end() for move in result[1])))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
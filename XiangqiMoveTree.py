@@ -0,0 +1,185 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A move tree explorer for Xiangqi positions.
+# The tree is expanded lazily from a starting position. Every position is stored once, by its position key,
+# so positions reached by different move orders are only expanded once, and the cache is bounded.
+# The explorer walks the tree breadth first and yields each half move as soon as it is done,
+# with counts of the replies, checks, captures and mates found at that depth.
+
+from collections import OrderedDict
+
+from XiangqiGame import XiangqiGame, get_piece_name_by_code
+
+
+class XiangqiTreeNode:
+    """Represents a position in the move tree"""
+
+    def __init__(self, position_key, fen, game_state, in_check):
+        """Initializes an unexpanded node for a position"""
+        self._position_key = position_key
+        self._fen = fen
+        self._game_state = game_state
+        self._in_check = in_check
+        self._children = None
+        self._has_legal_moves = None
+
+    def get_position_key(self):
+        """A method to return the node's position key"""
+        return self._position_key
+
+    def get_fen(self):
+        """A method to return the node's position as a FEN string"""
+        return self._fen
+
+    def get_game_state(self):
+        """A method to return the game state in the node's position"""
+        return self._game_state
+
+    def is_in_check(self):
+        """A method to determine if the side to move is in check"""
+        return self._in_check
+
+    def is_expanded(self):
+        """A method to determine if the node's replies have been generated"""
+        return self._children is not None
+
+    def get_children(self):
+        """A method to return the node's replies as (XiangqiMove, child position key), or None if not expanded"""
+        return self._children
+
+    def set_children(self, children):
+        """A method to store the node's replies"""
+        self._children = children
+        self._has_legal_moves = bool(children)
+
+    def get_has_legal_moves(self):
+        """A method to return whether the side to move has a legal move, or None if not known yet"""
+        return self._has_legal_moves
+
+    def set_has_legal_moves(self, has_legal_moves):
+        """A method to store whether the side to move has a legal move"""
+        self._has_legal_moves = has_legal_moves
+
+    def is_mate(self):
+        """
+        A method to determine if the side to move has lost, known once its moves have been looked at.
+        Only a side without a legal move has lost, the game state doesn't see blocks or captures of the checking piece.
+        """
+        return self._has_legal_moves is False
+
+
+class XiangqiMoveTree:
+    """Represents a lazily expanded tree of the moves from a position"""
+
+    def __init__(self, game, max_nodes=100000):
+        """Initializes the tree at the game's current position, keeping at most max_nodes positions cached"""
+        self._game = XiangqiGame()
+        self._max_nodes = max_nodes
+        self._nodes = OrderedDict()
+        self._root = self.add_node(game.get_position_key(), game.get_fen(), game.get_game_state(),
+                                   game.is_in_check(game.get_turn_order_color()))
+
+    def get_root(self):
+        """A method to return the root node"""
+        return self._root
+
+    def get_node_count(self):
+        """A method to return the number of positions cached"""
+        return len(self._nodes)
+
+    def get_node(self, position_key):
+        """A method to return a cached node by position key, or None"""
+        node = self._nodes.get(position_key)
+        if node is not None:
+            self._nodes.move_to_end(position_key)
+        return node
+
+    def add_node(self, position_key, fen, game_state, in_check):
+        """A method to cache a new node, dropping the least recently used positions when the cache is full"""
+        node = XiangqiTreeNode(position_key, fen, game_state, in_check)
+        self._nodes[position_key] = node
+        while len(self._nodes) > self._max_nodes:
+            self._nodes.popitem(last=False)
+        return node
+
+    def get_legal_moves(self, node, first_only=False):
+        """
+        A method to list the moves from a node's position that don't leave the moving general open,
+        with the position each one leads to. Nodes are created for positions not seen before.
+        :returns a list of (XiangqiMove, child position key)
+        """
+        game = self._game
+        game.load_fen(node.get_fen())
+        color = game.get_turn_order_color()
+        other_color = "Black" if color == "Red" else "Red"
+
+        legal_moves = []
+        for move in game.get_available_moves(color):
+            if get_piece_name_by_code(move.get_captured_piece_code()) == " G ":
+                continue
+            game.apply_move(move)
+            if not game.can_capture_general(other_color):
+                position_key = game.get_position_key()
+                if first_only:
+                    game.undo_move()
+                    return [(move, position_key)]
+                if self.get_node(position_key) is None:
+                    self.add_node(position_key, game.get_fen(), game.get_game_state(), game.is_in_check(other_color))
+                legal_moves.append((move, position_key))
+            game.undo_move()
+        return legal_moves
+
+    def expand(self, node):
+        """A method to generate a node's replies if they haven't been already, returning them"""
+        if not node.is_expanded():
+            node.set_children(self.get_legal_moves(node))
+        return node.get_children()
+
+    def is_mate(self, node):
+        """A method to determine if the side to move in a node has lost, looking for one legal move if needed"""
+        if node.get_has_legal_moves() is None:
+            node.set_has_legal_moves(bool(self.get_legal_moves(node, first_only=True)))
+        return node.is_mate()
+
+    def get_child(self, node, move, position_key):
+        """A method to return the node a move leads to, making the move again if the cache dropped it"""
+        child = self.get_node(position_key)
+        if child is None:
+            game = self._game
+            game.load_fen(node.get_fen())
+            game.apply_move(move)
+            child = self.add_node(position_key, game.get_fen(), game.get_game_state(),
+                                  game.is_in_check(game.get_turn_order_color()))
+        return child
+
+    def explore(self, depth):
+        """
+        A method to walk the tree breadth first to depth half moves.
+        Each half move is yielded as soon as it is expanded, as (ply, edges, statistics), where edges is a list
+        of (parent position key, XiangqiMove, child position key) and statistics counts the replies,
+        checks, captures and mates at that depth.
+        """
+        level = [self._root]
+        for ply in range(1, depth + 1):
+            edges = []
+            statistics = {"replies": 0, "checks": 0, "captures": 0, "mates": 0}
+            next_level = OrderedDict()
+            for node in level:
+                for move, child_key in self.expand(node):
+                    child = self.get_child(node, move, child_key)
+                    edges.append((node.get_position_key(), move, child_key))
+                    statistics["replies"] += 1
+                    if move.is_capture():
+                        statistics["captures"] += 1
+                    if child.is_in_check():
+                        statistics["checks"] += 1
+                    if self.is_mate(child):
+                        statistics["mates"] += 1
+                    else:
+                        next_level[child_key] = child
+            yield ply, edges, statistics
+            level = list(next_level.values())
+
+    def get_statistics(self, depth):
+        """A method to return the statistics of each half move down to depth as a list"""
+        return [statistics for ply, edges, statistics in self.explore(depth)]
@@ -0,0 +1,184 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: Readers for Xiangqi moves written in ICCS and WXF notation, and a streaming game archive reader.
+#
+# ICCS moves give the start and end squares with files a-i and ranks 0-9 counted from Red's side,
+# so "h2e2" (or "H2-E2") is "h3" to "e3" in make_move's notation.
+# WXF moves give the piece, its file, a direction and a file or a number of steps, like "C2=5" or "H8+7".
+# Files are counted 1-9 from each player's right, "+" is forward, "-" is backward and "=" or "." is sideways.
+# When two of the same piece share a file, "+" (front) or "-" (rear) replaces the file, like "C+=5" or "+C=5".
+#
+# An archive is a text file of games. A game is optional tag lines like [Event "..."] followed by moves,
+# either notation, with move numbers like "1." skipped. A result (1-0, 0-1, 1/2-1/2 or *) or a blank line
+# after the moves ends a game. A [FEN "..."] tag sets the starting position.
+# Games are read a line at a time and yielded one at a time, so memory doesn't grow with the archive.
+
+import re
+
+from XiangqiGame import XiangqiGame, Advisor, Elephant, Horse, FEN_PIECE_TYPES, convert_coordinates_to_location
+
+ICCS_PATTERN = re.compile(r"^[a-i][0-9]-?[a-i][0-9]$")
+WXF_PATTERN = re.compile(r"^(?:([kabenhrcp])([1-9+\-])|([+\-])([kabenhrcp]))([+\-=.])([1-9])$")
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]$')
+MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.+$")
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+# rows moved by the pieces that move diagonally, the horse's depends on how many files it crosses
+DIAGONAL_ROWS = {Advisor: 1, Elephant: 2}
+
+
+def convert_iccs_to_locations(iccs_move):
+    """
+    A function to convert an ICCS move like "h2e2" to start and end locations like ("h3", "e3").
+    :returns a (start, end) pair, or False if the move can't be read
+    """
+    iccs_move = iccs_move.lower()
+    if not ICCS_PATTERN.match(iccs_move):
+        return False
+    iccs_move = iccs_move.replace("-", "")
+    return iccs_move[0] + str(int(iccs_move[1]) + 1), iccs_move[2] + str(int(iccs_move[3]) + 1)
+
+
+def convert_move_to_iccs(move):
+    """A function to convert a XiangqiMove to an ICCS move like "h2e2" """
+    start, end = move.get_locations()
+    return start[0] + str(int(start[1:]) - 1) + end[0] + str(int(end[1:]) - 1)
+
+
+def convert_wxf_file_to_col(wxf_file, color):
+    """A function to convert a WXF file number, counted from the player's right, to a column index"""
+    if color == "Red":
+        return 9 - wxf_file
+    return wxf_file - 1
+
+
+def convert_wxf_to_locations(game, wxf_move):
+    """
+    A function to convert a WXF move like "C2=5" to start and end locations for the side to move in a game,
+    using the position to find which piece is meant.
+    :returns a (start, end) pair, or False if the move can't be read or no single piece fits it
+    """
+    found = WXF_PATTERN.match(wxf_move.lower())
+    if not found:
+        return False
+    letter = found.group(1) or found.group(4)
+    file_or_tandem = found.group(2) or found.group(3)
+    direction = found.group(5)
+    number = int(found.group(6))
+
+    color = game.get_turn_order_color()
+    piece_type = FEN_PIECE_TYPES[letter]
+    forward = -1 if color == "Red" else 1
+    board = game.get_game_board()
+
+    # the pieces of that kind, grouped by column
+    pieces_by_col = {}
+    for row in range(10):
+        for col in range(9):
+            current_piece = board.get_game_piece_by_location(row, col)
+            if current_piece and type(current_piece) == piece_type and \
+                    current_piece.get_game_piece_color() == color:
+                pieces_by_col.setdefault(col, []).append((row, col))
+
+    if file_or_tandem in "+-":
+        # front and rear pieces of the only file holding more than one
+        tandem_cols = [col for col, locations in pieces_by_col.items() if len(locations) > 1]
+        if len(tandem_cols) != 1:
+            return False
+        locations = sorted(pieces_by_col[tandem_cols[0]], key=lambda location: location[0] * forward)
+        candidates = [locations[-1] if file_or_tandem == "+" else locations[0]]
+    else:
+        candidates = pieces_by_col.get(convert_wxf_file_to_col(int(file_or_tandem), color), [])
+
+    moves = []
+    for row, col in candidates:
+        if piece_type in DIAGONAL_ROWS or piece_type == Horse:
+            if direction in "=.":
+                return False
+            col_end = convert_wxf_file_to_col(number, color)
+            if piece_type == Horse:
+                row_change = {1: 2, 2: 1}.get(abs(col_end - col), 0)
+            else:
+                row_change = DIAGONAL_ROWS[piece_type]
+            row_end = row + row_change * forward * (1 if direction == "+" else -1)
+        elif direction in "=.":
+            row_end, col_end = row, convert_wxf_file_to_col(number, color)
+        else:
+            row_end, col_end = row + number * forward * (1 if direction == "+" else -1), col
+
+        if not 0 <= row_end < 10 or not 0 <= col_end < 9 or (row_end, col_end) == (row, col):
+            continue
+        end = convert_coordinates_to_location(row_end, col_end)
+        if end in board.get_game_piece_by_location(row, col).get_legal_moves():
+            moves.append((convert_coordinates_to_location(row, col), end))
+
+    # two advisors or elephants on a file are told apart by which one can make the move
+    if len(moves) != 1:
+        return False
+    return moves[0]
+
+
+def convert_notation_to_locations(game, move_text):
+    """A function to convert a move in ICCS or WXF notation for the game's side to move to (start, end)"""
+    return convert_iccs_to_locations(move_text) or convert_wxf_to_locations(game, move_text)
+
+
+class XiangqiNotationReader:
+    """Represents a reader that streams the games of an archive file"""
+
+    def __init__(self, path):
+        """Initializes a reader for an archive file"""
+        self._path = path
+        self._skipped_count = 0
+
+    def get_skipped_count(self):
+        """A method to return the number of games left out because a move could not be read or made"""
+        return self._skipped_count
+
+    def read_games(self):
+        """
+        A generator to read the archive a line at a time, translating each move against the game position.
+        Games with a move that can't be read or made are skipped and counted.
+        :yields (tags, moves) for each game, tags a dictionary and moves a list of (start, end) pairs
+        """
+        tags = {}
+        moves = []
+        game = XiangqiGame()
+        valid = True
+        in_moves = False
+        with open(self._path) as archive_file:
+            for line in archive_file:
+                line = line.strip()
+                found = TAG_PATTERN.match(line)
+                if in_moves and (not line or found):
+                    # a blank line or new tags after the moves end the game
+                    yield from self.finish_game(tags, moves, valid)
+                    tags, moves, game, valid, in_moves = {}, [], XiangqiGame(), True, False
+                if found:
+                    tags[found.group(1)] = found.group(2)
+                    if found.group(1) == "FEN" and not game.load_fen(found.group(2)):
+                        valid = False
+                    continue
+
+                for token in line.split():
+                    if token in RESULTS:
+                        tags.setdefault("Result", token)
+                        yield from self.finish_game(tags, moves, valid)
+                        tags, moves, game, valid, in_moves = {}, [], XiangqiGame(), True, False
+                    elif not MOVE_NUMBER_PATTERN.match(token):
+                        in_moves = True
+                        if valid:
+                            locations = convert_notation_to_locations(game, token)
+                            if locations and game.make_move(*locations):
+                                moves.append(locations)
+                            else:
+                                valid = False
+        if in_moves or tags:
+            yield from self.finish_game(tags, moves, valid)
+
+    def finish_game(self, tags, moves, valid):
+        """A generator to yield a finished game once, or count it if it was skipped"""
+        if not valid:
+            self._skipped_count += 1
+        else:
+            yield tags, moves
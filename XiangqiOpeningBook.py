@@ -0,0 +1,161 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: An opening book for Xiangqi games.
+# The builder replays game records and writes a sorted table of (position key, move, weight) entries.
+# The reader maps the table into memory with mmap and binary searches it, so it is never loaded whole.
+#
+# File layout: an 8 byte header followed by fixed size big-endian records of
+# position key (8 bytes), start location index (1 byte), end location index (1 byte), weight (4 bytes).
+# Location indexes are row * 9 + col. Records are sorted by position key, then by weight, highest first.
+
+import mmap
+import random
+import struct
+
+from XiangqiGame import XiangqiGame, convert_coordinates_to_location
+
+BOOK_HEADER = b"XQBOOK01"
+RECORD_FORMAT = struct.Struct(">QBBI")
+KEY_FORMAT = struct.Struct(">Q")
+
+# weights given to a move by the result of the game, from the moving side's point of view
+WIN_WEIGHT = 2
+DRAW_WEIGHT = 1
+LOSS_WEIGHT = 0
+
+
+def convert_index_to_string(index):
+    """A function to convert a location index back to an alpha numeric location like "e1" """
+    row, col = divmod(index, 9)
+    return convert_coordinates_to_location(row, col)
+
+
+class XiangqiOpeningBookBuilder:
+    """Represents a builder that collects opening moves from game records and writes the book file"""
+
+    def __init__(self, max_ply=20):
+        """Initializes an empty builder that keeps moves up to max_ply half moves into each game"""
+        self._max_ply = max_ply
+        self._weights = {}
+
+    def get_entry_count(self):
+        """A method to return the number of distinct (position key, move) entries collected"""
+        return len(self._weights)
+
+    def add_game(self, moves, result=None):
+        """
+        A method to replay a game from a list of (start, end) move pairs and add its opening moves.
+        The result is taken from the replayed game unless a game state string is passed in.
+        :returns the number of moves added, or False if a move in the record is not legal
+        """
+        game = XiangqiGame()
+        entries = []
+
+        for start, end in moves[:self._max_ply]:
+            position_key = game.get_position_key()
+            color = game.get_turn_order_color()
+            converted_list = game.convert_string_to_coordinates(start, end)
+            if not converted_list or not game.make_move(start, end):
+                return False
+            row_start, row_end, col_start, col_end = converted_list
+            entries.append((position_key, row_start * 9 + col_start, row_end * 9 + col_end, color))
+
+        if result is None:
+            result = game.get_game_state()
+
+        for position_key, start_index, end_index, color in entries:
+            if result == color.upper() + "_WON":
+                weight = WIN_WEIGHT
+            elif result == "UNFINISHED":
+                weight = DRAW_WEIGHT
+            else:
+                weight = LOSS_WEIGHT
+            entry = (position_key, start_index, end_index)
+            self._weights[entry] = self._weights.get(entry, 0) + weight
+        return len(entries)
+
+    def write(self, path):
+        """
+        A method to write the collected entries to a book file, leaving out moves with no weight.
+        :returns the number of records written
+        """
+        records = sorted(((key, -weight, start, end) for (key, start, end), weight in self._weights.items()
+                          if weight > 0))
+        with open(path, "wb") as book_file:
+            book_file.write(BOOK_HEADER)
+            for key, negative_weight, start, end in records:
+                book_file.write(RECORD_FORMAT.pack(key, start, end, -negative_weight))
+        return len(records)
+
+
+class XiangqiOpeningBook:
+    """Represents a read only opening book file, mapped into memory"""
+
+    def __init__(self, path):
+        """Opens a book file written by XiangqiOpeningBookBuilder"""
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(BOOK_HEADER)] != BOOK_HEADER:
+            self.close()
+            raise ValueError("not an opening book file: " + path)
+        self._record_count = (len(self._map) - len(BOOK_HEADER)) // RECORD_FORMAT.size
+
+    def get_record_count(self):
+        """A method to return the number of records in the book"""
+        return self._record_count
+
+    def get_key_at(self, index):
+        """A method to return the position key of a record"""
+        return KEY_FORMAT.unpack_from(self._map, len(BOOK_HEADER) + index * RECORD_FORMAT.size)[0]
+
+    def get_moves_by_key(self, position_key):
+        """
+        A method to binary search the book for a position key.
+        :returns a list of (start, end, weight) for the position, highest weight first
+        """
+        # find the first record with the key
+        low = 0
+        high = self._record_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_key_at(middle) < position_key:
+                low = middle + 1
+            else:
+                high = middle
+
+        # read records until the key changes
+        moves = []
+        offset = len(BOOK_HEADER) + low * RECORD_FORMAT.size
+        while offset < len(self._map):
+            key, start, end, weight = RECORD_FORMAT.unpack_from(self._map, offset)
+            if key != position_key:
+                break
+            moves.append((convert_index_to_string(start), convert_index_to_string(end), weight))
+            offset += RECORD_FORMAT.size
+        return moves
+
+    def get_moves(self, game):
+        """A method to return the book moves for a game's current position as (start, end, weight)"""
+        return self.get_moves_by_key(game.get_position_key())
+
+    def choose_move(self, game, generator=random):
+        """
+        A method to pick a book move for a game's current position, at random in proportion to the weights.
+        :returns a (start, end) pair, or False if the position is not in the book
+        """
+        moves = self.get_moves(game)
+        if not moves:
+            return False
+        start, end, weight = generator.choices(moves, weights=[move[2] for move in moves])[0]
+        return start, end
+
+    def close(self):
+        """A method to unmap and close the book file"""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
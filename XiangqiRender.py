@@ -0,0 +1,156 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: Text and Unicode rendering of the Xiangqi board for terminals and spectators.
+# A renderer keeps each location as a FEN letter, upper case for Red and lower case for Black, "." when empty,
+# and caches the string of each rank. After a move only the ranks holding the changed locations are drawn again.
+#
+# A delta lists the locations that changed as (location, letter) pairs, and is written as compact text like
+# "h3. e3C" so one small message per move can be sent to every spectator. A spectator keeps its own renderer
+# without a game and applies the deltas it receives.
+#
+#   renderer = XiangqiRenderer(game, use_unicode=True, use_color=True)
+#   game.make_move("h3", "e3")
+#   message = format_delta(renderer.get_move_delta(game.get_move_history()[-1]))
+#   spectator.apply_delta(parse_delta(message))
+#   print(spectator.get_frame())
+
+import re
+
+from XiangqiGame import FEN_LETTERS, LOCATION_NAMES, LOCATION_COORDINATES
+
+EMPTY_LETTER = "."
+DELTA_PATTERN = re.compile(r"^([a-i](?:10|[1-9]))([kabnrcpKABNRCP.])$")
+
+# Unicode glyphs by FEN letter, Red upper case and Black lower case, full width so the files line up
+UNICODE_GLYPHS = {"K": "帥", "A": "仕", "B": "相", "N": "傌", "R": "俥", "C": "炮", "P": "兵",
+                  "k": "將", "a": "士", "b": "象", "n": "馬", "r": "車", "c": "砲", "p": "卒",
+                  EMPTY_LETTER: "．"}
+
+# ANSI terminal colors, Black pieces are drawn bold so they show on light and dark backgrounds
+RED_COLOR = "\033[31m"
+BLACK_COLOR = "\033[1m"
+RESET_COLOR = "\033[0m"
+
+
+def get_location_letter(game_piece):
+    """A function to return a game piece's FEN letter, or "." for an empty location"""
+    if game_piece == "...":
+        return EMPTY_LETTER
+    if game_piece.get_game_piece_color() == "Red":
+        return FEN_LETTERS[type(game_piece)].upper()
+    return FEN_LETTERS[type(game_piece)]
+
+
+def format_delta(delta):
+    """A function to write a delta as text, for example [("h3", "."), ("e3", "C")] as "h3. e3C" """
+    return " ".join(location + letter for location, letter in delta)
+
+
+def parse_delta(text):
+    """
+    A function to read a delta written by format_delta.
+    :returns a list of (location, letter), or False if the text can't be read
+    """
+    delta = []
+    for word in text.split():
+        found = DELTA_PATTERN.match(word)
+        if not found:
+            return False
+        delta.append((found.group(1), found.group(2)))
+    return delta
+
+
+class XiangqiRenderer:
+    """Represents a board drawing that is kept up to date a few locations at a time"""
+
+    def __init__(self, game=None, use_unicode=False, use_color=False):
+        """
+        Initializes a renderer for a game, or an empty board for a spectator that only applies deltas.
+        Pieces are drawn as FEN letters, or as Chinese characters with use_unicode, in ANSI colors with use_color.
+        """
+        self._game = game
+        self._use_unicode = use_unicode
+        self._use_color = use_color
+        self._letters = [[EMPTY_LETTER] * 9 for _ in range(10)]
+        self._row_strings = [None] * 10
+        self._file_string = self.render_files()
+        if game is not None:
+            self.get_delta()
+
+    def get_game(self):
+        """A method to return the game being drawn, or None for a spectator"""
+        return self._game
+
+    def get_letters(self):
+        """A method to return the FEN letter of each location by row and column"""
+        return self._letters
+
+    def get_delta(self):
+        """
+        A method to compare every location with the game, for positions set up without a move like load_fen.
+        :returns the changed locations as a list of (location, letter)
+        """
+        squares = self._game.get_game_board().get_board()
+        delta = []
+        for row in range(10):
+            for col in range(9):
+                letter = get_location_letter(squares[row][col])
+                if letter != self._letters[row][col]:
+                    delta.append((LOCATION_NAMES[row][col], letter))
+        self.apply_delta(delta)
+        return delta
+
+    def get_position_delta(self):
+        """
+        A method to list every occupied location as it was last drawn, for a spectator joining with an empty board.
+        :returns a list of (location, letter)
+        """
+        return [(LOCATION_NAMES[row][col], letter) for row in range(10) for col, letter in enumerate(self._letters[row])
+                if letter != EMPTY_LETTER]
+
+    def get_move_delta(self, move):
+        """
+        A method to read only a move's start and end locations from the game, after the move was made or taken back.
+        :returns the changed locations as a list of (location, letter)
+        """
+        squares = self._game.get_game_board().get_board()
+        delta = []
+        for row, col in ((move.get_start_row(), move.get_start_col()), (move.get_end_row(), move.get_end_col())):
+            letter = get_location_letter(squares[row][col])
+            if letter != self._letters[row][col]:
+                delta.append((LOCATION_NAMES[row][col], letter))
+        self.apply_delta(delta)
+        return delta
+
+    def apply_delta(self, delta):
+        """A method to change locations from a list of (location, letter), marking their ranks to be drawn again"""
+        for location, letter in delta:
+            row, col = LOCATION_COORDINATES[location]
+            self._letters[row][col] = letter
+            self._row_strings[row] = None
+
+    def render_letter(self, letter):
+        """A method to draw one location"""
+        text = UNICODE_GLYPHS[letter] if self._use_unicode else letter
+        if not self._use_color or letter == EMPTY_LETTER:
+            return text
+        return (RED_COLOR if letter.isupper() else BLACK_COLOR) + text + RESET_COLOR
+
+    def render_row(self, row):
+        """A method to draw a rank with its number, 10 at the top down to 1"""
+        separator = "" if self._use_unicode else " "
+        return "%2d " % (10 - row) + separator.join(self.render_letter(letter) for letter in self._letters[row])
+
+    def render_files(self):
+        """A method to draw the file letters under the board, two columns to a file like the locations"""
+        return "   " + " ".join("abcdefghi")
+
+    def get_row_string(self, row):
+        """A method to return a rank's cached string, drawing it first if it changed"""
+        if self._row_strings[row] is None:
+            self._row_strings[row] = self.render_row(row)
+        return self._row_strings[row]
+
+    def get_frame(self):
+        """A method to return the whole board as text, Black's side at the top"""
+        return "\n".join([self.get_row_string(row) for row in range(10)] + [self._file_string])
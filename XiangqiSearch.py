@@ -0,0 +1,527 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A move search for Xiangqi games.
+# The search is an iterative deepening alpha-beta search over XiangqiGame, making and taking back moves
+# with make_move and undo_move and scoring positions with XiangqiEvaluation.
+# A side that can take the other general has won, so moves that leave a general open are refuted
+# one half move later without a separate legality check.
+# With a XiangqiTablebase, positions a table covers are scored from the table instead of searched.
+#
+# The parallel search runs the same root position in several processes (lazy SMP). The processes share one
+# transposition table in multiprocessing.shared_memory, so the work one process does is found by the others.
+# Helper processes search staggered depths and try the root moves in a different order.
+
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+import XiangqiEvaluation
+from XiangqiGame import XiangqiGame, XiangqiMove, General, PIECE_CODES
+
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - 1000
+INFINITE_SCORE = MATE_SCORE + 1
+
+# transposition table entry types
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# how many nodes are searched between checks of the clock and the stop flag
+CHECK_INTERVAL = 4
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when the time runs out or the search is stopped"""
+
+
+def score_to_table(score, ply):
+    """A function to store mate scores as distances from the position instead of from the root"""
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """A function to turn a stored mate score back into a distance from the root"""
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+class TranspositionTable:
+    """Represents a transposition table kept in a dictionary, for a search in a single process"""
+
+    def __init__(self):
+        """Initializes an empty table"""
+        self._entries = {}
+
+    def get(self, position_key):
+        """
+        A method to look up a position.
+        :returns (depth, entry type, score, move) or None if the position is not stored
+        """
+        return self._entries.get(position_key)
+
+    def put(self, position_key, depth, entry_type, score, move):
+        """A method to store a search result for a position, keeping the deeper result"""
+        entry = self._entries.get(position_key)
+        if entry is None or entry[0] <= depth:
+            self._entries[position_key] = (depth, entry_type, score, move)
+
+    def clear(self):
+        """A method to empty the table"""
+        self._entries.clear()
+
+
+class SharedTranspositionTable:
+    """
+    Represents a fixed size transposition table in shared memory that several processes can use at once.
+    Entries are written without locks. Each slot holds the packed entry and the position key xor the packed entry,
+    so an entry torn by two processes writing at once doesn't match its key and is ignored.
+    """
+
+    SLOT_FORMAT = struct.Struct("<QQ")
+
+    def __init__(self, entry_count=1 << 16, name=None):
+        """Creates a new table, or attaches to an existing one by name"""
+        self._entry_count = entry_count
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=entry_count * self.SLOT_FORMAT.size)
+            self._memory.buf[:entry_count * self.SLOT_FORMAT.size] = bytes(entry_count * self.SLOT_FORMAT.size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+
+    def get_name(self):
+        """A method to return the shared memory name other processes attach with"""
+        return self._memory.name
+
+    def get_entry_count(self):
+        """A method to return the number of slots in the table"""
+        return self._entry_count
+
+    def get(self, position_key):
+        """
+        A method to look up a position.
+        :returns (depth, entry type, score, move) or None if the position is not stored
+        """
+        offset = (position_key % self._entry_count) * self.SLOT_FORMAT.size
+        checked_key, data = self.SLOT_FORMAT.unpack_from(self._memory.buf, offset)
+        if not data or checked_key ^ data != position_key:
+            return None
+
+        score = (data & 0xFFFFF) - (1 << 19)
+        depth = (data >> 20) & 0xFF
+        entry_type = (data >> 28) & 0x3
+        move_value = (data >> 31) & 0x3FFFFFF
+        move = XiangqiMove.from_value(move_value) if move_value else None
+        return depth, entry_type, score, move
+
+    def put(self, position_key, depth, entry_type, score, move):
+        """A method to store a search result for a position, replacing what is in its slot"""
+        move_value = move.get_value() if move is not None else 0
+        data = (score + (1 << 19)) | (min(depth, 0xFF) << 20) | (entry_type << 28) | (1 << 30) | \
+            (move_value << 31)
+        offset = (position_key % self._entry_count) * self.SLOT_FORMAT.size
+        self.SLOT_FORMAT.pack_into(self._memory.buf, offset, position_key ^ data, data)
+
+    def clear(self):
+        """A method to empty the table"""
+        self._memory.buf[:self._entry_count * self.SLOT_FORMAT.size] = bytes(self._entry_count *
+                                                                             self.SLOT_FORMAT.size)
+
+    def close(self):
+        """A method to detach from the shared memory"""
+        self._memory.close()
+
+    def unlink(self):
+        """A method to free the shared memory once every process has closed it"""
+        self._memory.unlink()
+
+
+class XiangqiSearchResult:
+    """Represents the outcome of a search"""
+
+    def __init__(self, best_move, score, principal_variation, depth, node_count, elapsed_time):
+        """Initializes the result, moves are XiangqiMove objects"""
+        self._best_move = best_move
+        self._score = score
+        self._principal_variation = principal_variation
+        self._depth = depth
+        self._node_count = node_count
+        self._elapsed_time = elapsed_time
+
+    def get_best_move(self):
+        """A method to return the best XiangqiMove found, or None if there are no moves"""
+        return self._best_move
+
+    def get_score(self):
+        """A method to return the score of the best move for the side to move, in centipawns"""
+        return self._score
+
+    def get_principal_variation(self):
+        """A method to return the expected line of play as a list of XiangqiMove"""
+        return self._principal_variation
+
+    def get_depth(self):
+        """A method to return the deepest completed search depth"""
+        return self._depth
+
+    def get_node_count(self):
+        """A method to return the number of positions searched"""
+        return self._node_count
+
+    def get_elapsed_time(self):
+        """A method to return the time the search took in seconds"""
+        return self._elapsed_time
+
+    def get_nodes_per_second(self):
+        """A method to return the search speed"""
+        if not self._elapsed_time:
+            return 0
+        return self._node_count / self._elapsed_time
+
+
+class XiangqiSearch:
+    """Represents an alpha-beta search over a XiangqiGame"""
+
+    def __init__(self, game, transposition_table=None, stop_event=None, root_rotation=0, tablebase=None):
+        """
+        Initializes a search of the game's current position.
+        The stop event is anything with an is_set method, and root_rotation shifts the order
+        the root moves are tried in, which the parallel search uses to spread its processes out.
+        tablebase is a XiangqiTablebase probed below the root, or None to search every position.
+        """
+        self._game = game
+        self._table = transposition_table if transposition_table is not None else TranspositionTable()
+        self._stop_event = stop_event
+        self._root_rotation = root_rotation
+        self._tablebase = tablebase
+        self._deadline = None
+        self._node_count = 0
+
+    def get_node_count(self):
+        """A method to return the number of positions searched so far"""
+        return self._node_count
+
+    def get_transposition_table(self):
+        """A method to return the search's transposition table"""
+        return self._table
+
+    def search(self, depth, time_limit=None, start_depth=1):
+        """
+        A method to search the current position with iterative deepening up to depth half moves,
+        stopping early if time_limit seconds pass or the stop event is set.
+        :returns a XiangqiSearchResult for the deepest completed depth
+        """
+        start_time = time.perf_counter()
+        self._deadline = start_time + time_limit if time_limit is not None else None
+        self._node_count = 0
+
+        best_move = None
+        best_score = 0
+        best_line = []
+        completed_depth = 0
+        for current_depth in range(max(1, start_depth), depth + 1):
+            try:
+                score, line = self.search_root(current_depth)
+            except SearchStopped:
+                break
+            if not line:
+                break
+            best_score = score
+            best_line = line
+            best_move = line[0]
+            completed_depth = current_depth
+
+            # no point searching deeper once a forced mate is found
+            if abs(score) > MATE_THRESHOLD:
+                break
+
+        return XiangqiSearchResult(best_move, best_score, best_line, completed_depth, self._node_count,
+                                   time.perf_counter() - start_time)
+
+    def search_lines(self, line_count, depth, time_limit=None):
+        """
+        A method to search for the best line_count root moves, each with its own score and line,
+        deepening until depth or until time_limit seconds pass.
+        :returns a list of XiangqiSearchResult, best first, from the deepest depth every line completed
+        """
+        start_time = time.perf_counter()
+        self._deadline = start_time + time_limit if time_limit is not None else None
+        self._node_count = 0
+
+        lines = []
+        completed_depth = 0
+        for current_depth in range(1, depth + 1):
+            # each line searches the root moves the lines before it didn't take
+            current_lines = []
+            excluded_moves = []
+            try:
+                while len(current_lines) < line_count:
+                    score, line = self.search_root(current_depth, excluded_moves)
+                    if not line:
+                        break
+                    current_lines.append((score, line))
+                    excluded_moves.append(line[0])
+            except SearchStopped:
+                if not lines:
+                    lines = current_lines
+                break
+            if not current_lines:
+                break
+            lines = current_lines
+            completed_depth = current_depth
+
+        elapsed_time = time.perf_counter() - start_time
+        lines.sort(key=lambda elem: -elem[0])
+        return [XiangqiSearchResult(line[0], score, line, completed_depth, self._node_count, elapsed_time)
+                for score, line in lines]
+
+    def search_root(self, depth, excluded_moves=()):
+        """A method to search every root move but the excluded ones to a depth, returning the best score and line"""
+        game = self._game
+
+        # a general left open is taken at once, the capture is returned without making it
+        if game.can_capture_general(game.get_turn_order_color()):
+            capture = self.get_general_capture()
+            if capture in excluded_moves:
+                return -INFINITE_SCORE, []
+            return MATE_SCORE, [capture]
+
+        moves = self.order_moves([move for move in game.get_available_moves(game.get_turn_order_color())
+                                  if move not in excluded_moves],
+                                 self.get_table_move(game.get_position_key()))
+        if self._root_rotation and moves:
+            rotation = self._root_rotation % len(moves)
+            moves = moves[:1] + moves[1:][rotation:] + moves[1:][:rotation]
+
+        alpha = -INFINITE_SCORE
+        best_line = []
+        for move in moves:
+            game.apply_move(move)
+            try:
+                score, line = self.search_node(depth - 1, -INFINITE_SCORE, -alpha, 1)
+            finally:
+                game.undo_move()
+            score = -score
+            if score > alpha:
+                alpha = score
+                best_line = [move] + line
+        if best_line and not excluded_moves:
+            self._table.put(game.get_position_key(), depth, EXACT, score_to_table(alpha, 0), best_line[0])
+        return alpha, best_line
+
+    def search_node(self, depth, alpha, beta, ply):
+        """
+        A method for the negamax alpha-beta search below the root.
+        :returns the score for the side to move and the best line found
+        """
+        self._node_count += 1
+        if self._node_count % CHECK_INTERVAL == 0:
+            self.check_stop()
+
+        game = self._game
+        color = game.get_turn_order_color()
+
+        # a general left open ends the line, mates are found below from a side having no moves left
+        if game.can_capture_general(color):
+            return MATE_SCORE - ply, []
+
+        # a position a table covers has its result and distance to mate already
+        if self._tablebase is not None:
+            probed = self._tablebase.probe(game)
+            if probed:
+                result, distance = probed
+                if result == "WIN":
+                    return MATE_SCORE - ply - distance, []
+                if result == "LOSS":
+                    return -(MATE_SCORE - ply - distance), []
+                return 0, []
+
+        # no moves at all is a loss, mated or stalemated, also where the search stops
+        moves = game.get_available_moves(color)
+        if not moves:
+            return -(MATE_SCORE - ply), []
+        if depth <= 0:
+            return XiangqiEvaluation.evaluate(game), []
+
+        position_key = game.get_position_key()
+        entry = self._table.get(position_key)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_type, entry_score, table_move = entry
+            if entry_depth >= depth:
+                entry_score = score_from_table(entry_score, ply)
+                line = [table_move] if table_move else []
+                if entry_type == EXACT:
+                    return entry_score, line
+                if entry_type == LOWER_BOUND and entry_score >= beta:
+                    return entry_score, line
+                if entry_type == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score, line
+
+        original_alpha = alpha
+        best_score = -INFINITE_SCORE
+        best_line = []
+        for move in self.order_moves(moves, table_move):
+            game.apply_move(move)
+            try:
+                score, line = self.search_node(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.undo_move()
+            score = -score
+            if score > best_score:
+                best_score = score
+                best_line = [move] + line
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            entry_type = UPPER_BOUND
+        elif best_score >= beta:
+            entry_type = LOWER_BOUND
+        else:
+            entry_type = EXACT
+        self._table.put(position_key, depth, entry_type, score_to_table(best_score, ply), best_line[0])
+        return best_score, best_line
+
+    def get_general_capture(self):
+        """
+        A method to find the move that takes the other general, for a side that can take it.
+        :returns a XiangqiMove, from one of the side's moves or the general flying along an open file
+        """
+        game = self._game
+        color = game.get_turn_order_color()
+        for move in game.get_available_moves(color):
+            if move.get_captured_piece_code() & 7 == PIECE_CODES[General]:
+                return move
+        board = game.get_game_board()
+        generals = {general.get_game_piece_color(): general for general in board.get_generals()}
+        other_general = generals["Black" if color == "Red" else "Red"]
+        return board.create_move(generals[color].get_game_piece_location_row(),
+                                 generals[color].get_game_piece_location_col(),
+                                 other_general.get_game_piece_location_row(),
+                                 other_general.get_game_piece_location_col())
+
+    def get_table_move(self, position_key):
+        """A method to return the best move stored for a position, or None"""
+        entry = self._table.get(position_key)
+        if entry is None:
+            return None
+        return entry[3]
+
+    def order_moves(self, moves, table_move=None):
+        """A method to sort moves with the stored best move first, then captures, most valuable victims first"""
+        def move_order(move):
+            if move == table_move:
+                return -INFINITE_SCORE
+            if move.is_capture():
+                return -move.get_capture_order()
+            return 0
+
+        return sorted(moves, key=move_order)
+
+    def check_stop(self):
+        """A method to stop the search if the time is up or the stop event is set"""
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchStopped()
+        if self._stop_event is not None and self._stop_event.is_set():
+            raise SearchStopped()
+
+
+def _run_search_worker(fen, depth, time_limit, worker_number, table_name, entry_count, result_queue, stop_event):
+    """A function run in each process of the parallel search"""
+    game = XiangqiGame()
+    game.load_fen(fen)
+    table = SharedTranspositionTable(entry_count, table_name)
+    try:
+        # helpers start one depth deeper on odd numbers and try the root moves in a different order
+        search = XiangqiSearch(game, table, stop_event, root_rotation=worker_number)
+        result = search.search(depth + worker_number % 2, time_limit, start_depth=1 + worker_number % 2)
+        result_queue.put((worker_number, result.get_best_move(), result.get_score(),
+                          result.get_principal_variation(), result.get_depth(), result.get_node_count()))
+    finally:
+        table.close()
+
+
+def parallel_search(game, depth, workers=None, time_limit=None, entry_count=1 << 16):
+    """
+    A function to search a game's position in several processes sharing one transposition table.
+    The helpers are stopped when the main process finishes, and the result of the process that completed
+    the deepest search is returned, with the node counts of every process added together.
+    :returns a XiangqiSearchResult
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    fen = game.get_fen()
+    table = SharedTranspositionTable(entry_count)
+    result_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    start_time = time.perf_counter()
+
+    processes = [multiprocessing.Process(target=_run_search_worker,
+                                         args=(fen, depth, time_limit, number, table.get_name(), entry_count,
+                                               result_queue, stop_event))
+                 for number in range(workers)]
+    try:
+        for process in processes:
+            process.start()
+
+        # once the main process finishes the helpers are stopped and report what they completed
+        results = []
+        while len(results) < workers:
+            results.append(result_queue.get())
+            if results[-1][0] == 0:
+                stop_event.set()
+        for process in processes:
+            process.join()
+    finally:
+        stop_event.set()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        table.close()
+        table.unlink()
+
+    elapsed_time = time.perf_counter() - start_time
+    node_count = sum(result[5] for result in results)
+    results.sort(key=lambda result: (-result[4], result[0]))
+    worker_number, best_move, score, principal_variation, completed_depth, nodes = results[0]
+    return XiangqiSearchResult(best_move, score, principal_variation, completed_depth, node_count, elapsed_time)
+
+
+def benchmark_parallel_search(fen, depth, worker_counts=(1, 2, 4)):
+    """
+    A function to measure how the parallel search's speed scales with the number of processes.
+    :returns a list of (workers, nodes per second, speedup over one process) for each worker count
+    """
+    game = XiangqiGame()
+    game.load_fen(fen)
+    measurements = []
+    base_speed = None
+    for workers in worker_counts:
+        result = parallel_search(game, depth, workers)
+        speed = result.get_nodes_per_second()
+        if base_speed is None:
+            base_speed = speed
+        measurements.append((workers, speed, speed / base_speed if base_speed else 0))
+    return measurements
+
+
+def main():
+    # print the parallel search speedup for a middle game position when run as a script
+    fen = "r1bakab1r/9/1cn3nc1/p1p1p1p1p/9/9/P1P1P1P1P/1CN3NC1/9/R1BAKAB1R w"
+    for workers, speed, speedup in benchmark_parallel_search(fen, 2):
+        print("%d workers: %.0f nodes per second, %.2fx" % (workers, speed, speedup))
+
+
+if __name__ == '__main__':
+    main()
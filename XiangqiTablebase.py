@@ -0,0 +1,414 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: Endgame tablebases for Xiangqi positions with a few pieces.
+# A material set is written with FEN letters, Red in upper case and Black in lower case,
+# for example "KRk" for a chariot against a lone general or "KNPkaa" for horse and soldier against two advisors.
+# Both generals are always part of the set.
+#
+# The generator lists every placement of the set on the squares each piece can stand on,
+# finds the moves out of each position with the XiangqiGame rules using a pool of processes,
+# then works back from the mated positions to find the wins and losses and their distance.
+# Captures lead into the smaller material sets, which are generated first.
+# A position where the side to move could take the other general is not a legal position.
+#
+# Each table is stored as one byte per position: 0 for a draw, 1 for a position that can't happen,
+# and 2 + the number of half moves to mate otherwise. An odd distance is a win for the side to move
+# and an even distance a loss. Tables are mapped into memory with mmap when probed.
+# XiangqiSearch probes the tables below its root in place of searching, and XiangqiMatch adjudicates games from them.
+
+import mmap
+import multiprocessing
+import os
+
+from XiangqiGame import XiangqiGame, FEN_PIECE_TYPES, FEN_LETTERS
+
+TABLEBASE_HEADER = b"XQTB0001"
+TABLEBASE_EXTENSION = ".xtb"
+DRAW = 0
+INVALID = 1
+MAX_DISTANCE = 253
+
+# the order pieces are listed in a material set
+PIECE_ORDER = "kabnrcp"
+
+# the squares each piece can stand on, from Red's side, Black's are mirrored
+PALACE_SQUARES = [(row, col) for row in (7, 8, 9) for col in (3, 4, 5)]
+ADVISOR_SQUARES = [(7, 3), (7, 5), (8, 4), (9, 3), (9, 5)]
+ELEPHANT_SQUARES = [(5, 2), (5, 6), (7, 0), (7, 4), (7, 8), (9, 2), (9, 6)]
+BOARD_SQUARES = [(row, col) for row in range(10) for col in range(9)]
+
+
+def get_piece_squares(letter, color):
+    """A function to return the sorted list of squares a piece can stand on"""
+    if letter == "k":
+        squares = PALACE_SQUARES
+    elif letter == "a":
+        squares = ADVISOR_SQUARES
+    elif letter == "b":
+        squares = ELEPHANT_SQUARES
+    else:
+        return BOARD_SQUARES
+    if color == "Black":
+        squares = [(9 - row, col) for row, col in squares]
+    return sorted(squares)
+
+
+def parse_material(material):
+    """
+    A function to read a material set like "KRk" into a list of (letter, color) in the table order.
+    :returns the list, or False if the set doesn't have exactly one general of each color
+    """
+    pieces = []
+    for letter in material:
+        if letter.lower() not in PIECE_ORDER:
+            return False
+        pieces.append((letter.lower(), "Red" if letter.isupper() else "Black"))
+    if pieces.count(("k", "Red")) != 1 or pieces.count(("k", "Black")) != 1:
+        return False
+    return sorted(pieces, key=lambda piece: (piece[1] != "Red", PIECE_ORDER.index(piece[0])))
+
+
+def get_material_name(pieces):
+    """A function to return the material set name of a list of (letter, color)"""
+    pieces = sorted(pieces, key=lambda piece: (piece[1] != "Red", PIECE_ORDER.index(piece[0])))
+    return "".join(letter.upper() if color == "Red" else letter for letter, color in pieces)
+
+
+class XiangqiTablebaseIndex:
+    """Represents the numbering of the positions of one material set"""
+
+    def __init__(self, material):
+        """Initializes the index for a material set name"""
+        self._pieces = parse_material(material)
+        if not self._pieces:
+            raise ValueError("not a material set: " + material)
+        self._material = get_material_name(self._pieces)
+        self._squares = [get_piece_squares(letter, color) for letter, color in self._pieces]
+        self._square_numbers = [{square: number for number, square in enumerate(squares)}
+                                for squares in self._squares]
+        self._size = 2
+        for squares in self._squares:
+            self._size *= len(squares)
+
+    def get_material(self):
+        """A method to return the material set name"""
+        return self._material
+
+    def get_pieces(self):
+        """A method to return the (letter, color) of each piece in table order"""
+        return self._pieces
+
+    def get_size(self):
+        """A method to return the number of positions in the table"""
+        return self._size
+
+    def decode(self, index):
+        """
+        A method to turn a position number into its placement.
+        :returns a list of (row, col) in table order and the color to move,
+        or False if pieces overlap or identical pieces are not in ascending order
+        """
+        color = "Red" if index % 2 == 0 else "Black"
+        index //= 2
+        numbers = []
+        for squares in reversed(self._squares):
+            index, number = divmod(index, len(squares))
+            numbers.append(number)
+        numbers.reverse()
+
+        locations = []
+        for position, number in enumerate(numbers):
+            # identical pieces are kept in ascending order so each placement is only counted once
+            if position and self._pieces[position] == self._pieces[position - 1] and \
+                    number <= numbers[position - 1]:
+                return False
+            locations.append(self._squares[position][number])
+        if len(set(locations)) != len(locations):
+            return False
+        return locations, color
+
+    def encode(self, located_pieces, color):
+        """
+        A method to turn a placement of (letter, color, row, col) into its position number.
+        :returns the number, or False if the placement doesn't belong to this table
+        """
+        groups = {}
+        for letter, piece_color, row, col in located_pieces:
+            groups.setdefault((letter, piece_color), []).append((row, col))
+
+        index = 0
+        used = {}
+        for position, piece in enumerate(self._pieces):
+            if piece not in used:
+                group = groups.get(piece, [])
+                numbers = sorted(self._square_numbers[position].get(square, -1) for square in group)
+                if -1 in numbers:
+                    return False
+                used[piece] = numbers
+            if not used[piece]:
+                return False
+            index = index * len(self._squares[position]) + used[piece].pop(0)
+        if any(used.get(piece) for piece in used) or len(located_pieces) != len(self._pieces):
+            return False
+        return index * 2 + (0 if color == "Red" else 1)
+
+
+def get_located_pieces(game):
+    """A function to list a game's pieces as (letter, color, row, col)"""
+    located_pieces = []
+    for row in range(10):
+        for col in range(9):
+            current_piece = game.get_game_board().get_game_piece_by_location(row, col)
+            if current_piece:
+                located_pieces.append((FEN_LETTERS[type(current_piece)], current_piece.get_game_piece_color(),
+                                       row, col))
+    return located_pieces
+
+
+# state kept by each generator process
+_worker_state = {}
+
+
+def _start_worker(material, directory):
+    """A function to set up a generator process"""
+    _worker_state["index"] = XiangqiTablebaseIndex(material)
+    _worker_state["tablebase"] = XiangqiTablebase(directory)
+    _worker_state["game"] = XiangqiGame()
+
+
+def _analyse_positions(index_range):
+    """
+    A function to find the moves out of a range of positions.
+    :returns a list with, for each position, None if it can't happen, or a list of the position numbers
+    reached in the same table and a list of the table values reached through captures
+    """
+    table_index = _worker_state["index"]
+    tablebase = _worker_state["tablebase"]
+    game = _worker_state["game"]
+    pieces = table_index.get_pieces()
+
+    results = []
+    for index in range(*index_range):
+        decoded = table_index.decode(index)
+        if not decoded:
+            results.append(None)
+            continue
+        locations, color = decoded
+        other_color = "Black" if color == "Red" else "Red"
+        placement = [(FEN_PIECE_TYPES[letter](None, piece_color), row, col)
+                     for (letter, piece_color), (row, col) in zip(pieces, locations)]
+        game.set_up_position(placement, color)
+        if game.can_capture_general(color):
+            results.append(None)
+            continue
+
+        # follow each move to the position it reaches
+        located_pieces = [(letter, piece_color, row, col)
+                          for (letter, piece_color), (row, col) in zip(pieces, locations)]
+        successors = []
+        capture_values = []
+        for move in game.get_available_moves(color):
+            row_start, col_start = move.get_start_row(), move.get_start_col()
+            row_end, col_end = move.get_end_row(), move.get_end_col()
+            moved_pieces = []
+            captured = False
+            for letter, piece_color, row, col in located_pieces:
+                if (row, col) == (row_start, col_start):
+                    moved_pieces.append((letter, piece_color, row_end, col_end))
+                elif (row, col) == (row_end, col_end):
+                    captured = True
+                else:
+                    moved_pieces.append((letter, piece_color, row, col))
+            if captured:
+                value = tablebase.probe_pieces(moved_pieces, other_color)
+                capture_values.append(DRAW if value is False else value)
+            else:
+                successor = table_index.encode(moved_pieces, other_color)
+                if successor is not False:
+                    successors.append(successor)
+        results.append((successors, capture_values))
+    return results
+
+
+def generate_tablebase(material, directory, processes=None, chunk_size=512):
+    """
+    A function to generate the table for a material set, and the tables of every smaller set it captures into.
+    Tables already in the directory are not generated again.
+    :returns the path of the table file
+    """
+    table_index = XiangqiTablebaseIndex(material)
+    material = table_index.get_material()
+    path = os.path.join(directory, material + TABLEBASE_EXTENSION)
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+
+    # generate the tables captures lead into first
+    pieces = table_index.get_pieces()
+    for position, piece in enumerate(pieces):
+        if piece[0] != "k":
+            generate_tablebase(get_material_name(pieces[:position] + pieces[position + 1:]),
+                               directory, processes, chunk_size)
+
+    # find the moves out of every position across the process pool
+    size = table_index.get_size()
+    chunks = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+    successors = [None] * size
+    with multiprocessing.Pool(processes, _start_worker, (material, directory)) as pool:
+        index = 0
+        for results in pool.imap(_analyse_positions, chunks):
+            for result in results:
+                successors[index] = result
+                index += 1
+
+    values = solve_positions(successors)
+    with open(path + ".tmp", "wb") as table_file:
+        table_file.write(TABLEBASE_HEADER)
+        table_file.write(values)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def solve_positions(successors):
+    """
+    A function to work back from the positions with no moves left to the wins and losses of every position.
+    Positions are settled in order of distance, so each one gets its shortest win or longest loss.
+    :returns a bytearray of table values
+    """
+    size = len(successors)
+    values = bytearray(size)
+    settled = [False] * size
+    remaining = [0] * size
+    longest_loss = [-1] * size
+    has_win = [False] * size
+    predecessors = [[] for _ in range(size)]
+    pending = {}
+
+    for index in range(size):
+        if successors[index] is None:
+            values[index] = INVALID
+            settled[index] = True
+
+    for index in range(size):
+        if settled[index]:
+            continue
+        same_table, capture_values = successors[index]
+        for successor in same_table:
+            if successors[successor] is not None:
+                predecessors[successor].append(index)
+                remaining[index] += 1
+        for value in capture_values:
+            if value == DRAW:
+                remaining[index] += 1
+            elif value != INVALID:
+                distance = value - 2
+                if distance % 2 == 0:
+                    has_win[index] = True
+                    pending.setdefault(distance + 1, []).append(index)
+                else:
+                    longest_loss[index] = max(longest_loss[index], distance)
+        if remaining[index] == 0 and not has_win[index]:
+            pending.setdefault(longest_loss[index] + 1, []).append(index)
+
+    # settle positions a distance at a time
+    distance = 0
+    while pending and distance <= MAX_DISTANCE:
+        for index in pending.pop(distance, []):
+            if settled[index]:
+                continue
+            settled[index] = True
+            values[index] = distance + 2
+            for predecessor in predecessors[index]:
+                if settled[predecessor]:
+                    continue
+                if distance % 2 == 0:
+                    # the predecessor can move into a lost position
+                    has_win[predecessor] = True
+                    pending.setdefault(distance + 1, []).append(predecessor)
+                else:
+                    remaining[predecessor] -= 1
+                    longest_loss[predecessor] = max(longest_loss[predecessor], distance)
+                    if remaining[predecessor] == 0 and not has_win[predecessor]:
+                        pending.setdefault(longest_loss[predecessor] + 1, []).append(predecessor)
+        distance += 1
+
+    # anything left is a draw
+    return values
+
+
+class XiangqiTablebase:
+    """Represents a directory of generated tables that can be probed"""
+
+    def __init__(self, directory):
+        """Initializes the prober, tables are opened as they are first needed"""
+        self._directory = directory
+        self._tables = {}
+
+    def get_table(self, material):
+        """
+        A method to open a table by material set name.
+        :returns a (index, mapped table) pair, or False if there is no table for the set
+        """
+        if material not in self._tables:
+            path = os.path.join(self._directory, material + TABLEBASE_EXTENSION)
+            if not os.path.exists(path):
+                self._tables[material] = False
+            else:
+                with open(path, "rb") as table_file:
+                    table_map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._tables[material] = (XiangqiTablebaseIndex(material), table_map)
+        return self._tables[material]
+
+    def probe_pieces(self, located_pieces, color):
+        """
+        A method to read the table value of a placement of (letter, color, row, col) with color to move.
+        :returns the value byte, or False if there is no table for it
+        """
+        table = self.get_table(get_material_name([(letter, piece_color)
+                                                   for letter, piece_color, row, col in located_pieces]))
+        if not table:
+            return False
+        table_index, table_map = table
+        index = table_index.encode(located_pieces, color)
+        if index is False:
+            return False
+        return table_map[len(TABLEBASE_HEADER) + index]
+
+    def probe(self, game):
+        """
+        A method to look up a game's position for the side whose turn it is.
+        :returns ("WIN", distance), ("LOSS", distance) or ("DRAW", 0) with the distance in half moves to mate,
+        or False if the position is not covered by a table
+        """
+        if len(game.get_game_board().get_generals()) != 2:
+            return False
+        value = self.probe_pieces(get_located_pieces(game), game.get_turn_order_color())
+        if value is False or value == INVALID:
+            return False
+        if value == DRAW:
+            return "DRAW", 0
+        distance = value - 2
+        return ("WIN" if distance % 2 else "LOSS"), distance
+
+    def get_adjudicated_state(self, game):
+        """
+        A method to adjudicate a game from the tables.
+        :returns "RED_WON" or "BLACK_WON" if the position is a forced win, "DRAW" for a drawn position,
+        or False if the position is not covered by a table
+        """
+        result = self.probe(game)
+        if not result:
+            return False
+        if result[0] == "DRAW":
+            return "DRAW"
+        color = game.get_turn_order_color()
+        if result[0] == "LOSS":
+            color = "Black" if color == "Red" else "Red"
+        return color.upper() + "_WON"
+
+    def close(self):
+        """A method to unmap the open tables"""
+        for table in self._tables.values():
+            if table:
+                table[1].close()
+        self._tables = {}
@@ -0,0 +1,195 @@
+# Author: Ray Franklin
+# Date: 10/19/2026
+# Description: A UCCI protocol front end for the Xiangqi search, so GUIs and match managers can run it.
+# Commands are read a line at a time from stdin and answers are written to stdout.
+# Supported commands: ucci, isready, setoption (ignored), position, go, stop, quit.
+#
+#   position startpos moves h2e2 h9g7
+#   position fen rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1 moves h2e2
+#   go depth 4
+#   go movetime 2000
+#   go time 60000 increment 1000 movestogo 20
+#
+# movetime is the time for this move. time is what is left on the clock, which is split over movestogo moves,
+# or DEFAULT_MOVES_TO_GO when it isn't given, plus the increment.
+#
+# Moves are written in ICCS, file a-i and rank 0-9 counted from Red's side, so "h2e2" is "h3" to "e3" here.
+# The search runs in its own thread, so stop and isready are answered while it is thinking.
+
+import sys
+import threading
+
+from XiangqiGame import XiangqiGame
+from XiangqiNotation import convert_iccs_to_locations, convert_move_to_iccs
+from XiangqiSearch import XiangqiSearch, TranspositionTable, MATE_THRESHOLD, MATE_SCORE
+
+ENGINE_NAME = "Python Xiangqi"
+ENGINE_AUTHOR = "Ray Franklin"
+DEFAULT_DEPTH = 64
+DEFAULT_MOVES_TO_GO = 30
+
+
+def get_search_limits(words):
+    """
+    A function to read the depth and time limit from the words after "go".
+    :returns (depth, time limit in seconds or None for no limit)
+    """
+    values = {}
+    for index in range(len(words) - 1):
+        if words[index] in ("depth", "movetime", "time", "increment", "movestogo") and words[index + 1].isdigit():
+            values[words[index]] = int(words[index + 1])
+    depth = values.get("depth", DEFAULT_DEPTH)
+
+    if "movetime" in values:
+        return depth, values["movetime"] / 1000
+    if "time" in values:
+        # spend an even share of the clock on each move left, never more than is left
+        moves_to_go = values.get("movestogo") or DEFAULT_MOVES_TO_GO
+        time_limit = values["time"] / moves_to_go + values.get("increment", 0)
+        return depth, min(time_limit, values["time"]) / 1000
+    return depth, None
+
+
+class XiangqiUcciEngine:
+    """Represents a UCCI engine reading commands and writing answers"""
+
+    def __init__(self, output_stream=None):
+        """Initializes the engine at the starting position, writing to output_stream or stdout"""
+        self._output_stream = output_stream if output_stream is not None else sys.stdout
+        self._output_lock = threading.Lock()
+        self._game = XiangqiGame()
+        self._table = TranspositionTable()
+        self._search_thread = None
+        self._stop_event = threading.Event()
+
+    def get_game(self):
+        """A method to return the game holding the current position"""
+        return self._game
+
+    def is_searching(self):
+        """A method to determine if a search is running"""
+        return self._search_thread is not None and self._search_thread.is_alive()
+
+    def send(self, line):
+        """A method to write a line of output, one thread at a time"""
+        with self._output_lock:
+            self._output_stream.write(line + "\n")
+            self._output_stream.flush()
+
+    def handle_command(self, line):
+        """
+        A method to carry out one command line.
+        :returns False after quit, True otherwise
+        """
+        words = line.split()
+        if not words:
+            return True
+        command = words[0]
+
+        if command == "ucci":
+            self.send("id name " + ENGINE_NAME)
+            self.send("id author " + ENGINE_AUTHOR)
+            self.send("ucciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "position":
+            self.stop_search()
+            self.set_position(words[1:])
+        elif command == "go":
+            self.stop_search()
+            self.start_search(words[1:])
+        elif command == "stop":
+            self.stop_search()
+        elif command == "quit":
+            self.stop_search()
+            return False
+        elif command != "setoption":
+            self.send("info string unknown command " + command)
+        return True
+
+    def set_position(self, words):
+        """
+        A method to set the position from the words after "position", a start position followed by moves.
+        :returns True if the position and every move could be used, False otherwise
+        """
+        if "moves" in words:
+            moves = words[words.index("moves") + 1:]
+            words = words[:words.index("moves")]
+        else:
+            moves = []
+
+        game = XiangqiGame()
+        if words[:1] == ["fen"] and len(words) > 1:
+            # only the placement and side to move are used from the FEN fields
+            if not game.load_fen(" ".join(words[1:3])):
+                self.send("info string bad fen")
+                return False
+        elif words[:1] != ["startpos"]:
+            self.send("info string bad position")
+            return False
+
+        for iccs_move in moves:
+            locations = convert_iccs_to_locations(iccs_move)
+            if not locations or not game.make_move(*locations):
+                self.send("info string illegal move " + iccs_move)
+                return False
+        self._game = game
+        return True
+
+    def start_search(self, words):
+        """A method to start searching the current position in a thread, from the words after "go" """
+        depth, time_limit = get_search_limits(words)
+
+        # the thread gets its own copy of the game so a new position can be set while it stops
+        game = XiangqiGame()
+        game.load_fen(self._game.get_fen())
+        self._stop_event = threading.Event()
+        search = XiangqiSearch(game, self._table, self._stop_event)
+        self._search_thread = threading.Thread(target=self.run_search, args=(search, depth, time_limit),
+                                               daemon=True)
+        self._search_thread.start()
+
+    def run_search(self, search, depth, time_limit):
+        """A method run in the search thread, writing the result and best move when the search ends"""
+        result = search.search(depth, time_limit)
+        if result.get_best_move() is None:
+            self.send("nobestmove")
+            return
+
+        score = result.get_score()
+        if abs(score) > MATE_THRESHOLD:
+            score_text = "mate %d" % ((MATE_SCORE - abs(score) + 1) // 2 * (1 if score > 0 else -1))
+        else:
+            score_text = "cp %d" % score
+        self.send("info depth %d score %s nodes %d time %d pv %s" % (
+            result.get_depth(), score_text, result.get_node_count(), result.get_elapsed_time() * 1000,
+            " ".join(convert_move_to_iccs(move) for move in result.get_principal_variation())))
+        self.send("bestmove " + convert_move_to_iccs(result.get_best_move()))
+
+    def wait_for_search(self):
+        """A method to wait for a running search to finish on its own"""
+        if self._search_thread is not None:
+            self._search_thread.join()
+            self._search_thread = None
+
+    def stop_search(self):
+        """A method to stop a running search and wait for it to write its best move"""
+        self._stop_event.set()
+        self.wait_for_search()
+
+    def run(self, input_stream=None):
+        """A method to read and carry out commands until quit or the end of the input"""
+        input_stream = input_stream if input_stream is not None else sys.stdin
+        for line in input_stream:
+            if not self.handle_command(line):
+                return
+        self.stop_search()
+
+
+def main():
+    # run the engine on stdin and stdout
+    XiangqiUcciEngine().run()
+
+
+if __name__ == '__main__':
+    main()